@@ -0,0 +1,199 @@
+"""Benchmark ``match_modules`` on synthetic import graphs.
+
+Every combination of the given parameters is benchmarked. Phases are timed
+separately, the fastest of ``--repeat`` runs is reported. Peak memory is
+measured by an extra run under :mod:`tracemalloc`, so tracing does not
+affect timings. Chains are enumerated for the first ``--chain-sample``
+conflicts only, since their number grows quickly with the graph size.
+
+Usage::
+
+    python benchmarks/run.py --modules 1000 10000 --output results.json
+    python benchmarks/run.py --modules 1000 10000 --compare results.json
+"""
+
+import json
+import platform
+import sys
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+
+from layer_enforcer import __version__
+from layer_enforcer.chains import CHAIN_STRATEGIES, K_SHORTEST, BoundedChainsTree
+from layer_enforcer.impl import match_modules
+from layer_enforcer.native import new_native_tree
+from layer_enforcer.testing import (
+    PACKAGE,
+    GraphSpec,
+    make_graph,
+    make_layers,
+    write_package,
+)
+from layer_enforcer.timings import Phase, Timings
+
+Result = Dict[str, Any]
+
+
+def run_once(spec: GraphSpec, args: Namespace, trace_memory: bool) -> Result:
+    timings = Timings(trace_memory=trace_memory)
+    layers = make_layers(spec)
+
+    timings.start("generate")
+    tree = make_graph(spec)
+
+    if args.native:
+        with TemporaryDirectory() as tmp:
+            root = write_package(tree, Path(tmp))
+            timings.start("graph build")
+            tree = new_native_tree(
+                PACKAGE, find_sources=lambda module: [root], jobs=args.jobs
+            )
+
+    bounded = BoundedChainsTree(tree, args.chains, max_count=args.max_chains)
+    conflicts = list(match_modules(bounded, layers, timings=timings))
+
+    sample = conflicts[: args.chain_sample or None]
+    timings.start("chains")
+    chains = sum(
+        len(conflict.main.chains) + len(conflict.dupe.chains) for conflict in sample
+    )
+    timings.stop()
+
+    return {
+        "conflicts": len(conflicts),
+        "chain_sample": len(sample),
+        "chains": chains,
+        "phases": {phase.name: phase for phase in timings.phases},
+    }
+
+
+def run(spec: GraphSpec, args: Namespace) -> Result:
+    runs = [run_once(spec, args, trace_memory=False) for _ in range(args.repeat)]
+    memory = run_once(spec, args, trace_memory=True)
+    phases: Dict[str, Dict[str, Optional[float]]] = {}
+
+    for name, traced in memory["phases"].items():
+        timed: List[Phase] = [result["phases"][name] for result in runs]
+        phases[name] = {
+            "wall": min(phase.wall for phase in timed),
+            "cpu": min(phase.cpu for phase in timed),
+            "peak_memory": traced.peak_memory,
+        }
+
+    return {
+        "spec": asdict(spec),
+        "conflicts": memory["conflicts"],
+        "chain_sample": memory["chain_sample"],
+        "chains": memory["chains"],
+        "phases": phases,
+    }
+
+
+def spec_key(spec: Dict[str, Any]) -> str:
+    return ",".join(f"{key}={value}" for key, value in sorted(spec.items()))
+
+
+def compare(results: List[Result], baseline_path: Path) -> None:
+    baseline = {
+        spec_key(result["spec"]): result
+        for result in json.loads(baseline_path.read_text())["results"]
+    }
+
+    for result in results:
+        key = spec_key(result["spec"])
+        print(key)  # noqa: T201
+
+        if key not in baseline:
+            print("  not in baseline")  # noqa: T201
+            continue
+
+        for name, phase in result["phases"].items():
+            old = baseline[key]["phases"].get(name)
+
+            if old is None or not old["wall"]:
+                continue
+
+            ratio = phase["wall"] / old["wall"]
+            print(  # noqa: T201
+                f"  {name:<12} {old['wall']:>10.4f}s -> {phase['wall']:>10.4f}s "
+                f"({ratio:.2f}x)"
+            )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument("--modules", type=int, nargs="+", default=[1000])
+    parser.add_argument("--fan-out", type=int, nargs="+", default=[4])
+    parser.add_argument("--cycle-density", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--layer-depth", type=int, nargs="+", default=[3])
+    parser.add_argument("--submodules", type=int, nargs="+", default=[2])
+    parser.add_argument("--violations", type=float, nargs="+", default=[0.001])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chains", choices=CHAIN_STRATEGIES, default=K_SHORTEST)
+    parser.add_argument("--max-chains", type=int)
+    parser.add_argument(
+        "--chain-sample",
+        type=int,
+        default=1000,
+        help="Number of conflicts to enumerate chains for, 0 for all.",
+    )
+    parser.add_argument(
+        "--native",
+        action="store_true",
+        help="Write sources to disk and time the native tree factory too.",
+    )
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Save results as JSON.")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare.")
+    args = parser.parse_args()
+    results = []
+
+    for modules, fan_out, cycle_density, layer_depth, submodules, violations in product(
+        args.modules,
+        args.fan_out,
+        args.cycle_density,
+        args.layer_depth,
+        args.submodules,
+        args.violations,
+    ):
+        spec = GraphSpec(
+            modules=modules,
+            fan_out=fan_out,
+            cycle_density=cycle_density,
+            layer_depth=layer_depth,
+            submodules=submodules,
+            violations=violations,
+            seed=args.seed,
+        )
+        result = run(spec, args)
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)  # noqa: T201
+
+    report = {
+        "meta": {
+            "layer_enforcer": __version__,
+            "python": sys.version,
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "chains": args.chains,
+            "repeat": args.repeat,
+            "chain_sample": args.chain_sample,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
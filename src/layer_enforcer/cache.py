@@ -0,0 +1,146 @@
+import os
+from hashlib import sha256
+from importlib.util import find_spec
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO, Iterator, List, Optional, Protocol, Union, cast
+
+from . import __version__
+from .graph import GraphError, GraphTree
+from .interfaces import Tree, TreeFactory
+
+CACHE_DIR = Path(".layer_enforcer_cache")
+
+
+class FindSources(Protocol):
+    def __call__(self, module: str) -> List[Path]:
+        """Find source roots of ``module``.
+
+        Args:
+            module: Importable module name.
+
+        Returns:
+            Package directories or module files.
+        """
+
+
+def find_sources(module: str) -> List[Path]:
+    spec = find_spec(module)
+
+    if spec is None:
+        return []
+
+    if spec.submodule_search_locations:
+        return [Path(location) for location in spec.submodule_search_locations]
+
+    if spec.origin and spec.has_location:
+        return [Path(spec.origin)]
+
+    return []
+
+
+def iter_source_files(root: Path) -> Iterator[Path]:
+    """Iterate over python files of the package or module at ``root``."""
+    if root.is_file():
+        yield root
+        return
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield Path(dirpath, filename)
+
+
+def fingerprint(
+    *modules: str,
+    salt: str = "",
+    find_sources: FindSources = find_sources,
+) -> str:
+    """Fingerprint sources of ``modules`` by file paths, mtimes and sizes."""
+    digest = sha256(f"{__version__}\0{salt}".encode())
+
+    for module in sorted(modules):
+        digest.update(f"\0{module}".encode())
+
+        for root in find_sources(module):
+            for path in iter_source_files(root):
+                stat = path.stat()
+                digest.update(f"\0{path}\0{stat.st_mtime_ns}\0{stat.st_size}".encode())
+
+    return digest.hexdigest()
+
+
+class CachedTreeFactory:
+    """Tree factory storing built import graphs under ``cache_dir``.
+
+    Graph is rebuilt with ``tree_factory`` only when sources of the modules
+    change, otherwise it is loaded from the snapshot.
+    """
+
+    tree_factory: TreeFactory
+    cache_dir: Path
+    salt: str
+    find_sources: FindSources
+
+    def __init__(
+        self,
+        tree_factory: TreeFactory,
+        cache_dir: Union[Path, str] = CACHE_DIR,
+        *,
+        salt: str = "",
+        find_sources: FindSources = find_sources,
+    ) -> None:
+        self.tree_factory = tree_factory
+        self.cache_dir = Path(cache_dir)
+        self.salt = salt
+        self.find_sources = find_sources
+
+    def path(self, *modules: str) -> Path:
+        key = fingerprint(*modules, salt=self.salt, find_sources=self.find_sources)
+        return self.cache_dir / f"{key}.graph"
+
+    def load(self, path: Path) -> Optional[GraphTree]:
+        try:
+            with path.open("rb") as f:
+                return GraphTree.load(f)
+        except (OSError, GraphError):
+            return None
+
+    def dump(self, tree: GraphTree, path: Path) -> None:
+        """Store ``tree`` at ``path``, a failed write only leaves it uncached."""
+        temp: Optional[str] = None
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            with NamedTemporaryFile("wb", dir=path.parent, delete=False) as f:
+                temp = f.name
+                tree.dump(cast(BinaryIO, f))
+
+            os.replace(temp, path)
+        except OSError:
+            if temp is not None:
+                try:
+                    os.unlink(temp)
+                except OSError:
+                    pass
+
+    def __call__(self, *modules: str) -> Tree:
+        path = self.path(*modules)
+        tree = self.load(path)
+
+        if tree is None:
+            tree = GraphTree.from_tree(self.tree_factory(*modules), modules)
+            self.dump(tree, path)
+
+        return tree
+
+
+def new_cached_grimp_tree(*modules: str) -> Tree:
+    from .grimp import new_grimp_tree
+
+    factory = CachedTreeFactory(new_grimp_tree, salt="layer_enforcer.grimp")
+
+    return factory(*modules)
@@ -0,0 +1,270 @@
+from collections import deque
+from heapq import heappop, heappush
+from typing import Collection, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from .interfaces import Tree
+
+ALL = "all"
+SHORTEST = "shortest"
+K_SHORTEST = "k-shortest"
+CHAIN_STRATEGIES = (ALL, SHORTEST, K_SHORTEST)
+DEFAULT_MAX_CHAINS = 10
+
+
+def find_shortest_chain(
+    tree: Tree,
+    importer: str,
+    imported: str,
+) -> Optional[Tuple[str, ...]]:
+    """Find shortest import chain from ``importer`` to ``imported`` using BFS."""
+    parents: Dict[str, str] = {importer: importer}
+    pending: Deque[str] = deque([importer])
+
+    while pending:
+        module = pending.popleft()
+
+        for target in sorted(tree.find_imported_modules(module)):
+            if target in parents:
+                continue
+
+            parents[target] = module
+
+            if target == imported:
+                chain = [target]
+
+                while module != importer:
+                    chain.append(module)
+                    module = parents[module]
+
+                chain.append(importer)
+
+                return tuple(reversed(chain))
+
+            pending.append(target)
+
+    return None
+
+
+def find_k_shortest_chains(
+    tree: Tree,
+    importer: str,
+    imported: str,
+    max_length: Optional[int] = None,
+) -> Iterator[Tuple[str, ...]]:
+    """Iterate over simple import chains in order of their length.
+
+    Reachable subgraph is explored once, and distances to ``imported`` are
+    used to guide best-first search over chain prefixes, so prefixes are
+    expanded in order of the shortest chain they can lead to.
+
+    Args:
+        tree: Import tree.
+        importer: First module of the chain.
+        imported: Last module of the chain.
+        max_length: Maximum number of modules in the chain. Shortest chain
+            is yielded even if it is longer.
+    """
+    edges: Dict[str, List[str]] = {}
+    pending: Deque[str] = deque([importer])
+
+    while pending:
+        module = pending.popleft()
+
+        if module in edges:
+            continue
+
+        edges[module] = targets = sorted(tree.find_imported_modules(module))
+        pending.extend(target for target in targets if target not in edges)
+
+    reverse: Dict[str, List[str]] = {}
+
+    for module, targets in edges.items():
+        for target in targets:
+            reverse.setdefault(target, []).append(module)
+
+    distance = {imported: 0}
+    pending.append(imported)
+
+    while pending:
+        module = pending.popleft()
+
+        for source in reverse.get(module, ()):
+            if source not in distance:
+                distance[source] = distance[module] + 1
+                pending.append(source)
+
+    if importer == imported or importer not in distance:
+        return
+
+    if max_length is None:
+        longest = len(edges)
+    else:
+        longest = max(distance[importer], max_length - 1)
+
+    # Prefixes are ordered by the length of the shortest chain they may lead
+    # to, longer prefixes first to finish chains early, then by insertion.
+    queue: List[Tuple[int, int, int, Tuple[str, ...]]] = [
+        (distance[importer], -1, 0, (importer,))
+    ]
+    counter = 1
+
+    while queue:
+        length, _, _, chain = heappop(queue)
+
+        if length > longest:
+            return
+
+        for target in edges.get(chain[-1], ()):
+            if target == imported:
+                yield chain + (target,)
+            elif target in distance and target not in chain:
+                heappush(
+                    queue,
+                    (
+                        len(chain) + distance[target],
+                        -len(chain),
+                        counter,
+                        chain + (target,),
+                    ),
+                )
+                counter += 1
+
+
+class BoundedChainsTree(Tree):
+    """Tree wrapper limiting amount of import chains.
+
+    Strategies:
+
+    * ``all``: every simple chain, as reported by the wrapped tree, up to
+      ``max_count`` chains.
+    * ``shortest``: single shortest chain.
+    * ``k-shortest``: up to ``max_count`` (:data:`DEFAULT_MAX_CHAINS` by
+      default) shortest chains with at most ``max_length`` modules. The
+      shortest chain is always reported, even if it is longer than
+      ``max_length``.
+
+    Shortest chains are searched over direct imports. For trees without
+    them (see :meth:`Tree.has_direct_imports`), ``shortest`` and
+    ``k-shortest`` keep the first chains reported by the wrapped tree, up to
+    their count limit, and ignore ``max_length``.
+
+    Pairs of modules with chains left out by any of the limits, including
+    every chain but the first one of ``shortest``, are recorded in
+    ``truncated``.
+    """
+
+    tree: Tree
+    strategy: str
+    max_length: Optional[int]
+    max_count: Optional[int]
+    truncated: Set[Tuple[str, str]]
+
+    def __init__(
+        self,
+        tree: Tree,
+        strategy: str = ALL,
+        *,
+        max_length: Optional[int] = None,
+        max_count: Optional[int] = None,
+    ) -> None:
+        if strategy not in CHAIN_STRATEGIES:
+            raise ValueError(f"Unknown chain strategy: {strategy!r}.")
+
+        self.tree = tree
+        self.strategy = strategy
+        self.max_length = max_length
+        self.max_count = max_count
+        self.truncated = set()
+
+    def walk(self) -> Iterator[str]:
+        return self.tree.walk()
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        max_count: Optional[int]
+        max_length: Optional[int] = None
+
+        if self.strategy == ALL:
+            chains = self.tree.find_chains(importer, imported)
+            max_count = self.max_count
+        elif not self.tree.has_direct_imports():
+            # Searching upstream sets would make up chains out of indirect
+            # imports, so chains of the wrapped tree are cut at the count.
+            chains = self.tree.find_chains(importer, imported)
+
+            if self.strategy == SHORTEST:
+                max_count = 1
+            else:
+                max_count = self.max_count or DEFAULT_MAX_CHAINS
+        else:
+            # Chains come in order of their length, so the search goes on
+            # past the limits only until the first chain left out.
+            chains = find_k_shortest_chains(self.tree, importer, imported)
+
+            if self.strategy == SHORTEST:
+                max_count = 1
+            else:
+                max_count = self.max_count or DEFAULT_MAX_CHAINS
+                max_length = self.max_length
+
+        for count, chain in enumerate(chains):
+            if max_length is not None and count == 0:
+                max_length = max(max_length, len(chain))
+
+            if (max_count is not None and count >= max_count) or (
+                max_length is not None and len(chain) > max_length
+            ):
+                self.truncated.add((importer, imported))
+                return
+
+            yield chain
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return self.tree.find_upstream_modules(module)
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        return self.tree.find_imported_modules(module)
+
+    def has_direct_imports(self) -> bool:
+        return self.tree.has_direct_imports()
+
+    def find_importers(self, imported: Collection[str]) -> Dict[str, Set[str]]:
+        return self.tree.find_importers(imported)
+
+
+class CachedChainsTree(Tree):
+    """Tree wrapper remembering import chains of every pair of modules.
+
+    Chains of a pair are enumerated by the wrapped tree once, on the first
+    query, and kept for the lifetime of the wrapper.
+    """
+
+    tree: Tree
+    chains: Dict[Tuple[str, str], List[Tuple[str, ...]]]
+
+    def __init__(self, tree: Tree) -> None:
+        self.tree = tree
+        self.chains = {}
+
+    def walk(self) -> Iterator[str]:
+        return self.tree.walk()
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        key = importer, imported
+        chains = self.chains.get(key)
+
+        if chains is None:
+            self.chains[key] = chains = list(self.tree.find_chains(importer, imported))
+
+        return iter(chains)
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return self.tree.find_upstream_modules(module)
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        return self.tree.find_imported_modules(module)
+
+    def has_direct_imports(self) -> bool:
+        return self.tree.has_direct_imports()
+
+    def find_importers(self, imported: Collection[str]) -> Dict[str, Set[str]]:
+        return self.tree.find_importers(imported)
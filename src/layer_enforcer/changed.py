@@ -0,0 +1,98 @@
+import subprocess
+from pathlib import Path
+from typing import Collection, Iterable, List, Optional, Protocol, Set
+
+from .cache import FindSources, find_sources
+from .interfaces import ChangedFilesError, Tree
+
+
+class RunGit(Protocol):
+    def __call__(self, *args: str) -> str:
+        """Run git command and return its output.
+
+        Raises:
+            ChangedFilesError: When git fails.
+        """
+
+
+def run_git(*args: str) -> str:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None) or str(e)
+        raise ChangedFilesError(f"git {' '.join(args)} failed: {stderr.strip()}") from e
+
+    return result.stdout
+
+
+def git_changed_files(ref: str, run_git: RunGit = run_git) -> List[Path]:
+    """List files changed since ``ref``, including uncommitted changes.
+
+    Renames are reported as a deleted and an added file, so modules on both
+    sides of the rename are taken into account.
+    """
+    top_level = Path(run_git("rev-parse", "--show-toplevel").strip())
+    output = run_git("diff", "--name-only", "--no-renames", "-z", ref, "--")
+
+    return [top_level / name for name in output.split("\0") if name]
+
+
+def files_to_modules(
+    files: Iterable[Path],
+    modules: Collection[str],
+    find_sources: FindSources = find_sources,
+) -> Set[str]:
+    """Map python files to names of ``modules`` or their submodules.
+
+    Files outside of the source roots of ``modules`` are left out. Files
+    need not exist, so deleted modules are mapped as well.
+    """
+    roots = [
+        (module, root.resolve()) for module in modules for root in find_sources(module)
+    ]
+    found: Set[str] = set()
+
+    for path in files:
+        path = Path(path).resolve()
+
+        if path.suffix != ".py":
+            continue
+
+        for module, root in roots:
+            name = _module_name(path, module, root)
+
+            if name is not None:
+                found.add(name)
+                break
+
+    return found
+
+
+def _module_name(path: Path, module: str, root: Path) -> Optional[str]:
+    if root.suffix == ".py":
+        return module if path == root else None
+
+    try:
+        parts = path.relative_to(root).with_suffix("").parts
+    except ValueError:
+        return None
+
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+
+    return ".".join((module, *parts))
+
+
+def find_affected(tree: Tree, changed: Collection[str]) -> Set[str]:
+    """Changed modules and all walked modules importing them."""
+    affected = set(changed)
+
+    for importers in tree.find_importers(changed).values():
+        affected.update(importers)
+
+    return affected
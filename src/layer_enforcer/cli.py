@@ -1,66 +1,565 @@
 import sys
+import warnings
+from contextlib import nullcontext
+from functools import partial
 from importlib import import_module
+from pathlib import Path
 from types import ModuleType
-from typing import Callable
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
 
-from .config.args import ArgparseConfigLoader
-from .config.interfaces import Config, ConfigLoader
-from .config.layers import YamlLayersLoader
+from .chains import ALL, CHAIN_STRATEGIES, SHORTEST, BoundedChainsTree
+from .config.args import EXPLAIN, SERVE, ArgparseConfigLoader
+from .config.interfaces import Config, ConfigError, ConfigLoader
+from .config.layers import (
+    CachedLayersLoader,
+    DeferredLayersLoader,
+    TimedLayersLoader,
+    YamlLayersLoader,
+)
 from .config.multiple import MultipleConfigLoader
 from .config.pyproject import CONFIG_PATH, PyprojectTomlConfigLoader
-from .impl import match_modules
-from .interfaces import MatchModules
+from .graph import GraphError
+from .interfaces import (
+    ChangedFilesError,
+    Conflict,
+    LayersLoader,
+    MatchModules,
+    Tree,
+    TreeFactory,
+    UnmatchedPatternWarning,
+)
+from .timings import Timings, format_timings
 from .utils import load_factory
 
+# Heavy dependencies (yaml, tomllib, argparse, graph backends) are imported
+# only by the code paths using them, keep module level imports light.
+
 DEFAULT_LAYER_LOADER = YamlLayersLoader()
-DEFAULT_CONFIG_LOADER = MultipleConfigLoader(
-    [
-        PyprojectTomlConfigLoader(
-            CONFIG_PATH,
-            layers_loader=DEFAULT_LAYER_LOADER,
-        ),
-        ArgparseConfigLoader(
-            sys.argv[1:],
-            layers_loader=DEFAULT_LAYER_LOADER,
-        ),
-    ],
-)
+NATIVE_TREE_FACTORY = "layer_enforcer.native:new_native_tree"
+
+
+def default_config_loader(
+    layers_loader: LayersLoader = DEFAULT_LAYER_LOADER,
+) -> ConfigLoader:
+    """Load config from pyproject.toml, overridden by command line args.
+
+    pyproject.toml is not read when only help is asked for.
+    """
+    argv = sys.argv[1:]
+    loaders: List[ConfigLoader] = []
+
+    if not {"-h", "--help"} & set(argv):
+        loaders.append(
+            PyprojectTomlConfigLoader(CONFIG_PATH, layers_loader=layers_loader)
+        )
+
+    loaders.append(ArgparseConfigLoader(argv, layers_loader=layers_loader))
+
+    return MultipleConfigLoader(loaders)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "DEFAULT_CONFIG_LOADER":
+        return default_config_loader()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _phase(timings: Optional[Timings], name: str) -> ContextManager[None]:
+    return nullcontext() if timings is None else timings.phase(name)
+
+
+def _writeln_stderr(s: str) -> None:
+    print(s, file=sys.stderr)  # noqa: T201
 
 
 def main(
     writeln: Callable[[str], None] = print,  # noqa: T202
     import_module: Callable[[str], ModuleType] = import_module,
-    match_modules: MatchModules = match_modules,
-    config_loader: ConfigLoader = DEFAULT_CONFIG_LOADER,
+    match_modules: Optional[MatchModules] = None,
+    config_loader: Optional[ConfigLoader] = None,
+    writeln_stderr: Callable[[str], None] = _writeln_stderr,
 ) -> None:
+    timings = Timings()
+    deferred_layers = None
+
+    if config_loader is None:
+        # Layers are loaded once the whole config, including cache_dir, is known.
+        deferred_layers = DeferredLayersLoader()
+        config_loader = default_config_loader(deferred_layers)
+
+    timings.start("config")
     config = config_loader.load(Config())
 
+    if deferred_layers is not None:
+        layers_loader: LayersLoader = DEFAULT_LAYER_LOADER
+
+        if config.cache_dir:
+            layers_loader = CachedLayersLoader(layers_loader, config.cache_dir)
+
+        layers = deferred_layers.resolve(TimedLayersLoader(layers_loader, timings))
+
+        if layers is not None:
+            config.layers = layers
+
+    timings.stop()
+
     if not config.modules:
         writeln("No modules to check.")
         sys.exit(10)
 
-    tree_factory = load_factory(config.tree_factory_module, import_module)
-    tree = tree_factory(*config.modules)
-    conflicts = match_modules(tree=tree, layers=config.layers)
-    has_conflicts = False
+    try:
+        check_config(config, import_module)
+    except ConfigError as e:
+        writeln_stderr(str(e))
+        sys.exit(12)
+
+    if config.watch:
+        from .matchers import IgnoreMatcher
+        from .watch import Watcher, watch
+
+        watcher = Watcher(
+            config.modules, config.layers, ignore=IgnoreMatcher(config.ignore)
+        )
+        watch(watcher, writeln)
+        return
 
-    for conflict in conflicts:
-        if conflict.main.module in config.ignore:
-            continue
+    if config.command == SERVE:
+        serve(config, writeln, writeln_stderr)
+        return
 
-        has_conflicts = True
-        writeln(f"{conflict.main.module}:")
-        writeln(f"  Main layer: {conflict.main.layer.name}")
+    profile = None
+    profile_path = config.profile
 
-        for chain in conflict.main.chains:
-            writeln(f"    {' -> '.join(chain)}")
+    if profile_path:
+        from cProfile import Profile
 
-        writeln(f"  Conflicts with: {conflict.dupe.layer.name}")
+        profile = Profile()
+        profile.enable()
 
-        for chain in conflict.dupe.chains:
-            writeln(f"    {' -> '.join(chain)}")
+    try:
+        if config.command == EXPLAIN:
+            explain(
+                config,
+                timings if config.timings else None,
+                writeln,
+                import_module,
+                writeln_stderr=writeln_stderr,
+            )
+            has_conflicts = False
+        else:
+            has_conflicts = check(
+                config,
+                timings if config.timings else None,
+                writeln,
+                import_module,
+                match_modules,
+                writeln_stderr=writeln_stderr,
+            )
+    except ChangedFilesError as e:
+        writeln_stderr(str(e))
+        sys.exit(11)
+    except ConfigError as e:
+        writeln_stderr(str(e))
+        sys.exit(12)
+    except (GraphError, OSError) as e:
+        writeln_stderr(str(e))
+        sys.exit(14)
+    finally:
+        timings.stop()
 
-        writeln("")
+        if profile is not None and profile_path:
+            profile.disable()
+            profile.dump_stats(profile_path)
+
+        if config.timings:
+            for line in format_timings(timings):
+                writeln_stderr(line)
 
     if has_conflicts:
         sys.exit(9)
+
+
+def serve(
+    config: Config,
+    writeln: Callable[[str], None],
+    writeln_stderr: Callable[[str], None],
+) -> None:
+    """Check modules once, then answer queries on the socket until interrupted."""
+    from .matchers import IgnoreMatcher
+    from .serve import SOCKET_PATH, Server, ServerError, run
+    from .watch import Watcher
+
+    truncated: Set[Tuple[str, str]] = set()
+
+    def wrap_tree(tree: Tree) -> Tree:
+        bounded = BoundedChainsTree(
+            tree,
+            config.chains,
+            max_length=config.max_chain_length,
+            max_count=config.max_chains,
+        )
+        bounded.truncated = truncated
+
+        return bounded
+
+    watcher = Watcher(
+        config.modules,
+        config.layers,
+        wrap_tree=wrap_tree,
+        ignore=IgnoreMatcher(config.ignore),
+    )
+
+    for path, error in watcher.update().errors.items():
+        writeln_stderr(f"{path}: {error}")
+
+    try:
+        run(Server(watcher, truncated), config.socket or SOCKET_PATH, writeln)
+    except ServerError as e:
+        writeln_stderr(str(e))
+        sys.exit(13)
+
+
+def is_scoped(config: Config) -> bool:
+    """Whether only changed modules are to be checked."""
+    return config.changed_from is not None or bool(config.files)
+
+
+def check_config(config: Config, import_module: Callable[[str], ModuleType]) -> None:
+    """Validate options the loaders take as is, before the graph is built.
+
+    Raises:
+        ConfigError: When chain strategy or output format is unknown,
+            reporter can not be imported, or watch mode or query server are
+            given options they do not use.
+    """
+    from .reporters import load_reporter
+
+    if config.chains not in CHAIN_STRATEGIES:
+        raise ConfigError(
+            f"Unknown chain strategy: {config.chains!r}. "
+            f"Use {', '.join(CHAIN_STRATEGIES)}."
+        )
+
+    try:
+        load_reporter(config.format, import_module)
+    except ValueError as e:
+        raise ConfigError(
+            f"{e} Use text, jsonl, sarif or import string of custom reporter."
+        ) from e
+    except (ImportError, AttributeError) as e:
+        raise ConfigError(f"Can not load reporter {config.format!r}: {e}") from e
+
+    if config.watch:
+        check_watch(config)
+    elif config.command == SERVE:
+        check_serve(config)
+
+
+def check_builtin_scanner(config: Config, mode: str) -> None:
+    """Make sure ``mode`` builds the graph the way it is configured.
+
+    Raises:
+        ConfigError: When graph is to be built by anything but the builtin
+            scanner used by ``mode``.
+    """
+    if config.snapshot or config.write_snapshot:
+        raise ConfigError(f"{mode} can not be used with graph snapshots.")
+
+    if config.tree_factory_module != NATIVE_TREE_FACTORY:
+        raise ConfigError(
+            f"{mode} builds the graph with the builtin scanner, "
+            f"set --tree-factory {NATIVE_TREE_FACTORY}."
+        )
+
+
+def check_watch(config: Config) -> None:
+    """Make sure watch mode uses every option it is given.
+
+    Raises:
+        ConfigError: When graph is to be built by anything but the builtin
+            scanner, or graph cache, chains or output format are configured.
+    """
+    from .reporters import TEXT
+
+    check_builtin_scanner(config, "--watch")
+    unused = {
+        "--cache-dir": bool(config.cache_dir),
+        "--chains": config.chains != ALL,
+        "--format": config.format != TEXT,
+    }
+
+    for option, is_set in unused.items():
+        if is_set:
+            raise ConfigError(f"--watch can not be used with {option}.")
+
+
+def check_serve(config: Config) -> None:
+    """Make sure the query server uses every option it is given.
+
+    Raises:
+        ConfigError: When graph is to be built by anything but the builtin
+            scanner, or graph cache or output format are configured.
+    """
+    from .reporters import TEXT
+
+    check_builtin_scanner(config, "serve")
+    unused = {
+        "--cache-dir": bool(config.cache_dir),
+        "--format": config.format != TEXT,
+    }
+
+    for option, is_set in unused.items():
+        if is_set:
+            raise ConfigError(f"serve can not be used with {option}.")
+
+
+def find_changed_modules(config: Config, tree: Tree) -> Set[str]:
+    """Find modules of changed files and all the modules importing them."""
+    from .changed import files_to_modules, find_affected, git_changed_files
+
+    files = [Path(file) for file in config.files]
+
+    if config.changed_from is not None:
+        files.extend(git_changed_files(config.changed_from))
+
+    return find_affected(tree, files_to_modules(files, config.modules))
+
+
+def accepts_jobs(tree_factory: TreeFactory) -> bool:
+    """Whether ``tree_factory`` takes ``jobs`` keyword argument."""
+    from inspect import Parameter, signature
+
+    try:
+        parameters = signature(tree_factory).parameters.values()
+    except (TypeError, ValueError):
+        return True
+
+    return any(
+        parameter.kind == Parameter.VAR_KEYWORD
+        or (parameter.name == "jobs" and parameter.kind != Parameter.POSITIONAL_ONLY)
+        for parameter in parameters
+    )
+
+
+def build_tree(
+    config: Config,
+    import_module: Callable[[str], ModuleType],
+    *,
+    writeln_stderr: Callable[[str], None] = _writeln_stderr,
+) -> Tree:
+    """Build import graph of ``config.modules`` with the configured factory.
+
+    ``config.jobs`` is ignored, with a note, by factories not accepting it.
+    """
+    tree_factory: TreeFactory
+
+    if config.snapshot:
+        from .snapshot import SnapshotTreeFactory
+
+        tree_factory = SnapshotTreeFactory(config.snapshot)
+    else:
+        tree_factory = load_factory(config.tree_factory_module, import_module)
+
+        if config.jobs is not None:
+            if accepts_jobs(tree_factory):
+                parallel = cast(Callable[..., Tree], tree_factory)
+                tree_factory = partial(parallel, jobs=config.jobs)
+            else:
+                writeln_stderr(
+                    f"--jobs is ignored, {config.tree_factory_module} "
+                    "does not accept it."
+                )
+
+        if config.cache_dir:
+            from .cache import CachedTreeFactory
+
+            tree_factory = CachedTreeFactory(
+                tree_factory,
+                config.cache_dir,
+                salt=config.tree_factory_module,
+            )
+
+    tree = tree_factory(*config.modules)
+
+    if config.write_snapshot:
+        from .snapshot import save_snapshot
+
+        save_snapshot(tree, config.modules, config.write_snapshot)
+
+    return tree
+
+
+def explain(
+    config: Config,
+    timings: Optional[Timings],
+    writeln: Callable[[str], None],
+    import_module: Callable[[str], ModuleType],
+    *,
+    writeln_stderr: Callable[[str], None] = _writeln_stderr,
+) -> None:
+    """Print the match deciding layer of ``config.explain``.
+
+    Only the upstream closure of the module is analyzed.
+    """
+    from .impl import find_layer
+    from .matchers import IgnoreMatcher
+    from .reporters import format_explanation
+
+    assert config.explain is not None
+
+    with _phase(timings, "graph build"):
+        tree = build_tree(config, import_module, writeln_stderr=writeln_stderr)
+
+    with _phase(timings, "explain"):
+        match = find_layer(
+            BoundedChainsTree(tree, SHORTEST),
+            config.layers,
+            config.explain,
+            ignore=IgnoreMatcher(config.ignore),
+        )
+        lines = format_explanation(config.explain, match)
+
+    with _phase(timings, "output"):
+        for line in lines:
+            writeln(line)
+
+
+def check(
+    config: Config,
+    timings: Optional[Timings],
+    writeln: Callable[[str], None],
+    import_module: Callable[[str], ModuleType],
+    match_modules: Optional[MatchModules],
+    *,
+    writeln_stderr: Callable[[str], None] = _writeln_stderr,
+) -> bool:
+    """Find conflicts and report them as soon as they are found.
+
+    Analysis stops once ``config.max_conflicts`` conflicts are reported.
+
+    Returns:
+        Whether any conflicts were found.
+    """
+    # Shared with the reporter before the tree is wrapped, which incremental
+    # analysis does only once conflicts are consumed.
+    truncated: Set[Tuple[str, str]] = set()
+
+    def wrap_tree(tree: Tree) -> Tree:
+        if config.chains == ALL and config.max_chains is None:
+            return tree
+
+        bounded = BoundedChainsTree(
+            tree,
+            config.chains,
+            max_length=config.max_chain_length,
+            max_count=config.max_chains,
+        )
+        bounded.truncated = truncated
+
+        return bounded
+
+    if match_modules is None:
+        from . import impl
+
+        match_modules = impl.match_modules
+
+    from .matchers import IgnoreMatcher
+
+    ignore = IgnoreMatcher(config.ignore)
+
+    conflicts: Iterable[Conflict]
+
+    if config.incremental and not is_scoped(config):
+        check_builtin_scanner(config, "--incremental")
+
+        from .cache import CACHE_DIR
+        from .incremental import IncrementalAnalysis
+
+        analysis = IncrementalAnalysis(
+            config.cache_dir or CACHE_DIR,
+            salt=f"{config.chains}:{config.max_chain_length}:{config.max_chains}",
+            match_modules=match_modules,
+            wrap_tree=wrap_tree,
+            truncated=truncated,
+            jobs=1 if config.jobs is None else config.jobs,
+        )
+        conflicts = analysis.check(
+            config.modules, config.layers, timings=timings, ignore=ignore
+        )
+    else:
+        if timings is not None:
+            timings.start("graph build")
+
+        tree = build_tree(config, import_module, writeln_stderr=writeln_stderr)
+
+        modules = None
+
+        if is_scoped(config):
+            with _phase(timings, "changed files"):
+                modules = find_changed_modules(config, tree)
+
+        # Keywords are passed only when set, so implementations taking just
+        # the tree and layers keep working.
+        options: Dict[str, Any] = {}
+
+        if modules is not None:
+            options["modules"] = modules
+
+        if timings is not None:
+            options["timings"] = timings
+
+        if config.ignore:
+            options["ignore"] = ignore
+
+        conflicts = match_modules(wrap_tree(tree), config.layers, **options)
+
+    from .reporters import load_reporter
+
+    reporter = load_reporter(config.format, import_module)(writeln, truncated)
+    reported = 0
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", UnmatchedPatternWarning)
+
+        for conflict in conflicts:
+            if ignore.match(conflict.main.module):
+                continue
+
+            if timings is not None:
+                # Chains are lazy, materialize them to time enumeration apart.
+                with timings.phase("chains"):
+                    conflict.main.chains
+                    conflict.dupe.chains
+
+            with _phase(timings, "output"):
+                reporter.report(conflict)
+
+            reported += 1
+
+            if config.max_conflicts is not None and reported >= config.max_conflicts:
+                break
+
+    for warning in caught:
+        if issubclass(warning.category, UnmatchedPatternWarning):
+            writeln_stderr(f"Warning: {warning.message}")
+        else:
+            warnings.showwarning(
+                warning.message, warning.category, warning.filename, warning.lineno
+            )
+
+    with _phase(timings, "output"):
+        reporter.finish()
+
+    return bool(reported)
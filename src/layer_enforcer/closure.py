@@ -0,0 +1,245 @@
+from typing import Dict, Iterable, Iterator, List, Set
+
+from .csr import CSR
+from .interfaces import Tree
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Iterate over positions of set bits of ``mask`` in ascending order."""
+    bits = bin(mask)[:1:-1]
+    position = bits.find("1")
+
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+def make_mask(positions: Iterable[int], size: int) -> int:
+    """Make bitset of ``size`` bits out of set bit ``positions``."""
+    buffer = bytearray((size + 7) // 8)
+
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+
+    return int.from_bytes(buffer, "little")
+
+
+def find_components(imports: CSR) -> List[List[int]]:
+    """Find strongly connected components of the import graph.
+
+    Iterative Tarjan's algorithm. Components are returned in reverse
+    topological order: every component comes after all the components it
+    imports.
+    """
+    size = len(imports)
+    offsets = imports.offsets
+    targets = imports.targets
+    index = [-1] * size
+    low = [0] * size
+    on_stack = [False] * size
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(size):
+        if index[root] != -1:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offsets[root])]
+
+        while work:
+            node, position = work[-1]
+
+            if position < offsets[node + 1]:
+                work[-1] = node, position + 1
+                target = targets[position]
+
+                if index[target] == -1:
+                    index[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    work.append((target, offsets[target]))
+                elif on_stack[target] and index[target] < low[node]:
+                    low[node] = index[target]
+
+                continue
+
+            work.pop()
+
+            if work and low[node] < low[work[-1][0]]:
+                low[work[-1][0]] = low[node]
+
+            if low[node] == index[node]:
+                component = []
+
+                while True:
+                    target = stack.pop()
+                    on_stack[target] = False
+                    component.append(target)
+
+                    if target == node:
+                        break
+
+                component.sort()
+                components.append(component)
+
+    return components
+
+
+class Closure:
+    """Transitive closure of the import graph.
+
+    Strongly connected components are collapsed once, and upstream sets of
+    the condensed DAG are computed in a single sweep in reverse topological
+    order. Upstream sets are stored as Python ``int`` bitsets, where bit ``i``
+    stands for ``modules[i]``. Modules are numbered in name order, so
+    iterating over a bitset yields names in sorted order.
+
+    Trees without direct imports (see :meth:`Tree.has_direct_imports`) are
+    read through their upstream sets instead, which are already transitive:
+    ``imports`` is left without edges, and components are modules reaching
+    the same set of modules.
+    """
+
+    modules: List[str]
+    ids: Dict[str, int]
+    imports: CSR
+    components: List[List[int]]
+    component_of: List[int]
+    upstream: List[int]
+    transitive: bool
+
+    def __init__(self, tree: Tree, roots: Iterable[str]) -> None:
+        self.transitive = not tree.has_direct_imports()
+
+        if self.transitive:
+            self._read_upstream(tree, roots)
+        else:
+            self._read_imports(tree, roots)
+
+    def _number_components(self) -> None:
+        self.component_of = [0] * len(self.modules)
+
+        for component_id, component in enumerate(self.components):
+            for module_id in component:
+                self.component_of[module_id] = component_id
+
+    def _read_imports(self, tree: Tree, roots: Iterable[str]) -> None:
+        found: Dict[str, Set[str]] = {}
+        pending = list(roots)
+
+        while pending:
+            module = pending.pop()
+
+            if module in found:
+                continue
+
+            found[module] = imported = tree.find_imported_modules(module)
+            pending.extend(imported.difference(found))
+
+        self.modules = sorted(found)
+        self.ids = {module: id_ for id_, module in enumerate(self.modules)}
+        self.imports = CSR.from_lists(
+            sorted(self.ids[imported] for imported in found[module])
+            for module in self.modules
+        )
+        self.components = find_components(self.imports)
+        self._number_components()
+        self.upstream = self._sweep()
+
+    def _read_upstream(self, tree: Tree, roots: Iterable[str]) -> None:
+        found = {root: tree.find_upstream_modules(root) for root in roots}
+        self.modules = sorted(set(found).union(*found.values()))
+        self.ids = {module: id_ for id_, module in enumerate(self.modules)}
+        self.imports = CSR.from_lists([] for _ in self.modules)
+        size = len(self.modules)
+        # Bitset of every module reachable from the module, itself included.
+        reachable: List[int] = []
+
+        for module_id, module in enumerate(self.modules):
+            upstream = found.pop(module, None)
+
+            if upstream is None:
+                upstream = tree.find_upstream_modules(module)
+
+            ids = (self.ids[imported] for imported in upstream if imported in self.ids)
+            reachable.append(make_mask(ids, size) | 1 << module_id)
+
+        # Modules of a cycle reach each other, so their reachable sets are
+        # equal. Importer reaches strictly more modules than it imports,
+        # hence the ordering by size is reverse topological.
+        components: Dict[int, List[int]] = {}
+
+        for module_id, mask in enumerate(reachable):
+            components.setdefault(mask, []).append(module_id)
+
+        self.components = sorted(
+            components.values(),
+            key=lambda component: (bin(reachable[component[0]]).count("1"), component),
+        )
+        self._number_components()
+        self.upstream = []
+
+        for component in self.components:
+            mask = reachable[component[0]]
+
+            if len(component) == 1:
+                mask &= ~(1 << component[0])
+
+            self.upstream.append(mask)
+
+    def _sweep(self) -> List[int]:
+        size = len(self.modules)
+        upstream: List[int] = []
+        reachable: List[int] = []
+
+        for component_id, component in enumerate(self.components):
+            members = make_mask(component, size)
+            imported_components = {
+                self.component_of[imported]
+                for module_id in component
+                for imported in self.imports[module_id]
+            }
+            imported_components.discard(component_id)
+            mask = members if len(component) > 1 else 0
+
+            for imported_component in imported_components:
+                mask |= reachable[imported_component]
+
+            upstream.append(mask)
+            reachable.append(mask | members)
+
+        return upstream
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+    def __contains__(self, module: object) -> bool:
+        return module in self.ids
+
+    def names(self, mask: int) -> Iterator[str]:
+        """Iterate over module names of the bitset in sorted order."""
+        for module_id in iter_bits(mask):
+            yield self.modules[module_id]
+
+    def upstream_mask(self, module: str) -> int:
+        """Bitset of all modules directly or indirectly imported by ``module``."""
+        module_id = self.ids[module]
+        component_id = self.component_of[module_id]
+        mask = self.upstream[component_id]
+
+        if len(self.components[component_id]) > 1:
+            mask &= ~(1 << module_id)
+
+        return mask
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        try:
+            return set(self.names(self.upstream_mask(module)))
+        except KeyError:
+            return set()
@@ -1,16 +1,39 @@
-from argparse import ArgumentParser, FileType
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Protocol, Set, TextIO
 
+from ..chains import CHAIN_STRATEGIES
 from ..interfaces import LayersLoader
 from .interfaces import Config, ConfigLoader
 
+SERVE = "serve"
+EXPLAIN = "explain"
+COMMANDS = (SERVE, EXPLAIN)
+
 
 @dataclass
 class Args:
     modules: List[str]
     layers: Optional[TextIO]
     ignore: Set[str]
+    chains: Optional[str] = None
+    max_chain_length: Optional[int] = None
+    max_chains: Optional[int] = None
+    cache_dir: Optional[str] = None
+    incremental: bool = False
+    tree_factory: Optional[str] = None
+    jobs: Optional[int] = None
+    timings: bool = False
+    profile: Optional[str] = None
+    format: Optional[str] = None
+    max_conflicts: Optional[int] = None
+    snapshot: Optional[str] = None
+    write_snapshot: Optional[str] = None
+    changed_from: Optional[str] = None
+    files: List[str] = field(default_factory=list)
+    watch: bool = False
+    command: Optional[str] = None
+    socket: Optional[str] = None
+    explain: Optional[str] = None
 
 
 class ParseArgs(Protocol):
@@ -27,6 +50,15 @@ class ParseArgs(Protocol):
 
 
 def parse_args(argv: List[str]) -> Args:
+    from argparse import ArgumentParser, FileType
+
+    # Subparsers would take every first positional argument for a command, so
+    # module names are parsed the usual way unless a command comes first.
+    command = None
+
+    if argv and argv[0] in COMMANDS:
+        command, argv = argv[0], argv[1:]
+
     parser = ArgumentParser()
 
     parser.add_argument("modules", nargs="*")
@@ -40,9 +72,153 @@ def parse_args(argv: List[str]) -> Args:
         type=lambda s: set(s.split(",")),
     )
 
+    parser.add_argument(
+        "--chains",
+        choices=CHAIN_STRATEGIES,
+        help="Which import chains to report for each conflict.",
+    )
+    parser.add_argument(
+        "--max-chain-length",
+        type=int,
+        help="Maximum number of modules in a chain for k-shortest strategy.",
+    )
+    parser.add_argument(
+        "--max-chains",
+        type=int,
+        help="Maximum number of chains reported per pair of modules.",
+    )
+
+    parser.add_argument(
+        "--tree-factory",
+        help=(
+            "Import string of the tree factory, e.g. "
+            "layer_enforcer.native:new_native_tree."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help=(
+            "Number of processes parsing source files, 0 to use all CPUs. "
+            "Passed to the tree factory as jobs keyword argument."
+        ),
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Use import graph snapshot at PATH instead of building the graph.",
+    )
+    parser.add_argument(
+        "--write-snapshot",
+        metavar="PATH",
+        help="Write snapshot of the import graph to PATH.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep import graph snapshots in.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Reanalyze only modules affected by changes since the last run. "
+            "Requires the native tree factory."
+        ),
+    )
+
+    parser.add_argument(
+        "--changed-from",
+        metavar="REF",
+        help="Check only modules changed since git REF and modules importing them.",
+    )
+    parser.add_argument(
+        "--files",
+        nargs="+",
+        default=[],
+        metavar="FILE",
+        help="Check only modules of FILEs and modules importing them.",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running, recheck modules as their files change and print "
+            "new and resolved conflicts."
+        ),
+    )
+
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Unix socket the serve command listens on.",
+    )
+
+    parser.add_argument(
+        "--format",
+        help=(
+            "Report format: text, jsonl, sarif or import string of custom "
+            "reporter, e.g. mypackage.reporters:MyReporter."
+        ),
+    )
+    parser.add_argument(
+        "--max-conflicts",
+        type=int,
+        metavar="N",
+        help="Stop analysis after N conflicts are reported.",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        dest="max_conflicts",
+        action="store_const",
+        const=1,
+        help="Stop analysis at the first conflict, same as --max-conflicts 1.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print time and memory used by every phase of the run to stderr.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Write cProfile stats of the run to PATH.",
+    )
+
     args = parser.parse_args(argv)
+    modules = args.modules
+    explain = None
+
+    if command == EXPLAIN:
+        if len(modules) != 1:
+            parser.error("explain takes a single module")
+
+        explain, modules = modules[0], []
 
-    return Args(args.modules, args.layers, args.ignore)
+    return Args(
+        modules,
+        args.layers,
+        args.ignore,
+        chains=args.chains,
+        max_chain_length=args.max_chain_length,
+        max_chains=args.max_chains,
+        cache_dir=args.cache_dir,
+        incremental=args.incremental,
+        tree_factory=args.tree_factory,
+        jobs=args.jobs,
+        timings=args.timings,
+        profile=args.profile,
+        format=args.format,
+        max_conflicts=args.max_conflicts,
+        snapshot=args.snapshot,
+        write_snapshot=args.write_snapshot,
+        changed_from=args.changed_from,
+        files=args.files,
+        watch=args.watch,
+        command=command,
+        socket=args.socket,
+        explain=explain,
+    )
 
 
 class ArgparseConfigLoader(ConfigLoader):
@@ -72,10 +248,70 @@ class ArgparseConfigLoader(ConfigLoader):
         if args.modules:
             config.modules = set(args.modules)
 
+        if args.explain:
+            config.explain = args.explain
+
+            if not config.modules:
+                config.modules = {args.explain.partition(".")[0]}
+
         if args.layers:
             config.layers = self.layers_loader.text_io(args.layers)
 
         if args.ignore:
             config.ignore = args.ignore
 
+        if args.chains:
+            config.chains = args.chains
+
+        if args.max_chain_length is not None:
+            config.max_chain_length = args.max_chain_length
+
+        if args.max_chains is not None:
+            config.max_chains = args.max_chains
+
+        if args.tree_factory:
+            config.tree_factory_module = args.tree_factory
+
+        if args.jobs is not None:
+            config.jobs = args.jobs
+
+        if args.snapshot:
+            config.snapshot = args.snapshot
+
+        if args.write_snapshot:
+            config.write_snapshot = args.write_snapshot
+
+        if args.changed_from:
+            config.changed_from = args.changed_from
+
+        if args.files:
+            config.files = args.files
+
+        if args.watch:
+            config.watch = True
+
+        if args.command:
+            config.command = args.command
+
+        if args.socket:
+            config.socket = args.socket
+
+        if args.cache_dir:
+            config.cache_dir = args.cache_dir
+
+        if args.incremental:
+            config.incremental = True
+
+        if args.format:
+            config.format = args.format
+
+        if args.max_conflicts is not None:
+            config.max_conflicts = args.max_conflicts
+
+        if args.timings:
+            config.timings = True
+
+        if args.profile:
+            config.profile = args.profile
+
         return config
@@ -1,16 +1,38 @@
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
-from typing import Set
+from typing import List, Optional, Set
 
 from layer_enforcer.interfaces import Layer
 
 
+class ConfigError(Exception):
+    """Config options can not be used together."""
+
+
 @dataclass
 class Config:
     modules: Set[str] = field(default_factory=set)
     ignore: Set[str] = field(default_factory=set)
     layers: Set[Layer] = field(default_factory=set)
     tree_factory_module: str = "layer_enforcer.grimp:new_grimp_tree"
+    chains: str = "all"
+    max_chain_length: Optional[int] = None
+    max_chains: Optional[int] = None
+    cache_dir: Optional[str] = None
+    incremental: bool = False
+    jobs: Optional[int] = None
+    timings: bool = False
+    format: str = "text"
+    max_conflicts: Optional[int] = None
+    profile: Optional[str] = None
+    snapshot: Optional[str] = None
+    write_snapshot: Optional[str] = None
+    changed_from: Optional[str] = None
+    files: List[str] = field(default_factory=list)
+    watch: bool = False
+    command: Optional[str] = None
+    socket: Optional[str] = None
+    explain: Optional[str] = None
 
 
 class ConfigLoader(metaclass=ABCMeta):
@@ -1,12 +1,33 @@
+import os
 from collections.abc import Mapping
+from io import StringIO
 from pathlib import Path
-from typing import Iterator, List, Optional, Protocol, Set, TextIO, TypedDict, Union
-
-from yaml import YAMLError, safe_load
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    TextIO,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
+from .. import __version__
 from ..interfaces import InvalidLayerFormat, Layer, LayersLoader
+from ..timings import Timings
+from ..index import LayerIndex
 
 LAYERS_PATH = "layers.yml"
+LAYERS_FORMAT_VERSION = 2
+
+# Name, index of the parent row or -1, imports, submodules.
+LayerRow = Tuple[str, int, Tuple[str, ...], Tuple[str, ...]]
 
 
 class LayerDict(TypedDict):
@@ -14,7 +35,7 @@ class LayerDict(TypedDict):
     submodules: List[str]
     imports: List[str]
     # https://github.com/python/mypy/issues/731
-    layers: List["LayerDict"]  # type:ignore[misc]
+    layers: List["LayerDict"]  # type: ignore[misc]
 
 
 class DictToLayers(Protocol):
@@ -58,8 +79,15 @@ class YamlLayersLoader(LayersLoader):
         self.dict_to_layers = dict_to_layers
 
     def text_io(self, f: TextIO) -> Set[Layer]:
+        from yaml import YAMLError, load
+
+        try:
+            from yaml import CSafeLoader as SafeLoader
+        except ImportError:  # pragma: nocover
+            from yaml import SafeLoader  # type: ignore[assignment]
+
         try:
-            parsed_yaml: LayerDict = safe_load(f)
+            parsed_yaml: LayerDict = load(f, Loader=SafeLoader)
         except YAMLError as e:
             raise NotAYamlError("Layers specification is not a valid YAML file.") from e
 
@@ -79,3 +107,186 @@ class YamlLayersLoader(LayersLoader):
 
         with f:
             return self.text_io(f)
+
+
+class TimedLayersLoader(LayersLoader):
+    """Record time spent in ``layers_loader`` as ``layers`` phase."""
+
+    layers_loader: LayersLoader
+    timings: Timings
+
+    def __init__(self, layers_loader: LayersLoader, timings: Timings) -> None:
+        self.layers_loader = layers_loader
+        self.timings = timings
+
+    def text_io(self, f: TextIO) -> Set[Layer]:
+        with self.timings.phase("layers"):
+            return self.layers_loader.text_io(f)
+
+    def path(self, path: Union[Path, str]) -> Set[Layer]:
+        with self.timings.phase("layers"):
+            return self.layers_loader.path(path)
+
+
+def flatten_layers(layers: Iterable[Layer]) -> List[LayerRow]:
+    """Make table of layers, where parents come before their children."""
+    ordered = LayerIndex(list(layers)).layers
+    rows = {layer: row for row, layer in enumerate(ordered)}
+
+    return [
+        (
+            layer.name,
+            -1 if layer.parent is None else rows[layer.parent],
+            tuple(sorted(layer.imports)),
+            tuple(sorted(layer.submodules)),
+        )
+        for layer in ordered
+    ]
+
+
+def _layer_row(row: Any, position: int) -> LayerRow:
+    name, parent, imports, submodules = row
+
+    if not (
+        isinstance(name, str)
+        and type(parent) is int
+        and -1 <= parent < position
+        and isinstance(imports, list)
+        and isinstance(submodules, list)
+        and all(isinstance(value, str) for value in imports + submodules)
+    ):
+        raise ValueError(f"Invalid layer row: {row!r}.")
+
+    return name, parent, tuple(imports), tuple(submodules)
+
+
+def unflatten_layers(table: Iterable[LayerRow]) -> Set[Layer]:
+    """Make layers out of the table made by :func:`flatten_layers`."""
+    layers: List[Layer] = []
+
+    for name, parent, imports, submodules in table:
+        layers.append(
+            Layer(
+                name=name,
+                parent=None if parent == -1 else layers[parent],
+                imports=frozenset(imports),
+                submodules=frozenset(submodules),
+            )
+        )
+
+    return set(layers)
+
+
+class CachedLayersLoader(LayersLoader):
+    """Keep layers loaded by ``layers_loader`` by the hash of specification.
+
+    Layers are stored as a flat JSON table under ``cache_dir`` and loaded
+    back while specification does not change. Specification loaded again by the
+    same loader is not parsed at all, e.g. when both pyproject.toml and
+    ``--layers`` point to the same file. Without ``cache_dir`` layers are
+    kept in memory only.
+    """
+
+    layers_loader: LayersLoader
+    cache_dir: Optional[Path]
+    loaded: Dict[str, Set[Layer]]
+
+    def __init__(
+        self,
+        layers_loader: LayersLoader,
+        cache_dir: Optional[Union[Path, str]] = None,
+    ) -> None:
+        self.layers_loader = layers_loader
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.loaded = {}
+
+    def text_io(self, f: TextIO) -> Set[Layer]:
+        return self._load(f.read())
+
+    def path(self, path: Union[Path, str]) -> Set[Layer]:
+        return self._load(Path(path).read_text(encoding="utf-8"))
+
+    def _load(self, spec: str) -> Set[Layer]:
+        from hashlib import sha256
+
+        key = sha256(f"{__version__}\0{spec}".encode()).hexdigest()
+
+        if key not in self.loaded:
+            layers = self._read(key)
+
+            if layers is None:
+                layers = self.layers_loader.text_io(StringIO(spec))
+                self._write(key, layers)
+
+            self.loaded[key] = layers
+
+        return set(self.loaded[key])
+
+    def _read(self, key: str) -> Optional[Set[Layer]]:
+        import json
+
+        if self.cache_dir is None:
+            return None
+
+        try:
+            path = self.cache_dir / f"{key}.layers.json"
+            data = json.loads(path.read_text(encoding="utf-8"))
+
+            if data["version"] != LAYERS_FORMAT_VERSION:
+                return None
+
+            return unflatten_layers(
+                _layer_row(row, position) for position, row in enumerate(data["layers"])
+            )
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _write(self, key: str, layers: Set[Layer]) -> None:
+        import json
+        from tempfile import NamedTemporaryFile
+
+        if self.cache_dir is None:
+            return
+
+        data = {"version": LAYERS_FORMAT_VERSION, "layers": flatten_layers(layers)}
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            with NamedTemporaryFile(
+                "wt", dir=self.cache_dir, delete=False, encoding="utf-8"
+            ) as f:
+                json.dump(data, f)
+
+            os.replace(f.name, self.cache_dir / f"{key}.layers.json")
+        except OSError:
+            pass
+
+
+class DeferredLayersLoader(LayersLoader):
+    """Remember the last requested specification instead of loading it.
+
+    Config loaders run before the settings layers loading depends on, like
+    ``cache_dir``, are known. Layers are loaded by :meth:`resolve` once the
+    config is complete, the specification requested last wins.
+    """
+
+    pending: Optional[Callable[[LayersLoader], Set[Layer]]]
+
+    def __init__(self) -> None:
+        self.pending = None
+
+    def text_io(self, f: TextIO) -> Set[Layer]:
+        spec = f.read()
+        self.pending = lambda layers_loader: layers_loader.text_io(StringIO(spec))
+
+        return set()
+
+    def path(self, path: Union[Path, str]) -> Set[Layer]:
+        self.pending = lambda layers_loader: layers_loader.path(path)
+
+        return set()
+
+    def resolve(self, layers_loader: LayersLoader) -> Optional[Set[Layer]]:
+        """Load the requested specification, ``None`` when none was."""
+        return None if self.pending is None else self.pending(layers_loader)
@@ -3,11 +3,6 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional, Protocol, TypedDict
 
-if sys.version_info >= (3, 11):  # pragma: nocover
-    import tomllib
-else:  # pragma: nocover
-    import tomli as tomllib
-
 from ..interfaces import LayersLoader
 from .interfaces import Config, ConfigLoader
 from .layers import LAYERS_PATH
@@ -20,12 +15,30 @@ class PyprojectConfig:
     modules: List[str] = field(default_factory=list)
     ignore: List[str] = field(default_factory=list)
     layers: str = ""
+    chains: str = ""
+    max_chain_length: Optional[int] = None
+    max_chains: Optional[int] = None
+    cache_dir: str = ""
+    incremental: bool = False
+    tree_factory: str = ""
+    jobs: Optional[int] = None
+    format: str = ""
+    max_conflicts: Optional[int] = None
 
 
 class LayerEnforcerDict(TypedDict):
     ignore: List[str]
     modules: List[str]
     layers: str
+    chains: str
+    max_chain_length: int
+    max_chains: int
+    cache_dir: str
+    incremental: bool
+    tree_factory: str
+    jobs: int
+    format: str
+    max_conflicts: int
 
 
 class LoadPyproject(Protocol):
@@ -41,6 +54,11 @@ class LoadPyproject(Protocol):
 
 
 def load_pyproject(path: Path) -> PyprojectConfig:
+    if sys.version_info >= (3, 11):  # pragma: nocover
+        import tomllib
+    else:  # pragma: nocover
+        import tomli as tomllib
+
     try:
         raw = tomllib.loads(path.read_text(encoding="utf-8"))
     except FileNotFoundError:
@@ -55,6 +73,15 @@ def load_pyproject(path: Path) -> PyprojectConfig:
         modules=config.get("modules", []),
         ignore=config.get("ignore", []),
         layers=config.get("layers", LAYERS_PATH),
+        chains=config.get("chains", ""),
+        max_chain_length=config.get("max_chain_length"),
+        max_chains=config.get("max_chains"),
+        cache_dir=config.get("cache_dir", ""),
+        incremental=config.get("incremental", False),
+        tree_factory=config.get("tree_factory", ""),
+        jobs=config.get("jobs"),
+        format=config.get("format", ""),
+        max_conflicts=config.get("max_conflicts"),
     )
 
 
@@ -91,4 +118,31 @@ class PyprojectTomlConfigLoader(ConfigLoader):
         if pyproject.layers:
             config.layers = self.layers_loader.path(pyproject.layers)
 
+        if pyproject.chains:
+            config.chains = pyproject.chains
+
+        if pyproject.max_chain_length is not None:
+            config.max_chain_length = pyproject.max_chain_length
+
+        if pyproject.max_chains is not None:
+            config.max_chains = pyproject.max_chains
+
+        if pyproject.tree_factory:
+            config.tree_factory_module = pyproject.tree_factory
+
+        if pyproject.jobs is not None:
+            config.jobs = pyproject.jobs
+
+        if pyproject.format:
+            config.format = pyproject.format
+
+        if pyproject.max_conflicts is not None:
+            config.max_conflicts = pyproject.max_conflicts
+
+        if pyproject.cache_dir:
+            config.cache_dir = pyproject.cache_dir
+
+        if pyproject.incremental:
+            config.incremental = True
+
         return config
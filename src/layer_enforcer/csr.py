@@ -0,0 +1,73 @@
+from array import array
+from typing import Iterable, Iterator, Sequence
+
+
+class CSR:
+    """Adjacency lists packed into two ``array('I')`` buffers.
+
+    Neighbours of node ``i`` are ``targets[offsets[i]:offsets[i + 1]]``. Any
+    sequences of ints work as buffers, e.g. memory views of a mapped file.
+    Compressed sparse rows take 4 bytes per edge and per node, instead of a
+    list object per node and a pointer per edge.
+    """
+
+    __slots__ = ("offsets", "targets")
+
+    offsets: Sequence[int]
+    targets: Sequence[int]
+
+    def __init__(self, offsets: Sequence[int], targets: Sequence[int]) -> None:
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_lists(cls, lists: Iterable[Iterable[int]]) -> "CSR":
+        offsets = array("I", [0])
+        targets = array("I")
+
+        for neighbours in lists:
+            targets.extend(neighbours)
+            offsets.append(len(targets))
+
+        return cls(offsets, targets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, node: int) -> Sequence[int]:
+        return self.targets[self.offsets[node] : self.offsets[node + 1]]
+
+    def __iter__(self) -> Iterator[Sequence[int]]:
+        for node in range(len(self)):
+            yield self[node]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CSR):
+            return NotImplemented
+
+        return self.offsets == other.offsets and self.targets == other.targets
+
+    def __repr__(self) -> str:
+        return f"CSR.from_lists({[list(neighbours) for neighbours in self]!r})"
+
+    def reverse(self) -> "CSR":
+        """Adjacency lists of the graph with every edge reversed."""
+        size = len(self)
+        counts = array("I", [0]) * (size + 1)
+
+        for target in self.targets:
+            counts[target + 1] += 1
+
+        for node in range(size):
+            counts[node + 1] += counts[node]
+
+        offsets = array("I", counts)
+        targets = array("I", [0]) * len(self.targets)
+
+        for node in range(size):
+            for position in range(self.offsets[node], self.offsets[node + 1]):
+                target = self.targets[position]
+                targets[counts[target]] = node
+                counts[target] += 1
+
+        return CSR(offsets, targets)
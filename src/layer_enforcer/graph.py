@@ -0,0 +1,191 @@
+from collections import deque
+from typing import (
+    BinaryIO,
+    Collection,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .csr import CSR
+from .interfaces import Tree
+
+
+class GraphError(Exception):
+    """Serialized graph can not be loaded."""
+
+
+def is_descendant(module: str, root: str) -> bool:
+    return module == root or module.startswith(f"{root}.")
+
+
+class GraphTree(Tree):
+    """Tree over in-memory import graph.
+
+    Modules are numbered in name order and imports are stored as compressed
+    adjacency lists of module ids, see :class:`~layer_enforcer.csr.CSR`.
+    Graph does not depend on the way it was built, so it can be serialized
+    and loaded back without rebuilding, see :mod:`layer_enforcer.snapshot`.
+    """
+
+    roots: Tuple[str, ...]
+    modules: Sequence[str]
+    ids: Mapping[str, int]
+    imports: CSR
+    _importers: Optional[CSR]
+    _walked: List[bool]
+
+    def __init__(
+        self,
+        roots: Iterable[str],
+        imports: Mapping[str, Iterable[str]],
+    ) -> None:
+        names = set(imports)
+
+        for imported in imports.values():
+            names.update(imported)
+
+        self.roots = tuple(roots)
+        self.modules = sorted(names)
+        self.ids = {module: id_ for id_, module in enumerate(self.modules)}
+        self.imports = CSR.from_lists(
+            sorted(self.ids[imported] for imported in imports.get(module, ()))
+            for module in self.modules
+        )
+        self._importers = None
+        self._walked = []
+
+    @classmethod
+    def from_tree(cls, tree: Tree, roots: Iterable[str]) -> "GraphTree":
+        """Copy import graph reachable from ``roots`` out of any tree."""
+        imports: Dict[str, Set[str]] = {}
+        pending = list(tree.walk())
+
+        while pending:
+            module = pending.pop()
+
+            if module not in imports:
+                imports[module] = imported = tree.find_imported_modules(module)
+                pending.extend(imported.difference(imports))
+
+        return cls(roots, imports)
+
+    def dump(self, f: BinaryIO) -> None:
+        """Write graph as a snapshot, see :func:`~.snapshot.write_snapshot`."""
+        from .snapshot import write_snapshot
+
+        write_snapshot(self, self.roots, f)
+
+    @staticmethod
+    def load(f: BinaryIO) -> "GraphTree":
+        """Load graph written by :meth:`dump`.
+
+        Raises:
+            GraphError: When file is corrupt or has unsupported version.
+        """
+        from .snapshot import read_snapshot
+
+        return read_snapshot(f)
+
+    @property
+    def importers(self) -> CSR:
+        """Reverse adjacency lists, built on first access."""
+        if self._importers is None:
+            self._importers = self.imports.reverse()
+
+        return self._importers
+
+    @property
+    def walked(self) -> List[bool]:
+        """Whether module belongs to one of the roots, by module id."""
+        if not self._walked and self.modules:
+            self._walked = [
+                any(is_descendant(module, root) for root in self.roots)
+                for module in self.modules
+            ]
+
+        return self._walked
+
+    def walk(self) -> Iterator[str]:
+        for module, walked in zip(self.modules, self.walked):
+            if walked:
+                yield module
+
+    def _reachable(self, start: int, adjacency: CSR) -> Set[int]:
+        seen: Set[int] = set()
+        pending: Deque[int] = deque([start])
+
+        while pending:
+            for target in adjacency[pending.popleft()]:
+                if target not in seen:
+                    seen.add(target)
+                    pending.append(target)
+
+        return seen
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        try:
+            start = self.ids[importer]
+            end = self.ids[imported]
+        except KeyError:
+            return
+
+        if start == end:
+            return
+
+        leads_to_end = self._reachable(end, self.importers)
+        stack: List[Tuple[int, ...]] = [(start,)]
+
+        while stack:
+            chain = stack.pop()
+
+            for target in reversed(self.imports[chain[-1]]):
+                if target == end:
+                    yield tuple(self.modules[module_id] for module_id in chain + (end,))
+                elif target in leads_to_end and target not in chain:
+                    stack.append(chain + (target,))
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        try:
+            module_id = self.ids[module]
+        except KeyError:
+            return set()
+
+        upstream = self._reachable(module_id, self.imports)
+        upstream.discard(module_id)
+
+        return {self.modules[module_id] for module_id in upstream}
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        try:
+            module_id = self.ids[module]
+        except KeyError:
+            return set()
+
+        return {self.modules[imported] for imported in self.imports[module_id]}
+
+    def find_importers(self, imported: Collection[str]) -> Dict[str, Set[str]]:
+        importers: Dict[str, Set[str]] = {}
+
+        for module in imported:
+            try:
+                module_id = self.ids[module]
+            except KeyError:
+                importers[module] = set()
+                continue
+
+            walked = self.walked
+            importers[module] = {
+                self.modules[importer]
+                for importer in self._reachable(module_id, self.importers)
+                if importer != module_id and walked[importer]
+            }
+
+        return importers
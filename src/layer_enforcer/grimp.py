@@ -1,4 +1,4 @@
-from typing import Iterator, Set, Tuple
+from typing import Collection, Dict, Iterator, Set, Tuple
 
 from grimp import build_graph
 from grimp.application.ports.graph import AbstractImportGraph
@@ -33,6 +33,24 @@ class GrimpTree(Tree):
         except NodeNotFound:
             return set()
 
+    def find_imported_modules(self, module: str) -> Set[str]:
+        try:
+            return self.graph.find_modules_directly_imported_by(module)
+        except (ModuleNotPresent, NodeNotFound):
+            return set()
+
+    def find_importers(self, imported: Collection[str]) -> Dict[str, Set[str]]:
+        present = self.graph.modules
+        importers: Dict[str, Set[str]] = {}
+
+        for module in imported:
+            if module in present:
+                importers[module] = self.graph.find_downstream_modules(module)
+            else:
+                importers[module] = set()
+
+        return importers
+
 
 def new_grimp_tree(*modules: str) -> Tree:
     graph = build_graph(*modules, include_external_packages=True)
@@ -1,73 +1,574 @@
-from functools import lru_cache
-from typing import Collection, Dict, Iterable, Set, Tuple
+import warnings
+from heapq import nsmallest
+from typing import (
+    AbstractSet,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+)
 
-from .interfaces import Conflict, Layer, Match, Tree
-from .utils import depth, is_import_allowed, match_submodule
+from .chains import CachedChainsTree
+from .closure import Closure, iter_bits, make_mask
+from .index import ImportIndex, LayerIndex
+from .interfaces import (
+    EMPTY_SET,
+    Conflict,
+    Layer,
+    Match,
+    Tree,
+    UnmatchedPatternWarning,
+)
+from .matchers import IgnoreMatcher, SubmoduleMatcher
+from .timings import Timings
+from .utils import match_submodule
 
 
-def match_layer(tree: Tree, layer: Layer, module: str) -> Match:
-    match = Match(module, layer)
+def match_layer(
+    tree: Tree,
+    layer: Layer,
+    module: str,
+    submodules: Optional[AbstractSet[str]] = None,
+) -> Match:
+    imports = [
+        import_
+        for import_ in sorted(layer.imports)
+        if next(iter(tree.find_chains(module, import_)), None) is not None
+    ]
 
-    for import_ in layer.imports:
-        match.chains.extend(tree.find_chains(module, import_))
+    if submodules is None:
+        submodules = {
+            submodule
+            for submodule in layer.submodules
+            if match_submodule(module, submodule)
+        }
 
-    for submodule in layer.submodules:
-        if match_submodule(module, submodule):
-            match.submodules.add(submodule)
+    return Match(module, layer, submodules=set(submodules), imports=imports, tree=tree)
 
-    return match
 
+def infer_layers(
+    closure: Closure,
+    layer_ids: List[int],
+    inferable: AbstractSet[int],
+) -> Dict[int, int]:
+    """Propagate layers over the condensed import graph.
 
-def match_modules(tree: Tree, layers: Collection[Layer]) -> Iterable[Conflict]:
-    module_matches: Dict[str, Match] = {}
-    modules: Set[str] = set()
-    ordered_layers = sorted(layers, key=lambda l: (depth(l), l.name))
-    max_depth = 0
+    Components are visited in reverse topological order, so every module is
+    visited after everything it imports and each import edge is touched once.
+    Module without a layer gets the layer of the first match among modules it
+    imports, where matches are ordered by layer depth, layer name and module
+    name. Closures read from upstream sets have no import edges, so there the
+    first match is looked up in the upstream bitset of the component instead.
 
-    for module in tree.walk():
-        modules.add(module)
+    Args:
+        closure: Import graph.
+        layer_ids: Layer id of every module in ``closure``, ``-1`` when module
+            has no layer. Updated in place with inferred layers.
+        inferable: Ids of modules allowed to get inferred layer.
 
-        for layer in ordered_layers:
-            if match := match_layer(tree, layer, module):
-                try:
-                    yield Conflict(module_matches[module], match)
-                except KeyError:
-                    max_depth = max(max_depth, depth(layer))
-                    module_matches[module] = match
+    Returns:
+        Mapping of every module id with inferred layer to the id of the
+        imported module that decided its layer.
+    """
+    size = len(closure)
+    no_match = size * (max(layer_ids, default=0) + 1)
+    exported: List[int] = []
+    deciders: Dict[int, int] = {}
+    layer_masks: List[int] = []
 
-    @lru_cache(None)
-    def key(module: str) -> Tuple[int, str, str]:
-        try:
-            layer = module_matches[module].layer
-        except KeyError:
-            return max_depth + 1, "", module
-        return depth(layer), layer.name, module
+    if closure.transitive:
+        layered: List[List[int]] = [[] for _ in range(max(layer_ids, default=-1) + 1)]
 
-    for module in sorted(modules, key=key, reverse=True):
-        current_match = module_matches.get(module)
+        for module_id, layer_id in enumerate(layer_ids):
+            if layer_id != -1:
+                layered[layer_id].append(module_id)
 
-        for imported in sorted(tree.find_upstream_modules(module), key=key):
-            try:
-                imported_match = module_matches[imported]
-            except KeyError:
-                continue
+        layer_masks = [make_mask(module_ids, size) for module_ids in layered]
 
-            if current_match is None:
-                module_matches[module] = current_match = Match(
-                    module=module,
-                    layer=imported_match.layer,
-                    chains=list(tree.find_chains(module, imported)),
-                )
-                continue
+    for component_id, component in enumerate(closure.components):
+        best = no_match
+        cyclic = len(component) > 1
+
+        for layer_id, layer_mask in enumerate(layer_masks):
+            matched = closure.upstream[component_id] & layer_mask
+
+            if matched:
+                best = layer_id * size + (matched & -matched).bit_length() - 1
+                break
+
+        for module_id in component:
+            for imported in closure.imports[module_id]:
+                imported_component = closure.component_of[imported]
+
+                if imported_component != component_id:
+                    best = min(best, exported[imported_component])
+
+            if cyclic and layer_ids[module_id] != -1:
+                best = min(best, layer_ids[module_id] * size + module_id)
+
+        inferred = [
+            module_id
+            for module_id in component
+            if layer_ids[module_id] == -1 and module_id in inferable
+        ]
+
+        if best != no_match:
+            layer_id = best // size
+            decider = best % size
+            # Within a cycle, the smallest other inferred module may decide.
+            smallest = nsmallest(2, inferred) if cyclic else []
+
+            for module_id in inferred:
+                layer_ids[module_id] = layer_id
+                others = [i for i in smallest if i != module_id][:1]
+                deciders[module_id] = min([decider] + others)
+
+            if layer_masks:
+                layer_masks[layer_id] |= make_mask(inferred, size)
+
+        exported.append(
+            min(
+                [best]
+                + [
+                    layer_ids[module_id] * size + module_id
+                    for module_id in component
+                    if layer_ids[module_id] != -1
+                ]
+            )
+        )
 
-            if is_import_allowed(current_match.layer, imported_match.layer):
+    return deciders
+
+
+def _match_walked(
+    tree: Tree,
+    closure: Closure,
+    walked: Iterable[str],
+    layers: Collection[Layer],
+    index: LayerIndex,
+    import_index: ImportIndex,
+    module_matches: List[Optional[Match]],
+    reported: AbstractSet[str],
+) -> Iterator[Conflict]:
+    """Pass 1: match ``walked`` modules against layers by what they import.
+
+    First match of every module is stored in ``module_matches``, the rest are
+    conflicts, yielded for ``reported`` modules.
+    """
+    ordered_layers = sorted(layers, key=index.ids.__getitem__)
+    submodule_matcher = SubmoduleMatcher(ordered_layers)
+    layer_imports = [
+        (layer, import_index.masks[index.ids[layer]]) for layer in ordered_layers
+    ]
+
+    for module in walked:
+        module_id = closure.ids[module]
+        upstream = closure.upstream_mask(module)
+        submodules = submodule_matcher.match(module)
+
+        for layer, targets in layer_imports:
+            imported = upstream & targets
+            layer_submodules = submodules.get(layer)
+
+            if not imported and not layer_submodules:
                 continue
 
-            yield Conflict(
-                main=current_match,
-                dupe=Match(
-                    module=current_match.module,
-                    layer=imported_match.layer,
-                    chains=list(tree.find_chains(module, imported)),
-                ),
+            match = Match.interned(
+                closure.modules,
+                module_id,
+                layer,
+                list(iter_bits(imported)),
+                submodules=layer_submodules or EMPTY_SET,
+                tree=tree,
+            )
+            first_match = module_matches[module_id]
+
+            if first_match is None:
+                module_matches[module_id] = match
+            elif module in reported:
+                yield Conflict(first_match, match)
+
+
+class _Analysis:
+    """Layers of walked modules within the upstream closure of some modules."""
+
+    tree: Tree
+    layers: Collection[Layer]
+    index: LayerIndex
+    closure: Closure
+    imports: ImportIndex
+    walked: List[str]
+    module_matches: List[Optional[Match]]
+    first_conflicts: List[Conflict]
+    layer_ids: List[int]
+    assigned: List[int]
+
+    def __init__(
+        self,
+        tree: Tree,
+        layers: Collection[Layer],
+        index: LayerIndex,
+        closure: Closure,
+        walked: List[str],
+    ) -> None:
+        self.tree = tree
+        self.layers = layers
+        self.index = index
+        self.closure = closure
+        self.imports = ImportIndex(index, closure)
+        self.walked = walked
+        self.module_matches = [None] * len(closure)
+        self.first_conflicts = []
+        self.layer_ids = []
+        self.assigned = []
+
+    def match(self, reported: AbstractSet[str]) -> Iterator[Conflict]:
+        """Pass 1, conflicts of ``reported`` modules are kept and yielded."""
+        for conflict in _match_walked(
+            self.tree,
+            self.closure,
+            self.walked,
+            self.layers,
+            self.index,
+            self.imports,
+            self.module_matches,
+            reported,
+        ):
+            self.first_conflicts.append(conflict)
+            yield conflict
+
+    def infer(self) -> None:
+        """Pass 2, give layers to modules left without a match."""
+        closure = self.closure
+        index = self.index
+        layer_ids = [-1] * len(closure)
+
+        for module_id, match in enumerate(self.module_matches):
+            if match is not None:
+                layer_ids[module_id] = index.ids[match.layer]
+
+        inferable = {closure.ids[module] for module in self.walked}
+        deciders = infer_layers(closure, layer_ids, inferable)
+
+        for module_id, decider_id in deciders.items():
+            self.module_matches[module_id] = Match.interned(
+                closure.modules,
+                module_id,
+                index.layers[layer_ids[module_id]],
+                (decider_id,),
+                tree=self.tree,
             )
+
+        assigned_ids: List[List[int]] = [[] for _ in index.layers]
+
+        for module_id, layer_id in enumerate(layer_ids):
+            if layer_id != -1:
+                assigned_ids[layer_id].append(module_id)
+
+        self.layer_ids = layer_ids
+        self.assigned = [make_mask(ids, len(closure)) for ids in assigned_ids]
+
+    def match_of(self, module: str) -> Optional[Match]:
+        module_id = self.closure.ids.get(module)
+
+        return None if module_id is None else self.module_matches[module_id]
+
+    def second_conflicts(self, reported: AbstractSet[str]) -> Iterator[Conflict]:
+        """Conflicts of ``reported`` modules with layers of what they import.
+
+        Modules are visited from the deepest layer up.
+        """
+        closure = self.closure
+        index = self.index
+        layer_ids = self.layer_ids
+        reported_matches = [
+            (module_id, match)
+            for module_id, match in enumerate(self.module_matches)
+            if match is not None and match.module in reported
+        ]
+        reported_matches.sort(
+            key=lambda item: (layer_ids[item[0]], item[0]),
+            reverse=True,
+        )
+
+        for module_id, current_match in reported_matches:
+            upstream = closure.upstream_mask(closure.modules[module_id])
+            allowed = index.masks[layer_ids[module_id]]
+
+            for layer_id, mask in enumerate(self.assigned):
+                if allowed >> layer_id & 1:
+                    continue
+
+                for imported_id in iter_bits(upstream & mask):
+                    yield Conflict(
+                        main=current_match,
+                        dupe=Match.interned(
+                            closure.modules,
+                            module_id,
+                            index.layers[layer_id],
+                            (imported_id,),
+                            tree=self.tree,
+                        ),
+                    )
+
+
+def _walked_in(
+    tree: Tree, closure: Closure, ignore: Optional[IgnoreMatcher]
+) -> List[str]:
+    walked = [module for module in tree.walk() if module in closure]
+
+    if ignore:
+        walked = [module for module in walked if not ignore.match(module)]
+
+    return walked
+
+
+def find_layer(
+    tree: Tree,
+    layers: Collection[Layer],
+    module: str,
+    *,
+    ignore: Optional[IgnoreMatcher] = None,
+) -> Optional[Match]:
+    """Find the match deciding layer of a single module.
+
+    Only upstream closure of ``module`` is analyzed, which gives the same
+    layer as a full run would give.
+
+    Returns:
+        First match of the module or the match inferred from the imported
+        module deciding its layer, ``None`` when module has no layer.
+    """
+    closure = Closure(tree, [module])
+    analysis = _Analysis(
+        tree, layers, LayerIndex(layers), closure, _walked_in(tree, closure, ignore)
+    )
+
+    for _ in analysis.match(EMPTY_SET):
+        pass
+
+    analysis.infer()
+
+    return analysis.match_of(module)
+
+
+class Enforcer:
+    """Checks modules of one tree against one set of layers.
+
+    Layer index is built once. Closure, layer assignment and conflicts of all
+    walked modules are computed by the first query needing them and reused by
+    the following ones, as are import chains of every pair of modules, see
+    :class:`~layer_enforcer.chains.CachedChainsTree`. Tree must not change
+    while the enforcer is in use.
+
+    Args:
+        tree: Import tree.
+        layers: Layers to match modules against.
+        ignore: Modules which are neither matched against layers nor get
+            inferred ones, and have no conflicts reported. Imports going
+            through them are still followed.
+    """
+
+    tree: Tree
+    layers: Collection[Layer]
+    ignore: Optional[IgnoreMatcher]
+    index: LayerIndex
+    _analysis: Optional[_Analysis]
+    _conflicts: Optional[List[Conflict]]
+
+    def __init__(
+        self,
+        tree: Tree,
+        layers: Collection[Layer],
+        *,
+        ignore: Optional[IgnoreMatcher] = None,
+    ) -> None:
+        self.tree = CachedChainsTree(tree)
+        self.layers = layers
+        self.ignore = ignore
+        self.index = LayerIndex(layers)
+        self._analysis = None
+        self._conflicts = None
+
+    def _reported(self, modules: Iterable[str]) -> Set[str]:
+        ignore = self.ignore
+
+        return {module for module in modules if not (ignore and ignore.match(module))}
+
+    def _analyze(self, timings: Optional[Timings]) -> Iterator[Conflict]:
+        """Run pass 1 and pass 2 over all walked modules, once.
+
+        Yields pass 1 conflicts, as they are found on the first run. Package
+        prefix and glob patterns of ``Layer.imports`` matching no module are
+        reported with
+        :class:`~layer_enforcer.interfaces.UnmatchedPatternWarning`.
+        """
+        if self._analysis is not None:
+            yield from self._analysis.first_conflicts
+            return
+
+        if timings is not None:
+            timings.start("closure")
+
+        walked = list(self.tree.walk())
+        closure = Closure(self.tree, walked)
+        reported = self._reported(walked)
+        walked = [module for module in walked if module in reported]
+        analysis = _Analysis(self.tree, self.layers, self.index, closure, walked)
+
+        for layer, pattern in analysis.imports.unmatched:
+            warnings.warn(
+                f"Pattern {pattern!r} in imports of layer {layer.name!r} "
+                "matches no module of the import graph.",
+                UnmatchedPatternWarning,
+                stacklevel=2,
+            )
+
+        if timings is not None:
+            timings.start("pass 1")
+
+        yield from analysis.match(reported)
+
+        if timings is not None:
+            timings.start("pass 2")
+
+        analysis.infer()
+        self._analysis = analysis
+
+    def _analyzed(self) -> _Analysis:
+        for _ in self._analyze(None):
+            pass
+
+        assert self._analysis is not None
+
+        return self._analysis
+
+    def check(self, *, timings: Optional[Timings] = None) -> Iterator[Conflict]:
+        """Find conflicts of all walked modules, yielded as soon as found.
+
+        Args:
+            timings: Record ``closure``, ``pass 1`` and ``pass 2`` phases of
+                the first run.
+        """
+        if self._conflicts is not None:
+            yield from self._conflicts
+            return
+
+        found = []
+
+        for conflict in self._analyze(timings):
+            found.append(conflict)
+            yield conflict
+
+        assert self._analysis is not None
+
+        for conflict in self._analysis.second_conflicts(set(self._analysis.walked)):
+            found.append(conflict)
+            yield conflict
+
+        self._conflicts = found
+
+        if timings is not None:
+            timings.stop()
+
+    def check_modules(
+        self, modules: Collection[str], *, timings: Optional[Timings] = None
+    ) -> Iterator[Conflict]:
+        """Find conflicts of ``modules``, same as :meth:`check` gives for them.
+
+        Results of a full check are reused when available, otherwise only the
+        upstream closure of ``modules`` is analyzed and nothing is kept.
+
+        Args:
+            modules: Modules to report conflicts for.
+            timings: Record ``closure``, ``pass 1`` and ``pass 2`` phases of
+                a scoped run.
+        """
+        reported = self._reported(modules)
+
+        if self._conflicts is not None:
+            for conflict in self._conflicts:
+                if conflict.main.module in reported:
+                    yield conflict
+
+            return
+
+        if self._analysis is not None:
+            for conflict in self._analysis.first_conflicts:
+                if conflict.main.module in reported:
+                    yield conflict
+
+            yield from self._analysis.second_conflicts(reported)
+            return
+
+        if timings is not None:
+            timings.start("closure")
+
+        closure = Closure(self.tree, modules)
+        analysis = _Analysis(
+            self.tree,
+            self.layers,
+            self.index,
+            closure,
+            _walked_in(self.tree, closure, self.ignore),
+        )
+
+        if timings is not None:
+            timings.start("pass 1")
+
+        yield from analysis.match(reported)
+
+        if timings is not None:
+            timings.start("pass 2")
+
+        analysis.infer()
+        yield from analysis.second_conflicts(reported)
+
+        if timings is not None:
+            timings.stop()
+
+    def explain(self, module: str) -> Optional[Match]:
+        """Match deciding layer of ``module``, ``None`` when it has no layer.
+
+        It is either the first match of the module or the match inferred from
+        the imported module deciding its layer.
+        """
+        return self._analyzed().match_of(module)
+
+    def layer_of(self, module: str) -> Optional[Layer]:
+        """Layer of ``module``, ``None`` when it has no layer."""
+        match = self.explain(module)
+
+        return None if match is None else match.layer
+
+
+def match_modules(
+    tree: Tree,
+    layers: Collection[Layer],
+    *,
+    modules: Optional[Collection[str]] = None,
+    timings: Optional[Timings] = None,
+    ignore: Optional[IgnoreMatcher] = None,
+) -> Iterable[Conflict]:
+    """Find conflicts within import tree, see :class:`Enforcer`.
+
+    Args:
+        tree: Import tree.
+        layers: Layers to match modules against.
+        modules: Report conflicts only for these modules. Only their upstream
+            closure is analyzed, which gives the same conflicts as a full
+            run would give for them.
+        timings: Record ``closure``, ``pass 1`` and ``pass 2`` phases.
+        ignore: Modules which are neither matched against layers nor get
+            inferred ones, and have no conflicts reported. Imports going
+            through them are still followed.
+    """
+    enforcer = Enforcer(tree, layers, ignore=ignore)
+
+    if modules is None:
+        return enforcer.check(timings=timings)
+
+    return enforcer.check_modules(modules, timings=timings)
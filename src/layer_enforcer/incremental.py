@@ -0,0 +1,378 @@
+import json
+import os
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from . import __version__
+from .cache import FindSources, find_sources
+from .changed import find_affected
+from .graph import GraphTree
+from .impl import match_modules
+from .index import LayerIndex
+from .interfaces import Conflict, Layer, Match, MatchModules, Tree
+from .matchers import IgnoreMatcher
+from .scanner import SourceFile, find_source_files, scan_files, scan_imports
+from .timings import Timings
+
+STATE_VERSION = 3
+
+StoredConflict = Tuple[
+    str,
+    str,
+    List[Tuple[str, ...]],
+    List[str],
+    str,
+    List[Tuple[str, ...]],
+    List[str],
+    List[Tuple[str, str]],
+]
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with NamedTemporaryFile("wb", dir=path.parent, delete=False) as f:
+        f.write(data)
+
+    os.replace(f.name, path)
+
+
+def layers_key(layers: Collection[Layer]) -> str:
+    """Fingerprint layer specification."""
+    digest = sha256()
+
+    for layer in LayerIndex(layers).layers:
+        parent = "" if layer.parent is None else layer.parent.name
+        imports = ",".join(sorted(layer.imports))
+        submodules = ",".join(sorted(layer.submodules))
+        digest.update(f"{layer.name}\0{parent}\0{imports}\0{submodules}\0".encode())
+
+    return digest.hexdigest()
+
+
+class ImportStore:
+    """Content-addressed store of names imported by source files.
+
+    Entries are keyed by hash of the module name and the file contents, so
+    only files that actually changed are parsed again.
+    """
+
+    path: Path
+
+    def __init__(self, path: Union[Path, str]) -> None:
+        self.path = Path(path)
+
+    @staticmethod
+    def key(source: bytes, source_file: SourceFile) -> str:
+        digest = sha256(f"{source_file.module}\0{source_file.is_package}\0".encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[str]]:
+        try:
+            names = json.loads(self._entry(key).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(names, list):
+            return None
+
+        return names
+
+    def put(self, key: str, names: List[str]) -> None:
+        _write_atomic(self._entry(key), json.dumps(names).encode())
+
+    def scan(self, source_file: SourceFile) -> List[str]:
+        """Get names imported by ``source_file``, parsing it on cache miss."""
+        source = source_file.path.read_bytes()
+        key = self.key(source, source_file)
+        names = self.get(key)
+
+        if names is None:
+            names = scan_imports(source, source_file.module, source_file.is_package)
+            self.put(key, names)
+
+        return names
+
+
+def _dump_conflict(
+    conflict: Conflict, truncated: AbstractSet[Tuple[str, str]]
+) -> StoredConflict:
+    main_chains = conflict.main.chains
+    dupe_chains = conflict.dupe.chains
+    # Chains are enumerated first, so that pairs left out are recorded.
+    pairs = {(chain[0], chain[-1]) for chain in main_chains + dupe_chains}
+
+    return (
+        conflict.main.module,
+        conflict.main.layer.name,
+        main_chains,
+        sorted(conflict.main.submodules),
+        conflict.dupe.layer.name,
+        dupe_chains,
+        sorted(conflict.dupe.submodules),
+        sorted(pairs & truncated),
+    )
+
+
+def _load_conflict(raw: StoredConflict, layers: Dict[str, Layer]) -> Conflict:
+    module, main, main_chains, main_submodules, dupe, dupe_chains = raw[:6]
+    dupe_submodules = raw[6]
+
+    return Conflict(
+        Match(module, layers[main], main_chains, set(main_submodules)),
+        Match(module, layers[dupe], dupe_chains, set(dupe_submodules)),
+    )
+
+
+def _stored_counterpart(
+    stored: List[StoredConflict], position: int, conflict: Conflict
+) -> Optional[StoredConflict]:
+    """Stored conflict found at ``position`` of its module by the previous run."""
+    if position >= len(stored):
+        return None
+
+    raw = stored[position]
+
+    if (raw[1], raw[4]) != (conflict.main.layer.name, conflict.dupe.layer.name):
+        return None
+
+    return raw
+
+
+def _strings(value: Any) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(s, str) for s in value):
+        raise TypeError("Expected list of strings.")
+
+    return value
+
+
+def _chains(value: Any) -> List[Tuple[str, ...]]:
+    if not isinstance(value, list):
+        raise TypeError("Expected list of chains.")
+
+    return [tuple(_strings(chain)) for chain in value]
+
+
+def _pairs(value: Any) -> List[Tuple[str, str]]:
+    if not isinstance(value, list):
+        raise TypeError("Expected list of pairs.")
+
+    pairs = [tuple(_strings(pair)) for pair in value]
+
+    if not all(len(pair) == 2 for pair in pairs):
+        raise TypeError("Expected list of pairs.")
+
+    return [(importer, imported) for importer, imported in pairs]
+
+
+def _stored_conflict(raw: Any) -> StoredConflict:
+    """Validate conflict read from JSON state, see :func:`_dump_conflict`."""
+    module, main, main_chains, main_submodules, dupe, dupe_chains = raw[:6]
+    dupe_submodules, truncated = raw[6:]
+
+    if not all(isinstance(s, str) for s in (module, main, dupe)):
+        raise TypeError("Expected module and layer names.")
+
+    return (
+        module,
+        main,
+        _chains(main_chains),
+        _strings(main_submodules),
+        dupe,
+        _chains(dupe_chains),
+        _strings(dupe_submodules),
+        _pairs(truncated),
+    )
+
+
+class IncrementalAnalysis:
+    """Conflict detection reusing results of the previous run.
+
+    Imports of every source file are kept in :class:`ImportStore`, so only
+    changed files are parsed. Conflicts are recomputed only for modules whose
+    imports changed and for everything importing them, the rest is taken
+    from the state of the previous run stored in ``cache_dir`` as JSON.
+
+    Import graph is always built with the builtin scanner, like
+    :func:`layer_enforcer.native.new_native_tree` does.
+
+    Args:
+        truncated: Pairs of modules with some of the chains left out, shared
+            with the tree made by ``wrap_tree``. Pairs of conflicts taken
+            from the state are added to it, see
+            :class:`~layer_enforcer.reporters.Reporter`.
+    """
+
+    cache_dir: Path
+    store: ImportStore
+    salt: str
+    find_sources: FindSources
+    match_modules: MatchModules
+    wrap_tree: Callable[[Tree], Tree]
+    truncated: Set[Tuple[str, str]]
+    jobs: int
+
+    def __init__(
+        self,
+        cache_dir: Union[Path, str],
+        *,
+        salt: str = "",
+        find_sources: FindSources = find_sources,
+        match_modules: MatchModules = match_modules,
+        wrap_tree: Callable[[Tree], Tree] = lambda tree: tree,
+        truncated: Optional[Set[Tuple[str, str]]] = None,
+        jobs: int = 1,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.store = ImportStore(self.cache_dir / "imports")
+        self.salt = salt
+        self.find_sources = find_sources
+        self.match_modules = match_modules
+        self.wrap_tree = wrap_tree
+        self.truncated = set() if truncated is None else truncated
+        self.jobs = jobs
+
+    @property
+    def state_path(self) -> Path:
+        return self.cache_dir / "state.json"
+
+    def build(self, *modules: str) -> Tuple[GraphTree, Dict[str, Set[str]]]:
+        """Build import graph of ``modules`` using stored imports."""
+        source_files = find_source_files(*modules, find_sources=self.find_sources)
+        imports = scan_files(source_files, self.store.scan, jobs=self.jobs)
+
+        return GraphTree(modules, imports), imports
+
+    def key(
+        self,
+        modules: Collection[str],
+        layers: Collection[Layer],
+        ignore: Optional[IgnoreMatcher] = None,
+    ) -> str:
+        modules_key = ",".join(sorted(modules))
+        ignore_key = ",".join(sorted(ignore.patterns)) if ignore else ""
+        return sha256(
+            f"{STATE_VERSION}\0{__version__}\0{self.salt}\0{modules_key}\0"
+            f"{ignore_key}\0{layers_key(layers)}".encode()
+        ).hexdigest()
+
+    def load_state(
+        self, key: str
+    ) -> Optional[Tuple[Dict[str, Set[str]], Dict[str, List[StoredConflict]]]]:
+        """Load imports and conflicts stored by the previous run with ``key``."""
+        try:
+            state = json.loads(self.state_path.read_bytes())
+
+            if not isinstance(state, dict) or state.get("key") != key:
+                return None
+
+            imports = {
+                module: set(_strings(imported))
+                for module, imported in state["imports"].items()
+            }
+            conflicts = {
+                module: [_stored_conflict(raw) for raw in stored]
+                for module, stored in state["conflicts"].items()
+            }
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+        return imports, conflicts
+
+    def check(
+        self,
+        modules: Collection[str],
+        layers: Collection[Layer],
+        *,
+        timings: Optional[Timings] = None,
+        ignore: Optional[IgnoreMatcher] = None,
+    ) -> Iterator[Conflict]:
+        """Find conflicts as they are found, in the order of a full run.
+
+        Modules affected by changed imports are checked again along with the
+        modules having stored conflicts, which keeps the order of a full run.
+        Conflicts of the latter are taken from the state, so their chains are
+        not enumerated again. State is saved once all conflicts are consumed,
+        so stopping early keeps the previous state.
+        """
+        modules = sorted(modules)
+        key = self.key(modules, layers, ignore)
+
+        if timings is not None:
+            timings.start("graph build")
+
+        tree, imports = self.build(*modules)
+        state = self.load_state(key)
+        stored: Dict[str, List[StoredConflict]] = {}
+
+        if state is None:
+            changed = set(imports)
+        else:
+            stored_imports, stored = state
+            changed = {
+                module
+                for module, imported in imports.items()
+                if stored_imports.get(module) != imported
+            }
+
+        affected = find_affected(tree, changed)
+        reused = {
+            module: stored[module]
+            for module in tree.walk()
+            if module not in affected and module in stored
+        }
+        layers_by_name = {layer.name: layer for layer in LayerIndex(layers).layers}
+        conflicts: Dict[str, List[StoredConflict]] = {}
+
+        if affected or reused:
+            found = self.match_modules(
+                self.wrap_tree(tree),
+                layers,
+                modules=sorted(affected.union(reused)),
+                timings=timings,
+                ignore=ignore,
+            )
+
+            for conflict in found:
+                module = conflict.main.module
+                module_conflicts = conflicts.setdefault(module, [])
+                raw = _stored_counterpart(
+                    reused.get(module, []), len(module_conflicts), conflict
+                )
+
+                if raw is None:
+                    raw = _dump_conflict(conflict, self.truncated)
+                else:
+                    conflict = _load_conflict(raw, layers_by_name)
+                    self.truncated.update(raw[7])
+
+                module_conflicts.append(raw)
+                yield conflict
+
+        state_imports = {
+            module: sorted(imported) for module, imported in imports.items()
+        }
+        _write_atomic(
+            self.state_path,
+            json.dumps(
+                {"key": key, "imports": state_imports, "conflicts": conflicts}
+            ).encode(),
+        )
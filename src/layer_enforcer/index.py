@@ -0,0 +1,75 @@
+from typing import Collection, Dict, List, Tuple
+
+from .closure import Closure, make_mask
+from .interfaces import Layer
+from .matchers import PatternMatcher
+from .utils import traverse_layers
+
+
+class LayerIndex:
+    """Compiled layer hierarchy.
+
+    Built once from the layers returned by :class:`LayersLoader`. Every layer,
+    including parents missing from the collection, gets an integer id. Ids
+    follow ``(depth, name)`` order, so sorting by id is the same as sorting
+    by depth and then by name.
+    """
+
+    layers: Tuple[Layer, ...]
+    ids: Dict[Layer, int]
+    depths: Tuple[int, ...]
+    masks: Tuple[int, ...]
+
+    def __init__(self, layers: Collection[Layer]) -> None:
+        chains: Dict[Layer, List[Layer]] = {}
+
+        for layer in layers:
+            for ancestor in traverse_layers(layer):
+                if ancestor not in chains:
+                    chains[ancestor] = list(traverse_layers(ancestor))
+
+        self.layers = tuple(
+            sorted(chains, key=lambda layer: (len(chains[layer]), layer.name))
+        )
+        self.ids = {layer: id_ for id_, layer in enumerate(self.layers)}
+        self.depths = tuple(len(chains[layer]) for layer in self.layers)
+        self.masks = tuple(
+            sum(1 << self.ids[ancestor] for ancestor in chains[layer])
+            for layer in self.layers
+        )
+
+    def __contains__(self, layer: object) -> bool:
+        return layer in self.ids
+
+    def __len__(self) -> int:
+        return len(self.layers)
+
+    def mask(self, layer: Layer) -> int:
+        """Bitmask of ``layer`` and all of its ancestors."""
+        return self.masks[self.ids[layer]]
+
+
+class ImportIndex:
+    """Modules matching ``Layer.imports`` patterns of every layer.
+
+    Patterns are resolved once against all the modules of the closure,
+    internal and external ones, see :class:`PatternMatcher`. Layer matches
+    a module when upstream bitset of the module intersects the bitset of the
+    layer, a single lookup per layer regardless of the number of patterns.
+    Package prefix and glob patterns matching no module are collected in
+    ``unmatched``.
+    """
+
+    masks: Tuple[int, ...]
+    unmatched: List[Tuple[Layer, str]]
+
+    def __init__(self, index: LayerIndex, closure: Closure) -> None:
+        masks = []
+        self.unmatched = []
+
+        for layer in index.layers:
+            found, unmatched = PatternMatcher(layer.imports).resolve(closure.modules)
+            masks.append(make_mask(found, len(closure)))
+            self.unmatched.extend((layer, pattern) for pattern in unmatched)
+
+        self.masks = tuple(masks)
@@ -2,19 +2,26 @@ from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     AbstractSet,
     Collection,
+    Dict,
     Iterable,
     Iterator,
     List,
     Optional,
     Protocol,
+    Sequence,
     Set,
     TextIO,
     Tuple,
     Union,
 )
 
+if TYPE_CHECKING:  # pragma: nocover
+    from .matchers import IgnoreMatcher
+    from .timings import Timings
+
 EMPTY_SET: AbstractSet[str] = frozenset()
 
 
@@ -29,22 +36,136 @@ class Layer:
         return repr(self.name)
 
 
-@dataclass
 class Match:
-    module: str
+    """Assignment of ``module`` to ``layer``.
+
+    Modules are stored as ids into the ``names`` table, which is shared by
+    all matches of a single run, and resolved only when accessed. Import
+    chains explaining the match are computed from ``tree`` for every module
+    in ``imports`` on the first access to :attr:`chains` and cached, so only
+    matches that actually get reported pay for chain enumeration.
+    """
+
+    __slots__ = (
+        "names",
+        "module_id",
+        "layer",
+        "submodules",
+        "import_ids",
+        "tree",
+        "_chains",
+    )
+
+    names: Sequence[str]
+    module_id: int
     layer: Layer
-    chains: List[Tuple[str, ...]] = field(default_factory=list)
-    submodules: Set[str] = field(default_factory=set)
+    submodules: AbstractSet[str]
+    import_ids: Sequence[int]
+    tree: Optional["Tree"]
+    _chains: Optional[List[Tuple[str, ...]]]
+
+    def __init__(
+        self,
+        module: str,
+        layer: Layer,
+        chains: Optional[Iterable[Tuple[str, ...]]] = None,
+        submodules: Optional[AbstractSet[str]] = None,
+        *,
+        imports: Iterable[str] = (),
+        tree: Optional["Tree"] = None,
+    ) -> None:
+        self.names = (module, *imports)
+        self.module_id = 0
+        self.layer = layer
+        self.submodules = set() if submodules is None else submodules
+        self.import_ids = range(1, len(self.names))
+        self.tree = tree
+        self._chains = None if chains is None else list(chains)
+
+    @classmethod
+    def interned(
+        cls,
+        names: Sequence[str],
+        module_id: int,
+        layer: Layer,
+        import_ids: Sequence[int] = (),
+        *,
+        submodules: AbstractSet[str] = EMPTY_SET,
+        tree: Optional["Tree"] = None,
+    ) -> "Match":
+        """Make match of modules given by ids into shared ``names`` table."""
+        match = cls.__new__(cls)
+        match.names = names
+        match.module_id = module_id
+        match.layer = layer
+        match.submodules = submodules
+        match.import_ids = import_ids
+        match.tree = tree
+        match._chains = None
+
+        return match
+
+    @property
+    def module(self) -> str:
+        return self.names[self.module_id]
+
+    @property
+    def imports(self) -> List[str]:
+        return [self.names[import_id] for import_id in self.import_ids]
+
+    @property
+    def chains(self) -> List[Tuple[str, ...]]:
+        if self._chains is None:
+            self._chains = []
+
+            if self.tree is not None:
+                for imported in self.imports:
+                    self._chains.extend(self.tree.find_chains(self.module, imported))
+
+        return self._chains
 
     def __bool__(self) -> bool:
-        return bool(self.chains or self.submodules)
+        return bool(self.import_ids or self._chains or self.submodules)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Match):
+            return NotImplemented
+
+        return (
+            self.module == other.module
+            and self.layer == other.layer
+            and self.chains == other.chains
+            and self.submodules == other.submodules
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Match(module={self.module!r}, layer={self.layer!r}, "
+            f"chains={self.chains!r}, submodules={self.submodules!r})"
+        )
 
 
-@dataclass
 class Conflict:
+    """Module matching both ``main`` and ``dupe`` layers."""
+
+    __slots__ = ("main", "dupe")
+
     main: Match
     dupe: Match
 
+    def __init__(self, main: Match, dupe: Match) -> None:
+        self.main = main
+        self.dupe = dupe
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Conflict):
+            return NotImplemented
+
+        return self.main == other.main and self.dupe == other.dupe
+
+    def __repr__(self) -> str:
+        return f"Conflict(main={self.main!r}, dupe={self.dupe!r})"
+
 
 class Tree(metaclass=ABCMeta):
     @abstractmethod
@@ -59,6 +180,44 @@ class Tree(metaclass=ABCMeta):
     def find_upstream_modules(self, module: str) -> Set[str]:
         """Find all modules directly or indirectly imported by ``module``."""
 
+    def find_imported_modules(self, module: str) -> Set[str]:
+        """Find modules directly imported by ``module``.
+
+        Falls back to :meth:`find_upstream_modules`, which yields the same
+        transitive closure. Graph walks check :meth:`has_direct_imports` to
+        read upstream sets as such instead of as import edges.
+        """
+        return self.find_upstream_modules(module)
+
+    def has_direct_imports(self) -> bool:
+        """Whether :meth:`find_imported_modules` finds direct imports only.
+
+        False for trees relying on the transitive fallback, where every
+        upstream module is reported as directly imported.
+        """
+        return type(self).find_imported_modules is not Tree.find_imported_modules
+
+    def find_importers(self, imported: Collection[str]) -> Dict[str, Set[str]]:
+        """Find all walked modules directly or indirectly importing ``imported``.
+
+        Batched reachability query: implementations should do a single
+        reverse traversal per imported module instead of probing every
+        importer separately.
+
+        Returns:
+            Mapping of every module in ``imported`` to its importers.
+        """
+        importers: Dict[str, Set[str]] = {module: set() for module in imported}
+
+        for module in self.walk():
+            upstream = self.find_upstream_modules(module)
+
+            for imported_module, modules in importers.items():
+                if imported_module in upstream:
+                    modules.add(module)
+
+        return importers
+
 
 class TreeFactory(Protocol):
     def __call__(self, *modules: str) -> Tree:
@@ -66,8 +225,32 @@ class TreeFactory(Protocol):
 
 
 class MatchModules(Protocol):
-    def __call__(self, tree: Tree, layers: Collection[Layer]) -> Iterable[Conflict]:
-        """Find conflicts within import tree."""
+    def __call__(
+        self,
+        tree: Tree,
+        layers: Collection[Layer],
+        *,
+        modules: Optional[Collection[str]] = None,
+        timings: Optional["Timings"] = None,
+        ignore: Optional["IgnoreMatcher"] = None,
+    ) -> Iterable[Conflict]:
+        """Find conflicts within import tree.
+
+        Args:
+            tree: Import tree.
+            layers: Layers to match modules against.
+            modules: Report conflicts only for these modules.
+            timings: Phase timings to record.
+            ignore: Modules to leave out of matching and reports.
+        """
+
+
+class ChangedFilesError(Exception):
+    """Changed files can not be listed."""
+
+
+class UnmatchedPatternWarning(UserWarning):
+    """``Layer.imports`` pattern matches no module of the import graph."""
 
 
 class LayersLoaderError(Exception):
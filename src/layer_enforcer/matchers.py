@@ -0,0 +1,209 @@
+import re
+from bisect import bisect_left
+from fnmatch import fnmatchcase, translate
+from typing import (
+    AbstractSet,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .interfaces import Layer
+
+
+class _Node:
+    __slots__ = ("children", "submodules")
+
+    children: Dict[str, "_Node"]
+    submodules: List[Tuple[Layer, str]]
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.submodules = []
+
+
+class SubmoduleMatcher:
+    """Segment trie over ``Layer.submodules`` of all layers.
+
+    Matches the same way as :func:`layer_enforcer.utils.match_submodule`:
+    submodule must be equal to a contiguous run of dotted segments of the
+    module name.
+    """
+
+    root: _Node
+
+    def __init__(self, layers: Iterable[Layer]) -> None:
+        self.root = _Node()
+
+        for layer in layers:
+            for submodule in layer.submodules:
+                node = self.root
+
+                for segment in submodule.split("."):
+                    try:
+                        node = node.children[segment]
+                    except KeyError:
+                        node.children[segment] = node = _Node()
+
+                node.submodules.append((layer, submodule))
+
+    def match(self, module: str) -> Dict[Layer, Set[str]]:
+        """Find submodules of every layer matching ``module``."""
+        segments = module.split(".")
+        root = self.root.children
+        matches: Dict[Layer, Set[str]] = {}
+
+        for start, segment in enumerate(segments):
+            node = root.get(segment)
+            end = start + 1
+
+            while node is not None:
+                for layer, submodule in node.submodules:
+                    matches.setdefault(layer, set()).add(submodule)
+
+                if end == len(segments):
+                    break
+
+                node = node.children.get(segments[end])
+                end += 1
+
+        return matches
+
+
+class PatternMatcher:
+    """Match module names against patterns.
+
+    * ``pkg.mod`` matches the module itself only.
+    * ``pkg.*`` matches every submodule of ``pkg``, at any depth.
+    * Other patterns are shell-style globs, see :mod:`fnmatch`. ``*``
+      matches dots as well, so ``*_pb2`` matches ``app.proto.user_pb2``.
+
+    Exact names and package prefixes are looked up in sets, globs are
+    compiled into a single regular expression, with a named group per glob.
+    """
+
+    patterns: AbstractSet[str]
+    exact: Set[str]
+    prefixes: Set[str]
+    globs: List[str]
+    glob: Optional[Pattern[str]]
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = frozenset(patterns)
+        self.exact = set()
+        self.prefixes = set()
+        self.globs = []
+
+        for pattern in sorted(self.patterns):
+            if not _has_magic(pattern):
+                self.exact.add(pattern)
+            elif pattern.endswith(".*") and not _has_magic(pattern[:-2]):
+                self.prefixes.add(pattern[:-2])
+            else:
+                self.globs.append(pattern)
+
+        self.glob = (
+            re.compile(
+                "|".join(
+                    f"(?P<g{number}>{translate(pattern)})"
+                    for number, pattern in enumerate(self.globs)
+                )
+            )
+            if self.globs
+            else None
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def match(self, module: str) -> bool:
+        """Whether ``module`` matches any of the patterns."""
+        if module in self.exact:
+            return True
+
+        if self.prefixes:
+            package = module
+
+            while "." in package:
+                package = package.rpartition(".")[0]
+
+                if package in self.prefixes:
+                    return True
+
+        return self.glob is not None and self.glob.match(module) is not None
+
+    def select(self, modules: Sequence[str]) -> Set[int]:
+        """Find positions of matching modules in sorted ``modules``.
+
+        Exact names and package prefixes are found by binary search, only
+        globs need a full scan.
+        """
+        return self.resolve(modules)[0]
+
+    def resolve(self, modules: Sequence[str]) -> Tuple[Set[int], List[str]]:
+        """Find matching modules, as :meth:`select`, and unused patterns.
+
+        Package prefix and glob patterns matching none of ``modules`` are
+        likely typos. Exact names are left out, they often stand for
+        optional packages.
+
+        Returns:
+            Positions of matching modules in sorted ``modules`` and sorted
+            prefix and glob patterns matching none of them.
+        """
+        found: Set[int] = set()
+        unmatched: List[str] = []
+
+        for module in self.exact:
+            position = bisect_left(modules, module)
+
+            if position < len(modules) and modules[position] == module:
+                found.add(position)
+
+        for prefix in sorted(self.prefixes):
+            # Names starting with "pkg." sort between "pkg." and "pkg/".
+            matched = range(
+                bisect_left(modules, f"{prefix}."),
+                bisect_left(modules, f"{prefix}/"),
+            )
+            found.update(matched)
+
+            if not matched:
+                unmatched.append(f"{prefix}.*")
+
+        if self.glob is not None:
+            match = self.glob.match
+            globbed: List[int] = []
+            groups: Set[Optional[str]] = set()
+
+            for position, module in enumerate(modules):
+                matched_glob = match(module)
+
+                if matched_glob is not None:
+                    globbed.append(position)
+                    groups.add(matched_glob.lastgroup)
+
+            found.update(globbed)
+
+            for number, pattern in enumerate(self.globs):
+                # Only the first matching glob is known, the others are
+                # looked for among modules matched already.
+                if f"g{number}" not in groups and not any(
+                    fnmatchcase(modules[position], pattern) for position in globbed
+                ):
+                    unmatched.append(pattern)
+
+        return found, sorted(unmatched)
+
+
+class IgnoreMatcher(PatternMatcher):
+    """Match module names against ignore patterns, see :class:`PatternMatcher`."""
+
+
+def _has_magic(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
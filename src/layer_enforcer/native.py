@@ -0,0 +1,19 @@
+from .cache import FindSources, find_sources
+from .graph import GraphTree
+from .scanner import find_source_files, scan_files
+
+
+def new_native_tree(
+    *modules: str,
+    find_sources: FindSources = find_sources,
+    jobs: int = 1,
+) -> GraphTree:
+    """Build import tree with the builtin ``ast`` scanner.
+
+    Alternative to :func:`layer_enforcer.grimp.new_grimp_tree` which depends
+    neither on grimp nor on networkx. Source files are parsed by ``jobs``
+    worker processes, see :func:`layer_enforcer.scanner.scan_files`.
+    """
+    source_files = find_source_files(*modules, find_sources=find_sources)
+
+    return GraphTree(modules, scan_files(source_files, jobs=jobs))
@@ -0,0 +1,235 @@
+import json
+from abc import ABCMeta, abstractmethod
+from importlib import import_module
+from types import ModuleType
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from . import __version__
+from .interfaces import Conflict, Match
+
+TEXT = "text"
+JSONL = "jsonl"
+SARIF = "sarif"
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "layer-conflict"
+
+
+class Reporter(metaclass=ABCMeta):
+    """Writes conflicts as soon as they are found.
+
+    Args:
+        writeln: Function writing a chunk of text followed by a newline.
+        truncated: Pairs of modules with some of the chains left out. Usually
+            :attr:`layer_enforcer.chains.BoundedChainsTree.truncated`, which
+            is filled as chains are enumerated.
+    """
+
+    writeln: Callable[[str], None]
+    truncated: AbstractSet[Tuple[str, str]]
+
+    def __init__(
+        self,
+        writeln: Callable[[str], None],
+        truncated: AbstractSet[Tuple[str, str]] = frozenset(),
+    ) -> None:
+        self.writeln = writeln
+        self.truncated = truncated
+
+    def is_truncated(self, match: Match) -> bool:
+        return any((chain[0], chain[-1]) in self.truncated for chain in match.chains)
+
+    @abstractmethod
+    def report(self, conflict: Conflict) -> None:
+        """Write single conflict."""
+
+    def finish(self) -> None:
+        """Write whatever is left after the last conflict."""
+
+
+class ReporterFactory(Protocol):
+    def __call__(
+        self,
+        writeln: Callable[[str], None],
+        truncated: AbstractSet[Tuple[str, str]] = frozenset(),
+    ) -> Reporter:
+        """Make reporter writing with ``writeln``."""
+
+
+class TextReporter(Reporter):
+    """Human readable report, one block of lines per conflict."""
+
+    def _chains(self, match: Match, lines: List[str]) -> None:
+        lines.extend(f"    {' -> '.join(chain)}" for chain in match.chains)
+
+        if self.is_truncated(match):
+            lines.append("    ... (more chains truncated)")
+
+    def report(self, conflict: Conflict) -> None:
+        lines = [
+            f"{conflict.main.module}:",
+            f"  Main layer: {conflict.main.layer.name}",
+        ]
+        self._chains(conflict.main, lines)
+        lines.append(f"  Conflicts with: {conflict.dupe.layer.name}")
+        self._chains(conflict.dupe, lines)
+        lines.append("")
+
+        for line in lines:
+            self.writeln(line)
+
+
+def _dump_match(reporter: Reporter, match: Match) -> Dict[str, Any]:
+    return {
+        "layer": match.layer.name,
+        "chains": [list(chain) for chain in match.chains],
+        "submodules": sorted(match.submodules),
+        "truncated": reporter.is_truncated(match),
+    }
+
+
+def format_explanation(module: str, match: Optional[Match]) -> List[str]:
+    """Describe the match deciding layer of ``module`` by its shortest chain."""
+    if match is None:
+        return [f"{module}: no layer"]
+
+    lines = [f"{module}: {match.layer.name}"]
+
+    if match.chains:
+        shortest: Tuple[str, ...] = min(match.chains, key=len)
+        lines.append(f"  {' -> '.join(shortest)}")
+
+    lines.extend(f"  in {submodule}" for submodule in sorted(match.submodules))
+
+    return lines
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per line for every conflict."""
+
+    def dump_match(self, match: Match) -> Dict[str, Any]:
+        """JSON serializable form of the match, without the module name."""
+        return _dump_match(self, match)
+
+    def dump(self, conflict: Conflict) -> Dict[str, Any]:
+        """JSON serializable form of the conflict."""
+        return {
+            "module": conflict.main.module,
+            "main": _dump_match(self, conflict.main),
+            "dupe": _dump_match(self, conflict.dupe),
+        }
+
+    def report(self, conflict: Conflict) -> None:
+        self.writeln(json.dumps(self.dump(conflict)))
+
+
+class SarifReporter(Reporter):
+    """SARIF 2.1.0 log, written as a whole by :meth:`finish`."""
+
+    results: List[Dict[str, Any]]
+
+    def __init__(
+        self,
+        writeln: Callable[[str], None],
+        truncated: AbstractSet[Tuple[str, str]] = frozenset(),
+    ) -> None:
+        super().__init__(writeln, truncated)
+        self.results = []
+
+    def report(self, conflict: Conflict) -> None:
+        chains = conflict.main.chains + conflict.dupe.chains
+        text = (
+            f"{conflict.main.module} belongs to layer {conflict.main.layer.name!r}, "
+            f"but conflicts with layer {conflict.dupe.layer.name!r}."
+        )
+
+        if chains:
+            text += " Import chains: " + "; ".join(" -> ".join(c) for c in chains)
+
+        self.results.append(
+            {
+                "ruleId": SARIF_RULE_ID,
+                "level": "error",
+                "message": {"text": text},
+                "locations": [
+                    {
+                        "logicalLocations": [
+                            {
+                                "fullyQualifiedName": conflict.main.module,
+                                "kind": "module",
+                            }
+                        ]
+                    }
+                ],
+                "properties": {
+                    "main": _dump_match(self, conflict.main),
+                    "dupe": _dump_match(self, conflict.dupe),
+                },
+            }
+        )
+
+    def finish(self) -> None:
+        self.writeln(
+            json.dumps(
+                {
+                    "$schema": SARIF_SCHEMA,
+                    "version": "2.1.0",
+                    "runs": [
+                        {
+                            "tool": {
+                                "driver": {
+                                    "name": "layer-enforcer",
+                                    "version": __version__,
+                                    "informationUri": (
+                                        "https://github.com/ZipFile/layer-enforcer"
+                                    ),
+                                    "rules": [
+                                        {
+                                            "id": SARIF_RULE_ID,
+                                            "shortDescription": {
+                                                "text": "Module belongs to "
+                                                "conflicting layers."
+                                            },
+                                        }
+                                    ],
+                                }
+                            },
+                            "results": self.results,
+                        }
+                    ],
+                },
+                indent=2,
+            )
+        )
+
+
+REPORTERS: Dict[str, ReporterFactory] = {
+    TEXT: TextReporter,
+    JSONL: JsonLinesReporter,
+    SARIF: SarifReporter,
+}
+
+
+def load_reporter(
+    name: str,
+    import_module: Callable[[str], ModuleType] = import_module,
+) -> ReporterFactory:
+    """Get builtin reporter by name or custom one by ``module:attr`` string."""
+    if name in REPORTERS:
+        return REPORTERS[name]
+
+    module, _, attr = name.partition(":")
+
+    if not attr:
+        raise ValueError(f"Unknown reporter: {name!r}.")
+
+    return getattr(import_module(module), attr)  # type: ignore[no-any-return]
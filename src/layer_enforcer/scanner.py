@@ -0,0 +1,183 @@
+import ast
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AbstractSet, Callable, Dict, List, Mapping, Optional, Set
+
+from .cache import FindSources, find_sources
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    module: str
+    path: Path
+    is_package: bool
+
+
+def find_source_files(
+    *modules: str,
+    find_sources: FindSources = find_sources,
+) -> Dict[str, SourceFile]:
+    """Map every module of the packages to its source file.
+
+    Only directories with ``__init__.py`` are treated as subpackages.
+    """
+    files: Dict[str, SourceFile] = {}
+
+    for module in modules:
+        for root in find_sources(module):
+            if root.is_file():
+                files[module] = SourceFile(module, root, root.name == "__init__.py")
+                continue
+
+            _find_package_files(module, root, files)
+
+    return files
+
+
+def _find_package_files(
+    package: str,
+    root: Path,
+    files: Dict[str, SourceFile],
+) -> None:
+    init = root / "__init__.py"
+
+    if init.is_file():
+        files[package] = SourceFile(package, init, True)
+
+    for path in sorted(root.iterdir()):
+        if path.is_dir():
+            if (path / "__init__.py").is_file():
+                _find_package_files(f"{package}.{path.name}", path, files)
+        elif path.suffix == ".py" and path.name != "__init__.py":
+            name = f"{package}.{path.stem}"
+            files[name] = SourceFile(name, path, False)
+
+
+def _resolve_relative(module: str, is_package: bool, level: int) -> Optional[str]:
+    parts = module.split(".")
+
+    if not is_package:
+        parts.pop()
+
+    if level > 1:
+        if level - 1 > len(parts):
+            return None
+        del parts[len(parts) - level + 1 :]
+
+    return ".".join(parts) or None
+
+
+def scan_imports(source: bytes, module: str, is_package: bool) -> List[str]:
+    """Extract names possibly imported by python ``source``.
+
+    ``from a import b`` yields ``a.b``, since ``b`` might be a submodule;
+    :func:`resolve_import` later picks ``a.b`` or ``a``, whichever exists.
+    Relative imports are made absolute.
+
+    Raises:
+        SyntaxError: When source is not a valid python code.
+    """
+    names: Set[str] = set()
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = _resolve_relative(module, is_package, node.level)
+
+                if base is None:
+                    continue
+
+                if node.module:
+                    base = f"{base}.{node.module}"
+            elif node.module:
+                base = node.module
+            else:  # pragma: nocover
+                continue
+
+            for alias in node.names:
+                names.add(base if alias.name == "*" else f"{base}.{alias.name}")
+
+    return sorted(names)
+
+
+def resolve_import(
+    name: str,
+    internal: AbstractSet[str],
+    internal_roots: AbstractSet[str],
+) -> Optional[str]:
+    """Resolve imported ``name`` to a graph node.
+
+    Internal imports resolve to the longest existing module prefix, external
+    ones are squashed to the top-level package.
+    """
+    top_level = name.partition(".")[0]
+
+    if top_level not in internal_roots:
+        return top_level
+
+    while name:
+        if name in internal:
+            return name
+
+        name = name.rpartition(".")[0]
+
+    return None
+
+
+def resolve_imports(raw_imports: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """Resolve raw names found by :func:`scan_imports` of every module."""
+    internal = raw_imports.keys()
+    internal_roots = {module.partition(".")[0] for module in internal}
+    resolved: Dict[str, Set[str]] = {}
+
+    for module, names in raw_imports.items():
+        imported = resolved[module] = set()
+
+        for name in names:
+            target = resolve_import(name, internal, internal_roots)
+
+            if target is not None and target != module:
+                imported.add(target)
+
+    return resolved
+
+
+def scan_file(source_file: SourceFile) -> List[str]:
+    """Read source file and extract names possibly imported by it."""
+    source = source_file.path.read_bytes()
+
+    return scan_imports(source, source_file.module, source_file.is_package)
+
+
+def scan_files(
+    source_files: Mapping[str, SourceFile],
+    scan: Callable[[SourceFile], List[str]] = scan_file,
+    *,
+    jobs: int = 1,
+) -> Dict[str, Set[str]]:
+    """Scan source files and resolve imports of every module.
+
+    Args:
+        source_files: Source files by module name.
+        scan: Picklable function extracting names imported by a file.
+        jobs: Number of worker processes parsing files, ``0`` to use all
+            CPUs. Files are parsed in the current process when ``1``.
+    """
+    modules = list(source_files)
+    files = [source_files[module] for module in modules]
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1 or len(files) < 2:
+        names = [scan(source_file) for source_file in files]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(files) // (jobs * 4))
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            names = list(executor.map(scan, files, chunksize=chunksize))
+
+    return resolve_imports(dict(zip(modules, names)))
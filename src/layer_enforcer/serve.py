@@ -0,0 +1,258 @@
+"""Unix socket server answering queries about import graph kept in memory.
+
+Every request is a single line with JSON object and gets a single line of
+JSON in response. Request names the ``method`` and may have an ``id``, which
+is copied to the response. Response has either ``result`` or ``error``::
+
+    {"id": 1, "method": "conflicts", "module": "app.views"}
+    {"id": 1, "result": [{"module": "app.views", "main": ..., "dupe": ...}]}
+
+Methods:
+
+* ``conflicts``: conflicts of ``module``, or of all modules without it.
+* ``layer``: layer of ``module`` and the match deciding it.
+* ``recheck``: parse ``file`` again, even if it looks unchanged, and return
+  conflicts of its module.
+
+Changed files are picked up by every request, only modules affected by them
+are rechecked, see :class:`~layer_enforcer.watch.Watcher`.
+"""
+
+import asyncio
+import json
+import socket
+from pathlib import Path
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .changed import files_to_modules
+from .impl import find_layer
+from .reporters import JsonLinesReporter
+from .watch import Watcher
+
+SOCKET_PATH = ".layer_enforcer.sock"
+
+
+class RequestError(Exception):
+    """Request can not be answered."""
+
+
+class ServerError(Exception):
+    """Server can not be started."""
+
+
+def _require(request: Mapping[str, Any], key: str) -> str:
+    value = request.get(key)
+
+    if not isinstance(value, str):
+        raise RequestError(f"Missing {key!r} string.")
+
+    return value
+
+
+def _optional(request: Mapping[str, Any], key: str) -> Optional[str]:
+    value = request.get(key)
+
+    if value is not None and not isinstance(value, str):
+        raise RequestError(f"{key!r} must be a string.")
+
+    return value
+
+
+class Server:
+    """Answers requests using conflicts and import graph kept by ``watcher``.
+
+    Args:
+        watcher: Source of conflicts and import graph.
+        truncated: Pairs of modules with some of the chains left out, see
+            :class:`~layer_enforcer.reporters.Reporter`.
+    """
+
+    watcher: Watcher
+    reporter: JsonLinesReporter
+    methods: Dict[str, Callable[[Mapping[str, Any]], Any]]
+
+    def __init__(
+        self,
+        watcher: Watcher,
+        truncated: AbstractSet[Tuple[str, str]] = frozenset(),
+    ) -> None:
+        self.watcher = watcher
+        self.reporter = JsonLinesReporter(lambda s: None, truncated)
+        self.methods = {
+            "conflicts": self.conflicts,
+            "layer": self.layer,
+            "recheck": self.recheck,
+        }
+
+    def conflicts(self, request: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        module = _optional(request, "module")
+        self.watcher.update()
+
+        if module is None:
+            conflicts = list(self.watcher)
+        else:
+            conflicts = list(self.watcher.conflicts.get(module, {}).values())
+
+        return [self.reporter.dump(conflict) for conflict in conflicts]
+
+    def layer(self, request: Mapping[str, Any]) -> Dict[str, Any]:
+        module = _require(request, "module")
+        self.watcher.update()
+        assert self.watcher.tree is not None
+        match = find_layer(
+            self.watcher.wrap_tree(self.watcher.tree),
+            self.watcher.layers,
+            module,
+            ignore=self.watcher.ignore,
+        )
+
+        if match is None:
+            return {"module": module, "layer": None}
+
+        return {"module": module, **self.reporter.dump_match(match)}
+
+    def recheck(self, request: Mapping[str, Any]) -> Dict[str, Any]:
+        path = Path(_require(request, "file"))
+        modules = files_to_modules(
+            [path], self.watcher.modules, self.watcher.find_sources
+        )
+
+        if not modules:
+            raise RequestError(f"{path} is not a source file of checked modules.")
+
+        update = self.watcher.update(force=modules)
+
+        return {
+            "modules": sorted(modules),
+            "errors": {str(path): error for path, error in update.errors.items()},
+            "conflicts": [
+                self.reporter.dump(conflict)
+                for module in sorted(modules)
+                for conflict in self.watcher.conflicts.get(module, {}).values()
+            ],
+        }
+
+    def handle(self, request: Mapping[str, Any]) -> Any:
+        """Answer a single request.
+
+        Raises:
+            RequestError: When method is unknown or arguments are missing.
+        """
+        name = _require(request, "method")
+        method = self.methods.get(name)
+
+        if method is None:
+            raise RequestError(f"Unknown method: {name!r}.")
+
+        return method(request)
+
+    def respond(self, line: Union[bytes, str]) -> str:
+        """Answer a single line of JSON with a single line of JSON.
+
+        Failures, including unexpected ones, are answered with ``error``, so
+        a single request can not bring the server down.
+        """
+        response: Dict[str, Any] = {}
+
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({"error": f"Invalid JSON: {e}"})
+
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Request is not a JSON object.")
+
+            if "id" in request:
+                response["id"] = request["id"]
+
+            response["result"] = self.handle(request)
+        except RequestError as e:
+            response["error"] = str(e)
+        except Exception as e:
+            response["error"] = f"Internal error: {type(e).__name__}: {e}"
+
+        return json.dumps(response)
+
+
+async def serve(
+    server: Server,
+    path: Union[Path, str],
+    *,
+    started: Optional[Callable[[], None]] = None,
+) -> None:
+    """Listen on Unix socket at ``path`` until cancelled.
+
+    Clients are served concurrently, while requests run one at a time in a
+    worker thread, so the event loop keeps accepting connections. Stale
+    socket left by a killed server is replaced.
+
+    Raises:
+        ServerError: When another server is listening on ``path``.
+    """
+    path = Path(path)
+    loop = asyncio.get_running_loop()
+    lock = asyncio.Lock()
+
+    async def handle_client(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                async with lock:
+                    response = await loop.run_in_executor(None, server.respond, line)
+
+                writer.write(response.encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if path.is_socket():
+        with socket.socket(socket.AF_UNIX) as probe:
+            try:
+                probe.connect(str(path))
+            except OSError:
+                path.unlink()
+            else:
+                raise ServerError(f"Another server is listening on {path}.")
+
+    unix_server = await asyncio.start_unix_server(handle_client, str(path))
+
+    try:
+        async with unix_server:
+            if started is not None:
+                started()
+
+            await unix_server.serve_forever()
+    finally:
+        if path.is_socket():
+            path.unlink()
+
+
+def run(server: Server, path: Union[Path, str], writeln: Callable[[str], None]) -> None:
+    """Serve requests until interrupted.
+
+    Raises:
+        ServerError: When another server is listening on ``path``.
+    """
+    try:
+        asyncio.run(
+            serve(server, path, started=lambda: writeln(f"Listening on {path}"))
+        )
+    except KeyboardInterrupt:
+        pass
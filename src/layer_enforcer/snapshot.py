@@ -0,0 +1,448 @@
+"""Binary import graph snapshots, opened with :mod:`mmap`.
+
+Snapshot is built once, e.g. by a CI setup job, and shared by any number of
+processes. Opening it reads only the header, the OS pages the rest in on
+demand and shares pages between processes mapping the same file.
+
+Layout, all integers are little-endian ``uint32`` and every section starts at
+a multiple of 4 bytes::
+
+    header          magic, version, modules, imports, roots size, names size
+    roots           newline separated UTF-8 root module names
+    name offsets    modules + 1 offsets into names
+    names           UTF-8 module names in sorted order
+    imports         CSR offsets (modules + 1) and targets (imports)
+    importers       CSR of the reversed graph, same sizes as imports
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
+
+from .csr import CSR
+from .graph import GraphError, GraphTree, is_descendant
+from .interfaces import Tree
+
+MAGIC = b"LAYERENF"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIII")
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 4)
+
+
+def _little_endian(values: Sequence[int]) -> bytes:
+    buffer = array("I", values)
+
+    if sys.byteorder != "little":  # pragma: nocover
+        buffer.byteswap()
+
+    return buffer.tobytes()
+
+
+def write_snapshot(tree: Tree, roots: Iterable[str], f: BinaryIO) -> None:
+    """Write import graph of ``tree`` reachable from ``roots`` to ``f``."""
+    roots = tuple(roots)
+
+    if not isinstance(tree, GraphTree) or tree.roots != roots:
+        tree = GraphTree.from_tree(tree, roots)
+
+    encoded_roots = "\n".join(roots).encode()
+    names = array("I", [0])
+    encoded_names = bytearray()
+
+    for module in tree.modules:
+        encoded_names += module.encode()
+        names.append(len(encoded_names))
+
+    f.write(
+        HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            len(tree.modules),
+            len(tree.imports.targets),
+            len(encoded_roots),
+            len(encoded_names),
+        )
+    )
+
+    for section in (encoded_roots, _little_endian(names), encoded_names):
+        f.write(section)
+        f.write(_padding(len(section)))
+
+    for csr in (tree.imports, tree.importers):
+        f.write(_little_endian(csr.offsets))
+        f.write(_little_endian(csr.targets))
+
+
+def save_snapshot(tree: Tree, roots: Iterable[str], path: Union[Path, str]) -> None:
+    """Atomically write snapshot to ``path``, see :func:`write_snapshot`."""
+    path = Path(path)
+
+    with NamedTemporaryFile("wb", dir=path.parent, delete=False) as f:
+        write_snapshot(tree, roots, cast(BinaryIO, f))
+
+    os.replace(f.name, path)
+
+
+Buffer = Union[mmap.mmap, bytes]
+
+
+def _parse(
+    buffer: Buffer, make_array: Callable[[int, int], Sequence[int]]
+) -> Tuple[Tuple[str, ...], int, Sequence[int], List[CSR]]:
+    """Check snapshot layout and locate its sections.
+
+    Returns:
+        Snapshot roots, start of names, name offsets, imports and importers.
+
+    Raises:
+        GraphError: When snapshot is corrupt or has unsupported version.
+    """
+    if len(buffer) < HEADER.size:
+        raise GraphError("Unable to load import graph.")
+
+    magic, version, size, imports, roots_size, names_size = HEADER.unpack_from(buffer)
+
+    if magic != MAGIC:
+        raise GraphError("Unable to load import graph.")
+
+    if version != FORMAT_VERSION:
+        raise GraphError(f"Unsupported import graph version: {version}.")
+
+    roots_end = HEADER.size + roots_size
+    names_start = roots_end + len(_padding(roots_size)) + 4 * (size + 1)
+    names_end = names_start + names_size + len(_padding(names_size))
+
+    if names_end + 2 * 4 * (size + 1 + imports) != len(buffer):
+        raise GraphError("Unable to load import graph.")
+
+    try:
+        roots = buffer[HEADER.size : roots_end].decode()
+    except UnicodeDecodeError as e:
+        raise GraphError("Unable to load import graph.") from e
+
+    name_offsets = make_array(names_start - 4 * (size + 1), size + 1)
+    position = names_end
+    csrs = []
+
+    for _ in range(2):
+        offsets = make_array(position, size + 1)
+        position += 4 * (size + 1)
+        csrs.append(CSR(offsets, make_array(position, imports)))
+        position += 4 * imports
+
+    return (
+        tuple(roots.split("\n")) if roots_size else (),
+        names_start,
+        name_offsets,
+        csrs,
+    )
+
+
+def _check_csr(csr: CSR, size: int) -> None:
+    offsets = csr.offsets
+
+    if offsets[0] != 0 or offsets[-1] != len(csr.targets):
+        raise GraphError("Unable to load import graph.")
+
+    if any(offsets[i] > offsets[i + 1] for i in range(size)):
+        raise GraphError("Unable to load import graph.")
+
+    if csr.targets and max(csr.targets) >= size:
+        raise GraphError("Unable to load import graph.")
+
+
+def read_snapshot(f: BinaryIO) -> GraphTree:
+    """Load the whole snapshot written by :func:`write_snapshot` into memory.
+
+    Unlike :class:`MmapTree`, every section is validated, so a corrupt file
+    can not make queries fail later.
+
+    Raises:
+        GraphError: When snapshot is corrupt or has unsupported version.
+    """
+    data = f.read()
+
+    def make_array(start: int, size: int) -> Sequence[int]:
+        values = array("I")
+        values.frombytes(data[start : start + 4 * size])
+
+        if sys.byteorder != "little":  # pragma: nocover
+            values.byteswap()
+
+        return values
+
+    roots, names_start, name_offsets, (imports, importers) = _parse(data, make_array)
+    size = len(name_offsets) - 1
+
+    if name_offsets[0] != 0 or any(
+        name_offsets[i] > name_offsets[i + 1] for i in range(size)
+    ):
+        raise GraphError("Unable to load import graph.")
+
+    _check_csr(imports, size)
+    _check_csr(importers, size)
+
+    try:
+        modules = list(NameTable(data, names_start, name_offsets))
+    except UnicodeDecodeError as e:
+        raise GraphError("Unable to load import graph.") from e
+
+    tree = GraphTree.__new__(GraphTree)
+    tree.roots = roots
+    tree.modules = modules
+    tree.ids = {module: id_ for id_, module in enumerate(modules)}
+    tree.imports = imports
+    tree._importers = importers
+    tree._walked = []
+
+    return tree
+
+
+class NameTable(Sequence[str]):
+    """Sorted module names, decoded from the snapshot on access."""
+
+    buffer: Buffer
+    start: int
+    offsets: Sequence[int]
+
+    def __init__(self, buffer: Buffer, start: int, offsets: Sequence[int]) -> None:
+        self.buffer = buffer
+        self.start = start
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        return self.encoded(index).decode()
+
+    def encoded(self, index: int) -> bytes:
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("name index out of range")
+
+        return self.buffer[
+            self.start + self.offsets[index] : self.start + self.offsets[index + 1]
+        ]
+
+    def lower_bound(self, name: str) -> int:
+        """Id of the first module not less than ``name``.
+
+        UTF-8 preserves code point order, so encoded names compare the same
+        way as decoded ones.
+        """
+        return bisect_left(_EncodedNames(self), name.encode())
+
+
+class _EncodedNames(Sequence[bytes]):
+    def __init__(self, names: NameTable) -> None:
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: int) -> bytes:  # type: ignore[override]
+        return self.names.encoded(index)
+
+
+class NameIds(Mapping[str, int]):
+    """Module ids by name, found by binary search over :class:`NameTable`."""
+
+    names: NameTable
+
+    def __init__(self, names: NameTable) -> None:
+        self.names = names
+
+    def __getitem__(self, name: str) -> int:
+        index = self.names.lower_bound(name)
+
+        if index == len(self.names) or self.names[index] != name:
+            raise KeyError(name)
+
+        return index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class MmapTree(GraphTree):
+    """Tree over memory-mapped snapshot written by :func:`write_snapshot`.
+
+    Module names are decoded and looked up by binary search only when
+    queried, adjacency lists are read straight from the mapping.
+
+    Args:
+        path: Snapshot location.
+        roots: Modules to walk, snapshot roots by default. Every module has
+            to belong to one of the snapshot roots.
+
+    Raises:
+        GraphError: When snapshot is corrupt, has unsupported version or does
+            not contain ``roots``.
+    """
+
+    buffer: mmap.mmap
+    snapshot_roots: Tuple[str, ...]
+    modules: NameTable
+    _views: List[memoryview]
+
+    def __init__(
+        self, path: Union[Path, str], roots: Optional[Iterable[str]] = None
+    ) -> None:
+        with open(path, "rb") as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise GraphError("Unable to load import graph.") from e
+
+        self._views = []
+
+        try:
+            self._open(roots)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, roots: Optional[Iterable[str]]) -> None:
+        snapshot_roots, names_start, name_offsets, csrs = _parse(
+            self.buffer, self._array
+        )
+        self.snapshot_roots = snapshot_roots
+        self.roots = self.snapshot_roots if roots is None else tuple(roots)
+
+        for root in self.roots:
+            if not any(is_descendant(root, parent) for parent in self.snapshot_roots):
+                raise GraphError(f"Module {root!r} is not in the import graph.")
+
+        self.modules = NameTable(self.buffer, names_start, name_offsets)
+        self.ids = NameIds(self.modules)
+        self.imports, self._importers = csrs
+        self._walked = []
+
+    def _array(self, start: int, size: int) -> Sequence[int]:
+        if sys.byteorder != "little":  # pragma: nocover
+            values = array("I", self.buffer[start : start + 4 * size])
+            values.byteswap()
+            return values
+
+        view = memoryview(self.buffer)[start : start + 4 * size].cast("I")
+        self._views.append(view)
+
+        return view
+
+    def close(self) -> None:
+        """Unmap the snapshot, tree can not be used afterwards."""
+        for view in self._views:
+            view.release()
+
+        self._views.clear()
+        self.buffer.close()
+
+    def __enter__(self) -> "MmapTree":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _ranges(self) -> List[Tuple[int, int]]:
+        """Sorted, non-overlapping ranges of ids of walked modules."""
+        ranges = []
+
+        for root in self.roots:
+            start = self.modules.lower_bound(root)
+
+            if start < len(self.modules) and self.modules[start] == root:
+                ranges.append((start, start + 1))
+
+            # Names starting with "root." sort between "root." and "root/".
+            ranges.append(
+                (
+                    self.modules.lower_bound(f"{root}."),
+                    self.modules.lower_bound(f"{root}/"),
+                )
+            )
+
+        merged: List[Tuple[int, int]] = []
+
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = merged[-1][0], max(end, merged[-1][1])
+            elif start < end:
+                merged.append((start, end))
+
+        return merged
+
+    @property
+    def walked(self) -> List[bool]:
+        if not self._walked and self.modules:
+            walked = [False] * len(self.modules)
+
+            for start, end in self._ranges():
+                walked[start:end] = [True] * (end - start)
+
+            self._walked = walked
+
+        return self._walked
+
+    def walk(self) -> Iterator[str]:
+        for start, end in self._ranges():
+            for module_id in range(start, end):
+                yield self.modules[module_id]
+
+
+class SnapshotTreeFactory:
+    """Tree factory opening the snapshot at ``path`` instead of building graph.
+
+    Raises:
+        GraphError: When snapshot can not be opened or does not contain
+            requested modules. Message starts with the path of the snapshot.
+    """
+
+    path: Path
+
+    def __init__(self, path: Union[Path, str]) -> None:
+        self.path = Path(path)
+
+    def __call__(self, *modules: str) -> Tree:
+        try:
+            return MmapTree(self.path, modules)
+        except OSError as e:
+            raise GraphError(f"{self.path}: {e.strerror or e}") from e
+        except GraphError as e:
+            raise GraphError(f"{self.path}: {e}") from e
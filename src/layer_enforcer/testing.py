@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from typing import Dict, List, Set
+
+from .graph import GraphTree
+from .interfaces import Layer
+
+PACKAGE = "synthetic"
+UNLAYERED = "common"
+
+
+@dataclass(frozen=True)
+class GraphSpec:
+    """Parameters of synthetic package.
+
+    Attributes:
+        modules: Number of leaf modules.
+        fan_out: Number of internal imports of every module.
+        cycle_density: Probability of module importing one of the modules
+            following it, which makes import cycles.
+        layer_depth: Number of nested layers.
+        submodules: Number of submodules of every layer.
+        violations: Probability of import ignoring layers.
+        seed: Random seed, same spec always makes same graph.
+    """
+
+    modules: int = 1000
+    fan_out: int = 4
+    cycle_density: float = 0.05
+    layer_depth: int = 3
+    submodules: int = 2
+    violations: float = 0.001
+    seed: int = 0
+
+
+def make_layers(spec: GraphSpec) -> Set[Layer]:
+    """Make chain of ``spec.layer_depth`` nested layers.
+
+    Layer ``layerN`` matches ``lNsM`` subpackages and ``externalN`` imports.
+    """
+    layers: Set[Layer] = set()
+    parent = None
+
+    for depth in range(spec.layer_depth):
+        parent = Layer(
+            f"layer{depth}",
+            parent,
+            imports=frozenset({f"external{depth}"}),
+            submodules=frozenset(f"l{depth}s{i}" for i in range(spec.submodules)),
+        )
+        layers.add(parent)
+
+    return layers
+
+
+def make_graph(spec: GraphSpec) -> GraphTree:
+    """Make random import graph of ``synthetic`` package.
+
+    Every leaf module is given a layer depth and is placed either into one
+    of the subpackages of its layer or into ``synthetic.common``, whose
+    modules get their layers inferred. Module imports ``spec.fan_out``
+    preceding modules of the same or outer layers, so the graph is acyclic
+    unless ``spec.cycle_density`` is set. Each import ignores layers with
+    ``spec.violations`` probability, which makes conflicts.
+    """
+    rng = Random(spec.seed)
+    layer_depth = max(spec.layer_depth, 1)
+    depths = [rng.randrange(layer_depth) for _ in range(spec.modules)]
+    unlayered = f"{PACKAGE}.{UNLAYERED}"
+    modules = []
+
+    for i, depth in enumerate(depths):
+        package = rng.randrange(spec.submodules + 1) if spec.layer_depth else 0
+
+        if package == spec.submodules or not spec.layer_depth:
+            modules.append(f"{unlayered}.m{i}")
+        else:
+            modules.append(f"{PACKAGE}.l{depth}s{package}.m{i}")
+
+    imports: Dict[str, Set[str]] = {PACKAGE: set(), unlayered: set()}
+    imports.update(
+        (f"{PACKAGE}.l{depth}s{i}", set())
+        for depth in range(spec.layer_depth)
+        for i in range(spec.submodules)
+    )
+    allowed: List[List[int]] = [[] for _ in range(layer_depth)]
+
+    def pick(candidates: List[int], end: int) -> int:
+        if candidates and rng.random() >= spec.violations:
+            return candidates[rng.randrange(len(candidates))]
+
+        return rng.randrange(end)
+
+    for i, (module, depth) in enumerate(zip(modules, depths)):
+        imported = imports[module] = set()
+
+        if i:
+            imported.update(
+                modules[pick(allowed[depth], i)] for _ in range(spec.fan_out)
+            )
+
+        if spec.layer_depth and rng.random() < 0.1:
+            imported.add(f"external{rng.randrange(depth + 1)}")
+
+        for outer in range(depth, layer_depth):
+            allowed[outer].append(i)
+
+    for i, module in enumerate(modules[:-1]):
+        if rng.random() < spec.cycle_density:
+            following = [
+                j for j in range(i + 1, len(modules)) if depths[j] <= depths[i]
+            ]
+            imports[module].add(modules[pick(following, len(modules))])
+
+    return GraphTree([PACKAGE], imports)
+
+
+def write_package(tree: GraphTree, path: Path) -> Path:
+    """Write python sources importing exactly what ``tree`` modules import.
+
+    Returns:
+        Directory of the top-level package.
+    """
+    modules = list(tree.walk())
+    packages = {module.rpartition(".")[0] for module in modules}
+
+    for module in modules:
+        if module in packages:
+            source = path.joinpath(*module.split("."), "__init__.py")
+        else:
+            source = path.joinpath(*module.split(".")).with_suffix(".py")
+
+        source.parent.mkdir(parents=True, exist_ok=True)
+        source.write_text(
+            "".join(
+                f"import {imported}\n"
+                for imported in sorted(tree.find_imported_modules(module))
+            )
+        )
+
+    return path / PACKAGE
@@ -0,0 +1,164 @@
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: nocover
+    resource = None  # type: ignore[assignment]
+
+
+def max_rss() -> Optional[int]:
+    """Peak resident set size of the process in bytes, if known."""
+    if resource is None:  # pragma: nocover
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+@dataclass(frozen=True)
+class Phase:
+    name: str
+    wall: float
+    cpu: float
+    peak_memory: Optional[int] = None
+    max_rss: Optional[int] = None
+
+
+class Timings:
+    """Wall time, CPU time and peak memory of consecutive run phases.
+
+    Starting a phase finishes the current one, so phases never overlap.
+    Phase entered with :meth:`phase` resumes the interrupted one on exit, so
+    the same phase may be recorded several times, see :meth:`summary`.
+
+    Peak resident set size of the process is recorded at the end of every
+    phase. With ``trace_memory`` peak size of memory allocated during the
+    phase is measured with :mod:`tracemalloc` as well, which slows python
+    code down noticeably.
+    """
+
+    phases: List[Phase]
+    trace_memory: bool
+    _current: Optional[str]
+    _wall: float
+    _cpu: float
+    _started_tracing: bool
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.phases = []
+        self.trace_memory = trace_memory
+        self._current = None
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._started_tracing = False
+
+    def start(self, name: str) -> None:
+        self.stop()
+
+        if self.trace_memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            elif hasattr(tracemalloc, "reset_peak"):  # pragma: nocover
+                tracemalloc.reset_peak()
+
+        self._current = name
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def stop(self) -> None:
+        if self._current is None:
+            return
+
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak_memory = None
+
+        if self.trace_memory:
+            import tracemalloc
+
+            if tracemalloc.is_tracing():
+                peak_memory = tracemalloc.get_traced_memory()[1]
+
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+        self.phases.append(Phase(self._current, wall, cpu, peak_memory, max_rss()))
+        self._current = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        interrupted = self._current
+        self.start(name)
+
+        try:
+            yield
+        finally:
+            if interrupted is None:
+                self.stop()
+            else:
+                self.start(interrupted)
+
+    def summary(self) -> List[Phase]:
+        """Phases merged by name, in order of their first start."""
+        merged: Dict[str, Phase] = {}
+
+        for phase in self.phases:
+            if phase.name not in merged:
+                merged[phase.name] = phase
+                continue
+
+            prev = merged[phase.name]
+            merged[phase.name] = Phase(
+                phase.name,
+                prev.wall + phase.wall,
+                prev.cpu + phase.cpu,
+                _max(prev.peak_memory, phase.peak_memory),
+                _max(prev.max_rss, phase.max_rss),
+            )
+
+        return list(merged.values())
+
+
+def _max(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None or b is None:
+        return b if a is None else a
+
+    return max(a, b)
+
+
+def _format_size(size: Optional[int]) -> str:
+    if size is None:
+        return "-"
+
+    return f"{size / 2**20:.1f} MiB"
+
+
+def format_timings(timings: Timings) -> List[str]:
+    """Format phase summary as a table."""
+    phases = timings.summary()
+    width = max([len("total")] + [len(phase.name) for phase in phases])
+    lines = [f"{'phase':<{width}} {'wall':>10} {'cpu':>10} {'max rss':>12}"]
+
+    for phase in phases:
+        lines.append(
+            f"{phase.name:<{width}} {phase.wall:>9.3f}s {phase.cpu:>9.3f}s "
+            f"{_format_size(phase.max_rss):>12}"
+        )
+
+    wall = sum(phase.wall for phase in phases)
+    cpu = sum(phase.cpu for phase in phases)
+    peak = max((phase.max_rss or 0 for phase in phases), default=0) or None
+    lines.append(
+        f"{'total':<{width}} {wall:>9.3f}s {cpu:>9.3f}s {_format_size(peak):>12}"
+    )
+
+    return lines
@@ -0,0 +1,247 @@
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .cache import FindSources, find_sources
+from .changed import find_affected
+from .graph import GraphTree
+from .impl import match_modules
+from .interfaces import Conflict, Layer, MatchModules, Tree
+from .matchers import IgnoreMatcher
+from .scanner import SourceFile, find_source_files, resolve_imports, scan_file
+
+POLL_INTERVAL = 0.5
+
+ConflictKey = Tuple[str, str, str, Tuple[str, ...], Tuple[str, ...]]
+Stat = Tuple[int, int]
+
+
+def conflict_key(conflict: Conflict) -> ConflictKey:
+    """Identify conflict regardless of the tree it was found in."""
+    return (
+        conflict.main.module,
+        conflict.main.layer.name,
+        conflict.dupe.layer.name,
+        tuple(conflict.dupe.imports),
+        tuple(sorted(conflict.dupe.submodules)),
+    )
+
+
+@dataclass
+class Update:
+    """Changes found by a single :meth:`Watcher.update`.
+
+    Attributes:
+        new: Conflicts not reported before.
+        resolved: Previously reported conflicts which are gone.
+        errors: Files which could not be parsed, with the error message.
+            Their last parsed imports are used meanwhile.
+        checked: Number of modules rechecked.
+    """
+
+    new: List[Conflict] = field(default_factory=list)
+    resolved: List[Conflict] = field(default_factory=list)
+    errors: Dict[Path, str] = field(default_factory=dict)
+    checked: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.resolved or self.errors)
+
+
+class Watcher:
+    """Keeps import graph and conflicts of ``modules`` in memory.
+
+    Every :meth:`update` polls modification times of source files, parses
+    only the changed ones and rechecks only modules whose imports changed
+    and the modules importing them. Graph is built with the builtin scanner,
+    like :func:`layer_enforcer.native.new_native_tree` does.
+    """
+
+    modules: Tuple[str, ...]
+    layers: Collection[Layer]
+    find_sources: FindSources
+    match_modules: MatchModules
+    wrap_tree: Callable[[Tree], Tree]
+    ignore: Optional[IgnoreMatcher]
+    scan: Callable[[SourceFile], List[str]]
+    tree: Optional[GraphTree]
+    stats: Dict[str, Stat]
+    names: Dict[str, List[str]]
+    imports: Dict[str, Set[str]]
+    conflicts: Dict[str, Dict[ConflictKey, Conflict]]
+
+    def __init__(
+        self,
+        modules: Collection[str],
+        layers: Collection[Layer],
+        *,
+        find_sources: FindSources = find_sources,
+        match_modules: MatchModules = match_modules,
+        wrap_tree: Callable[[Tree], Tree] = lambda tree: tree,
+        ignore: Optional[IgnoreMatcher] = None,
+        scan: Callable[[SourceFile], List[str]] = scan_file,
+    ) -> None:
+        self.modules = tuple(sorted(modules))
+        self.layers = layers
+        self.find_sources = find_sources
+        self.match_modules = match_modules
+        self.wrap_tree = wrap_tree
+        self.ignore = ignore
+        self.scan = scan
+        self.tree = None
+        self.stats = {}
+        self.names = {}
+        self.imports = {}
+        self.conflicts = {}
+
+    def _stat(self, source_file: SourceFile) -> Optional[Stat]:
+        try:
+            stat = source_file.path.stat()
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def update(self, force: Collection[str] = ()) -> Update:
+        """Recheck modules affected by files changed since the last update.
+
+        Files of ``force`` modules are parsed again even when their
+        modification time and size did not change.
+        """
+        update = Update()
+        source_files = find_source_files(*self.modules, find_sources=self.find_sources)
+        removed = self.names.keys() - source_files.keys()
+        rescanned = set(removed)
+
+        for module in removed:
+            del self.names[module]
+            del self.stats[module]
+
+        for module, source_file in source_files.items():
+            stat = self._stat(source_file)
+
+            if stat is None:
+                continue
+
+            if self.stats.get(module) == stat and module not in force:
+                continue
+
+            self.stats[module] = stat
+            rescanned.add(module)
+
+            try:
+                self.names[module] = self.scan(source_file)
+            except (OSError, SyntaxError, ValueError) as e:
+                update.errors[source_file.path] = str(e)
+                self.names.setdefault(module, [])
+
+        if not rescanned and self.tree is not None:
+            return update
+
+        imports = resolve_imports(self.names)
+        changed = {
+            module
+            for module in imports.keys() | self.imports.keys()
+            if imports.get(module) != self.imports.get(module)
+        }
+        self.imports = imports
+        self.tree = GraphTree(self.modules, imports)
+
+        if not changed:
+            return update
+
+        affected = find_affected(self.tree, changed)
+        update.checked = len(affected)
+        found: Dict[str, Dict[ConflictKey, Conflict]] = {}
+
+        for conflict in self.match_modules(
+            self.wrap_tree(self.tree),
+            self.layers,
+            modules=sorted(affected),
+            ignore=self.ignore,
+        ):
+            module_conflicts = found.setdefault(conflict.main.module, {})
+            module_conflicts[conflict_key(conflict)] = conflict
+
+        for module in sorted(affected):
+            old = self.conflicts.pop(module, {})
+            new = found.get(module, {})
+            update.new.extend(new[key] for key in new if key not in old)
+            update.resolved.extend(old[key] for key in old if key not in new)
+
+            if new:
+                self.conflicts[module] = new
+
+        return update
+
+    def __len__(self) -> int:
+        return sum(len(conflicts) for conflicts in self.conflicts.values())
+
+    def __iter__(self) -> Iterator[Conflict]:
+        for module in sorted(self.conflicts):
+            yield from self.conflicts[module].values()
+
+
+def describe(conflict: Conflict) -> str:
+    """One line description of the conflict."""
+    dupe = conflict.dupe
+    reasons = [f"imports {module}" for module in dupe.imports]
+    reasons.extend(f"is in {submodule}" for submodule in sorted(dupe.submodules))
+    reason = f" ({', '.join(reasons)})" if reasons else ""
+
+    return (
+        f"{conflict.main.module}: {conflict.main.layer.name} conflicts with "
+        f"{dupe.layer.name}{reason}"
+    )
+
+
+def format_update(update: Update, total: int) -> List[str]:
+    """Format update as a header line followed by the changed conflicts."""
+    lines = [
+        f"[{time.strftime('%H:%M:%S')}] {len(update.new)} new, "
+        f"{len(update.resolved)} resolved, {total} total conflicts"
+    ]
+    lines.extend(f"! {path}: {error}" for path, error in update.errors.items())
+    lines.extend(f"+ {describe(conflict)}" for conflict in update.new)
+    lines.extend(f"- {describe(conflict)}" for conflict in update.resolved)
+
+    return lines
+
+
+def watch(
+    watcher: Watcher,
+    writeln: Callable[[str], None],
+    *,
+    interval: float = POLL_INTERVAL,
+    sleep: Callable[[float], None] = time.sleep,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """Print changes of conflicts every ``interval`` seconds.
+
+    Runs until ``should_stop`` returns true or until interrupted.
+    """
+    try:
+        while True:
+            first = watcher.tree is None
+            update = watcher.update()
+
+            if update or first:
+                for line in format_update(update, len(watcher)):
+                    writeln(line)
+
+            if should_stop():
+                break
+
+            sleep(interval)
+    except KeyboardInterrupt:
+        pass
@@ -3,6 +3,8 @@ from io import StringIO, TextIOBase
 from pathlib import Path
 from typing import List
 
+from pytest import raises
+
 from layer_enforcer.config.args import ArgparseConfigLoader, Args, parse_args
 from layer_enforcer.config.interfaces import Config
 from layer_enforcer.config.testing import StaticLayersLoader
@@ -28,6 +30,83 @@ class TestParseArgs:
         assert args.ignore == {"test_moduleX", "test_moduleY"}
         assert isinstance(args.layers, TextIOBase)
         assert args.layers.read() == "name: test"
+        assert args.chains is None
+        assert args.max_chain_length is None
+        assert args.max_chains is None
+
+    def test_options(self) -> None:
+        args = parse_args(
+            [
+                "--chains",
+                "k-shortest",
+                "--max-chain-length",
+                "5",
+                "--max-chains",
+                "3",
+                "--cache-dir",
+                ".cache",
+                "--incremental",
+                "--tree-factory",
+                "x:y",
+                "--jobs",
+                "4",
+                "--timings",
+                "--profile",
+                "run.prof",
+                "--format",
+                "sarif",
+                "--max-conflicts",
+                "3",
+                "--snapshot",
+                "a.snapshot",
+                "--write-snapshot",
+                "b.snapshot",
+                "--changed-from",
+                "main",
+                "--watch",
+                "--files",
+                "a.py",
+                "b.py",
+            ]
+        )
+
+        assert args.chains == "k-shortest"
+        assert args.max_chain_length == 5
+        assert args.max_chains == 3
+        assert args.cache_dir == ".cache"
+        assert args.incremental
+        assert args.tree_factory == "x:y"
+        assert args.jobs == 4
+        assert args.timings
+        assert args.profile == "run.prof"
+        assert args.format == "sarif"
+        assert args.max_conflicts == 3
+        assert args.snapshot == "a.snapshot"
+        assert args.write_snapshot == "b.snapshot"
+        assert args.changed_from == "main"
+        assert args.files == ["a.py", "b.py"]
+        assert args.watch
+
+    def test_fail_fast(self) -> None:
+        assert parse_args(["--fail-fast"]).max_conflicts == 1
+
+    def test_command(self) -> None:
+        args = parse_args(["serve", "app", "--socket", "app.sock"])
+
+        assert args.command == "serve"
+        assert args.modules == ["app"]
+        assert args.socket == "app.sock"
+        assert parse_args(["app", "serve"]).command is None
+
+    def test_explain(self) -> None:
+        args = parse_args(["explain", "app.views", "--chains", "shortest"])
+
+        assert args.command == "explain"
+        assert args.explain == "app.views"
+        assert args.modules == []
+
+        with raises(SystemExit):
+            parse_args(["explain", "app.a", "app.b"])
 
 
 class TestArgparseConfigLoader:
@@ -57,12 +136,48 @@ class TestArgparseConfigLoader:
                 modules={"a", "b", "c"},
                 layers=layers,
                 ignore={"x", "y"},
+                chains="shortest",
+                max_chain_length=4,
+                max_chains=2,
+                cache_dir=".cache",
+                incremental=True,
+                tree_factory_module="x:y",
+                jobs=4,
+                format="jsonl",
+                max_conflicts=5,
+                timings=True,
+                profile="run.prof",
+                snapshot="a.snapshot",
+                write_snapshot="b.snapshot",
+                changed_from="main",
+                files=["a.py"],
+                watch=True,
+                command="serve",
+                socket="app.sock",
             )
         )
         args = Args(
             modules=["a", "b", "c"],
             layers=StringIO(""),
             ignore={"x", "y"},
+            chains="shortest",
+            max_chain_length=4,
+            max_chains=2,
+            cache_dir=".cache",
+            incremental=True,
+            tree_factory="x:y",
+            jobs=4,
+            format="jsonl",
+            max_conflicts=5,
+            timings=True,
+            profile="run.prof",
+            snapshot="a.snapshot",
+            write_snapshot="b.snapshot",
+            changed_from="main",
+            files=["a.py"],
+            watch=True,
+            command="serve",
+            socket="app.sock",
         )
         layers_loader = StaticLayersLoader(text_io=layers)
         loader = ArgparseConfigLoader(
@@ -74,6 +189,27 @@ class TestArgparseConfigLoader:
 
         assert asdict(updated_config) == expected_config
 
+    def test_load_explain(self) -> None:
+        def load(config: Config) -> Config:
+            return ArgparseConfigLoader(
+                [],
+                layers_loader=StaticLayersLoader(),
+                parse_args=lambda _: Args(
+                    modules=[],
+                    layers=None,
+                    ignore=set(),
+                    command="explain",
+                    explain="app.views.users",
+                ),
+            ).load(config)
+
+        config = load(Config())
+
+        assert config.command == "explain"
+        assert config.explain == "app.views.users"
+        assert config.modules == {"app"}
+        assert load(Config(modules={"app", "lib"})).modules == {"app", "lib"}
+
     def test_load_no_double_parse(self) -> None:
         class AlreadyParsedError(Exception):
             pass
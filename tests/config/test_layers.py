@@ -5,14 +5,21 @@ from typing import Iterator, Optional, Set, TextIO, Union
 from pytest import fixture, mark, raises
 
 from layer_enforcer.config.layers import (
+    CachedLayersLoader,
+    DeferredLayersLoader,
     DictToLayers,
     LayerDict,
     NotADictError,
     NotAYamlError,
+    TimedLayersLoader,
     YamlLayersLoader,
     _dict_to_layers,
+    flatten_layers,
+    unflatten_layers,
 )
+from layer_enforcer.config.testing import StaticLayersLoader
 from layer_enforcer.interfaces import Layer
+from layer_enforcer.timings import Timings
 
 
 class TestDictToLayers:
@@ -137,3 +144,158 @@ class TestYamlLayersLoader:
             path = yml_path
 
         assert TestYamlLayersLoader().path(path) is layers
+
+
+def test_timed_layers_loader() -> None:
+    layers = {Layer("test")}
+    timings = Timings()
+    loader = TimedLayersLoader(
+        StaticLayersLoader(text_io=layers, path={"layers.yml": layers}),
+        timings,
+    )
+
+    timings.start("config")
+
+    assert loader.text_io(StringIO("")) == layers
+    assert loader.path("layers.yml") == layers
+
+    timings.stop()
+
+    assert [phase.name for phase in timings.summary()] == ["config", "layers"]
+
+
+def test_flatten_layers() -> None:
+    layers = set(
+        _dict_to_layers(
+            {
+                "name": "b",
+                "imports": ["y", "x"],
+                "layers": [{"name": "a", "submodules": ["s"], "layers": []}],
+                "submodules": [],
+            }
+        )
+    )
+    table = flatten_layers(layers)
+
+    assert table == [("b", -1, ("x", "y"), ()), ("a", 0, (), ("s",))]
+
+    unflattened = {layer.name: layer for layer in unflatten_layers(table)}
+
+    assert set(unflattened.values()) == layers
+    assert unflattened["a"].parent is unflattened["b"]
+    assert unflattened["a"].submodules == {"s"}
+    assert unflattened["b"].imports == {"x", "y"}
+
+
+class CountingLayersLoader(YamlLayersLoader):
+    calls: int = 0
+
+    def text_io(self, f: TextIO) -> Set[Layer]:
+        self.calls += 1
+        return super().text_io(f)
+
+
+class TestCachedLayersLoader:
+    spec = "name: a\nlayers:\n- name: b\n  imports: [x]\n"
+
+    def test_memory(self, tmp_path: Path) -> None:
+        path = tmp_path / "layers.yml"
+        path.write_text(self.spec)
+        layers_loader = CountingLayersLoader()
+        loader = CachedLayersLoader(layers_loader)
+
+        layers = loader.path(path)
+
+        assert {layer.name for layer in layers} == {"a", "b"}
+        assert loader.text_io(StringIO(self.spec)) == layers
+        assert loader.path(str(path)) == layers
+        assert layers_loader.calls == 1
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_disk(self, tmp_path: Path) -> None:
+        layers_loader = CountingLayersLoader()
+        layers = CachedLayersLoader(layers_loader, tmp_path).text_io(
+            StringIO(self.spec)
+        )
+        cached = CachedLayersLoader(layers_loader, tmp_path).text_io(
+            StringIO(self.spec)
+        )
+
+        assert cached == layers
+        assert {layer.name: layer.imports for layer in cached}["b"] == {"x"}
+        assert layers_loader.calls == 1
+
+        for path in tmp_path.iterdir():
+            path.write_bytes(b"garbage")
+
+        assert (
+            CachedLayersLoader(layers_loader, tmp_path).text_io(StringIO(self.spec))
+            == layers
+        )
+        assert layers_loader.calls == 2
+
+    def test_disk_json(self, tmp_path: Path) -> None:
+        import json
+        import pickle
+
+        loader = CachedLayersLoader(YamlLayersLoader(), tmp_path)
+        layers = loader.text_io(StringIO(self.spec))
+        [path] = tmp_path.iterdir()
+
+        assert path.name.endswith(".layers.json")
+        assert json.loads(path.read_text())["layers"] == [
+            ["a", -1, [], []],
+            ["b", 0, ["x"], []],
+        ]
+
+        class Payload:
+            def __reduce__(self) -> object:
+                return exec, ("raise SystemExit('pickle loaded')",)
+
+        for content in [
+            pickle.dumps(Payload()),
+            b'{"version": 2, "layers": [["b", 0, ["x"], []]]}',
+            b'{"version": 2, "layers": [["b", -1, "x", []]]}',
+            b'{"version": 2}',
+        ]:
+            path.write_bytes(content)
+            layers_loader = CountingLayersLoader()
+
+            assert (
+                CachedLayersLoader(layers_loader, tmp_path).text_io(StringIO(self.spec))
+                == layers
+            )
+            assert layers_loader.calls == 1
+
+    def test_unwritable(self, tmp_path: Path) -> None:
+        cache_dir = tmp_path / "file"
+        cache_dir.write_text("")
+        loader = CachedLayersLoader(YamlLayersLoader(), cache_dir)
+
+        assert {layer.name for layer in loader.text_io(StringIO(self.spec))} == {
+            "a",
+            "b",
+        }
+
+    def test_invalid(self, tmp_path: Path) -> None:
+        loader = CachedLayersLoader(YamlLayersLoader(), tmp_path)
+
+        with raises(NotADictError):
+            loader.text_io(StringIO(""))
+
+        assert list(tmp_path.iterdir()) == []
+
+
+def test_deferred_layers_loader(tmp_path: Path) -> None:
+    path = tmp_path / "layers.yml"
+    path.write_text("name: a")
+    loader = DeferredLayersLoader()
+
+    assert loader.resolve(YamlLayersLoader()) is None
+    assert loader.path(path) == set()
+    assert {layer.name for layer in loader.resolve(YamlLayersLoader()) or ()} == {"a"}
+    assert loader.text_io(StringIO("name: b")) == set()
+
+    path.write_text("invalid: [")
+
+    assert {layer.name for layer in loader.resolve(YamlLayersLoader()) or ()} == {"b"}
@@ -40,6 +40,15 @@ class TestLoadPyproject:
                 modules=["test_module1", "test_module2"],
                 ignore=["test_moduleX", "test_moduleY"],
                 layers="/tmp/layers.yml",
+                chains="k-shortest",
+                max_chain_length=5,
+                max_chains=3,
+                cache_dir=".cache",
+                incremental=True,
+                tree_factory="x:y",
+                jobs=4,
+                format="jsonl",
+                max_conflicts=5,
             )
         )
         pyproject_toml = tmp_path / "pyproject.toml"
@@ -48,7 +57,16 @@ class TestLoadPyproject:
             "[tool.layer_enforcer]\n"
             'modules = ["test_module1", "test_module2"]\n'
             'ignore = ["test_moduleX", "test_moduleY"]\n'
-            'layers = "/tmp/layers.yml"'
+            'layers = "/tmp/layers.yml"\n'
+            'chains = "k-shortest"\n'
+            "max_chain_length = 5\n"
+            "max_chains = 3\n"
+            'cache_dir = ".cache"\n'
+            "incremental = true\n"
+            'tree_factory = "x:y"\n'
+            "jobs = 4\n"
+            'format = "jsonl"\n'
+            "max_conflicts = 5"
         )
 
         assert asdict(load_pyproject(pyproject_toml)) == expected
@@ -81,12 +99,30 @@ class TestPyprojectTomlConfigLoader:
                 modules={"a", "b", "c"},
                 layers=layers,
                 ignore={"x", "y"},
+                chains="shortest",
+                max_chain_length=4,
+                max_chains=2,
+                cache_dir=".cache",
+                incremental=True,
+                tree_factory_module="x:y",
+                jobs=4,
+                format="jsonl",
+                max_conflicts=5,
             )
         )
         pyproject_config = PyprojectConfig(
             modules=["a", "b", "c"],
             ignore=["x", "y"],
             layers="/tmp/layers.yml",
+            chains="shortest",
+            max_chain_length=4,
+            max_chains=2,
+            cache_dir=".cache",
+            incremental=True,
+            tree_factory="x:y",
+            jobs=4,
+            format="jsonl",
+            max_conflicts=5,
         )
         layers_loader = StaticLayersLoader(path={"/tmp/layers.yml": layers})
         loader = PyprojectTomlConfigLoader(
@@ -0,0 +1,135 @@
+import os
+from pathlib import Path
+from typing import List
+
+from pytest import MonkeyPatch, fixture
+
+from layer_enforcer.cache import (
+    CachedTreeFactory,
+    find_sources,
+    fingerprint,
+    iter_source_files,
+)
+from layer_enforcer.graph import GraphTree
+from layer_enforcer.interfaces import Tree
+
+
+@fixture
+def package(tmp_path: Path) -> Path:
+    root = tmp_path / "pkg"
+    (root / "sub").mkdir(parents=True)
+    (root / "__init__.py").write_text("")
+    (root / "sub" / "__init__.py").write_text("")
+    (root / "sub" / "mod.py").write_text("import os")
+    (root / "data.txt").write_text("")
+
+    return root
+
+
+def test_find_sources() -> None:
+    sources = find_sources("layer_enforcer")
+
+    assert [source.name for source in sources] == ["layer_enforcer"]
+    assert find_sources("layer_enforcer.cache")[0].name == "cache.py"
+    assert find_sources("missing_module_for_sure") == []
+    assert find_sources("sys") == []
+
+
+def test_iter_source_files(package: Path) -> None:
+    assert [
+        path.relative_to(package).as_posix() for path in iter_source_files(package)
+    ] == ["__init__.py", "sub/__init__.py", "sub/mod.py"]
+    assert list(iter_source_files(package / "__init__.py")) == [package / "__init__.py"]
+
+
+def test_fingerprint(package: Path) -> None:
+    def find_sources(module: str) -> List[Path]:
+        return [package]
+
+    before = fingerprint("pkg", find_sources=find_sources)
+
+    assert fingerprint("pkg", find_sources=find_sources) == before
+    assert fingerprint("pkg", salt="x", find_sources=find_sources) != before
+
+    (package / "sub" / "mod.py").write_text("import sys")
+
+    assert fingerprint("pkg", find_sources=find_sources) != before
+
+
+def test_cached_tree_factory(package: Path, tmp_path: Path) -> None:
+    calls = []
+
+    def find_sources(module: str) -> List[Path]:
+        return [package]
+
+    def tree_factory(*modules: str) -> Tree:
+        calls.append(modules)
+        return GraphTree(modules, {"pkg": {"pkg.sub"}, "pkg.sub": {"os"}})
+
+    factory = CachedTreeFactory(
+        tree_factory, tmp_path / "cache", find_sources=find_sources
+    )
+
+    built = factory("pkg")
+    loaded = factory("pkg")
+
+    assert calls == [("pkg",)]
+    assert isinstance(loaded, GraphTree)
+    assert list(loaded.walk()) == list(built.walk()) == ["pkg", "pkg.sub"]
+    assert loaded.find_upstream_modules("pkg") == {"pkg.sub", "os"}
+
+    mod = package / "sub" / "mod.py"
+    stat = mod.stat()
+    os.utime(mod, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    factory("pkg")
+
+    assert calls == [("pkg",), ("pkg",)]
+
+
+def test_cached_tree_factory_corrupt(package: Path, tmp_path: Path) -> None:
+    calls = []
+
+    def tree_factory(*modules: str) -> Tree:
+        calls.append(modules)
+        return GraphTree(modules, {"pkg": set()})
+
+    factory = CachedTreeFactory(
+        tree_factory, tmp_path / "cache", find_sources=lambda module: [package]
+    )
+    path = factory.path("pkg")
+    path.parent.mkdir()
+    path.write_bytes(b"garbage")
+
+    assert list(factory("pkg").walk()) == ["pkg"]
+    assert calls == [("pkg",)]
+    assert factory.load(path) is not None
+
+
+def test_cached_tree_factory_unwritable(package: Path, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    cache_dir.write_text("not a directory")
+
+    factory = CachedTreeFactory(
+        lambda *modules: GraphTree(modules, {"pkg": set()}),
+        cache_dir,
+        find_sources=lambda module: [package],
+    )
+
+    assert list(factory("pkg").walk()) == ["pkg"]
+
+
+def test_cached_tree_factory_dump_error(
+    package: Path, tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    def fail(src: str, dst: Path) -> None:
+        raise OSError("read-only")
+
+    monkeypatch.setattr(os, "replace", fail)
+    factory = CachedTreeFactory(
+        lambda *modules: GraphTree(modules, {"pkg": set()}),
+        tmp_path / "cache",
+        find_sources=lambda module: [package],
+    )
+
+    assert list(factory("pkg").walk()) == ["pkg"]
+    assert list((tmp_path / "cache").iterdir()) == []
@@ -0,0 +1,169 @@
+from typing import Dict, Iterator, List, Set, Tuple
+
+from pytest import fixture, raises
+
+from layer_enforcer.chains import (
+    ALL,
+    K_SHORTEST,
+    SHORTEST,
+    BoundedChainsTree,
+    CachedChainsTree,
+    find_k_shortest_chains,
+    find_shortest_chain,
+)
+from layer_enforcer.interfaces import Tree
+
+
+class DictTree(Tree):
+    def __init__(self, imports: Dict[str, Set[str]]) -> None:
+        self.imports = imports
+
+    def walk(self) -> Iterator[str]:
+        return iter(self.imports)
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        yield from find_k_shortest_chains(self, importer, imported)
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        return self.imports.get(module, set())
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return {"a": {"b", "c", "d", "e"}}.get(module, set())
+
+
+@fixture
+def tree() -> DictTree:
+    return DictTree(
+        {
+            "a": {"b", "c", "e"},
+            "b": {"d"},
+            "c": {"b", "d"},
+            "d": {"c", "e"},
+        }
+    )
+
+
+def test_find_shortest_chain(tree: DictTree) -> None:
+    assert find_shortest_chain(tree, "a", "d") == ("a", "b", "d")
+    assert find_shortest_chain(tree, "a", "e") == ("a", "e")
+    assert find_shortest_chain(tree, "e", "a") is None
+
+
+def test_find_k_shortest_chains(tree: DictTree) -> None:
+    assert list(find_k_shortest_chains(tree, "a", "d")) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+        ("a", "c", "b", "d"),
+    ]
+
+
+def test_find_k_shortest_chains_max_length(tree: DictTree) -> None:
+    assert list(find_k_shortest_chains(tree, "a", "d", 3)) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+    ]
+    assert list(find_k_shortest_chains(tree, "a", "d", 1)) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+    ]
+
+
+def test_find_k_shortest_chains_unreachable(tree: DictTree) -> None:
+    assert list(find_k_shortest_chains(tree, "e", "a")) == []
+    assert list(find_k_shortest_chains(tree, "a", "a")) == []
+
+
+def test_bounded_chains_tree_unknown_strategy(tree: DictTree) -> None:
+    with raises(ValueError):
+        BoundedChainsTree(tree, "longest")
+
+
+def test_bounded_chains_tree_all(tree: DictTree) -> None:
+    bounded = BoundedChainsTree(tree, ALL, max_count=2)
+
+    assert list(bounded.find_chains("a", "d")) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+    ]
+    assert bounded.truncated == {("a", "d")}
+
+
+def test_bounded_chains_tree_shortest(tree: DictTree) -> None:
+    bounded = BoundedChainsTree(tree, SHORTEST)
+
+    assert list(bounded.find_chains("a", "d")) == [("a", "b", "d")]
+    assert list(bounded.find_chains("e", "a")) == []
+    assert list(bounded.find_chains("b", "d")) == [("b", "d")]
+    assert bounded.truncated == {("a", "d")}
+
+
+def test_bounded_chains_tree_k_shortest(tree: DictTree) -> None:
+    bounded = BoundedChainsTree(tree, K_SHORTEST, max_length=3, max_count=5)
+
+    assert list(bounded.find_chains("a", "d")) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+    ]
+    assert bounded.truncated == {("a", "d")}
+
+
+def test_bounded_chains_tree_k_shortest_long_shortest(tree: DictTree) -> None:
+    bounded = BoundedChainsTree(tree, K_SHORTEST, max_length=2)
+
+    assert list(bounded.find_chains("a", "d")) == [
+        ("a", "b", "d"),
+        ("a", "c", "d"),
+    ]
+    assert list(bounded.find_chains("b", "c")) == [("b", "d", "c")]
+    assert bounded.truncated == {("a", "d")}
+
+
+class UpstreamTree(Tree):
+    def walk(self) -> Iterator[str]:
+        return iter(["a", "b", "c"])
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        return iter([("a", "b", "c"), ("a", "c"), ("a", "b", "a", "c")])
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return {"a": {"b", "c"}, "b": {"c"}}.get(module, set())
+
+
+def test_bounded_chains_tree_upstream_only() -> None:
+    tree = UpstreamTree()
+    shortest = BoundedChainsTree(tree, SHORTEST)
+    k_shortest = BoundedChainsTree(tree, K_SHORTEST, max_length=2, max_count=2)
+
+    assert not shortest.has_direct_imports()
+    assert list(shortest.find_chains("a", "c")) == [("a", "b", "c")]
+    assert list(k_shortest.find_chains("a", "c")) == [("a", "b", "c"), ("a", "c")]
+    assert shortest.truncated == k_shortest.truncated == {("a", "c")}
+
+
+def test_bounded_chains_tree_delegates(tree: DictTree) -> None:
+    bounded = BoundedChainsTree(tree)
+
+    assert list(bounded.walk()) == ["a", "b", "c", "d"]
+    assert bounded.has_direct_imports()
+    assert bounded.find_imported_modules("b") == {"d"}
+    assert bounded.find_upstream_modules("a") == {"b", "c", "d", "e"}
+    assert bounded.find_importers({"e"}) == {"e": {"a"}}
+
+
+def test_cached_chains_tree(tree: DictTree) -> None:
+    calls: List[Tuple[str, str]] = []
+
+    class CountingTree(DictTree):
+        def find_chains(
+            self, importer: str, imported: str
+        ) -> Iterator[Tuple[str, ...]]:
+            calls.append((importer, imported))
+            return super().find_chains(importer, imported)
+
+    cached = CachedChainsTree(CountingTree(tree.imports))
+
+    assert list(cached.find_chains("a", "d")) == list(tree.find_chains("a", "d"))
+    assert list(cached.find_chains("a", "d")) == list(tree.find_chains("a", "d"))
+    assert calls == [("a", "d")]
+    assert list(cached.walk()) == ["a", "b", "c", "d"]
+    assert cached.find_importers({"e"}) == {"e": {"a"}}
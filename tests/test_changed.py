@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import List
+
+from pytest import raises
+
+from layer_enforcer.changed import (
+    files_to_modules,
+    find_affected,
+    git_changed_files,
+    run_git,
+)
+from layer_enforcer.graph import GraphTree
+from layer_enforcer.interfaces import ChangedFilesError
+
+
+def test_files_to_modules(tmp_path: Path) -> None:
+    package = tmp_path / "app"
+    module = tmp_path / "single.py"
+
+    def find_sources(name: str) -> List[Path]:
+        return {"app": [package], "single": [module]}.get(name, [])
+
+    assert files_to_modules(
+        [
+            package / "__init__.py",
+            package / "sub" / "__init__.py",
+            package / "sub" / "deleted.py",
+            package / "data.json",
+            module,
+            tmp_path / "other.py",
+            tmp_path / "app" / ".." / "single.py",
+        ],
+        ["app", "single", "missing"],
+        find_sources=find_sources,
+    ) == {"app", "app.sub", "app.sub.deleted", "single"}
+
+
+def test_git_changed_files() -> None:
+    calls = []
+
+    def run_git(*args: str) -> str:
+        calls.append(args)
+
+        if args[0] == "rev-parse":
+            return "/repo\n"
+
+        return "a.py\0b/c.py\0"
+
+    assert git_changed_files("main", run_git) == [
+        Path("/repo/a.py"),
+        Path("/repo/b/c.py"),
+    ]
+    assert calls[1] == ("diff", "--name-only", "--no-renames", "-z", "main", "--")
+
+
+def test_run_git_error() -> None:
+    with raises(ChangedFilesError, match="rev-parse"):
+        run_git("rev-parse", "--verify", "--quiet", "refs/heads/no/such/branch")
+
+
+def test_find_affected() -> None:
+    tree = GraphTree(
+        ["app"],
+        {"app.a": {"app.b"}, "app.b": {"app.c"}, "app.c": set(), "app.d": set()},
+    )
+
+    assert find_affected(tree, {"app.c", "gone"}) == {"app.a", "app.b", "app.c", "gone"}
+    assert find_affected(tree, set()) == set()
@@ -1,14 +1,33 @@
+import json
+import os
+import pstats
+import subprocess
+import sys
 from pathlib import Path
-from types import ModuleType
-from typing import Collection, Iterable, List
+from types import ModuleType, SimpleNamespace
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
 from unittest.mock import Mock
 
-from pytest import fixture, raises
+from pytest import MonkeyPatch, fixture, raises
 
+from layer_enforcer import cli
+from layer_enforcer.chains import BoundedChainsTree
 from layer_enforcer.cli import DEFAULT_LAYER_LOADER, main
 from layer_enforcer.config.args import ArgparseConfigLoader
-from layer_enforcer.config.testing import NoopConfigLoader
+from layer_enforcer.config.interfaces import Config
+from layer_enforcer.config.testing import NoopConfigLoader, StaticConfigLoader
+from layer_enforcer.graph import GraphTree
 from layer_enforcer.interfaces import Conflict, Layer, Match, Tree
+from layer_enforcer.snapshot import MmapTree, save_snapshot
 
 
 @fixture
@@ -37,6 +56,31 @@ def layers() -> List[Layer]:
     return [a, b, c]
 
 
+class FakeMatchModules:
+    """Stand-in for :func:`layer_enforcer.impl.match_modules` recording calls.
+
+    Every call is recorded as a dict of its arguments and answered by
+    ``produce``, no conflicts by default.
+    """
+
+    calls: List[Dict[str, Any]]
+    produce: Callable[[Dict[str, Any]], Iterable[Conflict]]
+
+    def __init__(
+        self,
+        produce: Callable[[Dict[str, Any]], Iterable[Conflict]] = lambda call: [],
+    ) -> None:
+        self.calls = []
+        self.produce = produce
+
+    def __call__(
+        self, tree: Tree, layers: Collection[Layer], **kwargs: Any
+    ) -> Iterable[Conflict]:
+        call = {"tree": tree, "layers": layers, **kwargs}
+        self.calls.append(call)
+        return self.produce(call)
+
+
 def test_main(tmp_path: Path, layers_yaml: str, layers: List[Layer]) -> None:
     f = tmp_path / "layers.yaml"
     f.write_text(layers_yaml)
@@ -56,10 +100,7 @@ def test_main(tmp_path: Path, layers_yaml: str, layers: List[Layer]) -> None:
     def import_module(s: str) -> ModuleType:
         return module
 
-    def match_modules(tree: Tree, layers: Collection[Layer]) -> Iterable[Conflict]:
-        assert tree is module.new_grimp_tree.return_value
-        assert {"a", "b", "c"} == {layer.name for layer in layers}
-        return conflicts
+    match_modules = FakeMatchModules(lambda call: conflicts)
 
     def writeln(s: str) -> None:
         out.append(s)
@@ -84,6 +125,10 @@ def test_main(tmp_path: Path, layers_yaml: str, layers: List[Layer]) -> None:
             config_loader=config_loader,
         )
 
+    [call] = match_modules.calls
+
+    assert call["tree"] is module.new_grimp_tree.return_value
+    assert {"a", "b", "c"} == {layer.name for layer in call["layers"]}
     assert out == [
         "a:",
         "  Main layer: a",
@@ -110,10 +155,7 @@ def test_main_no_conflict(tmp_path: Path, layers_yaml: str) -> None:
     def import_module(s: str) -> ModuleType:
         return module
 
-    def match_modules(tree: Tree, layers: Collection[Layer]) -> Iterable[Conflict]:
-        assert tree is module.new_grimp_tree.return_value
-        assert {"a", "b", "c"} == {layer.name for layer in layers}
-        return conflicts
+    match_modules = FakeMatchModules(lambda call: conflicts)
 
     def writeln(s: str) -> None:
         out.append(s)
@@ -130,6 +172,12 @@ def test_main_no_conflict(tmp_path: Path, layers_yaml: str) -> None:
         config_loader=config_loader,
     )
 
+    [call] = match_modules.calls
+
+    assert call["tree"] is module.new_grimp_tree.return_value
+    assert {"a", "b", "c"} == {layer.name for layer in call["layers"]}
+    # Only keywords that are set are passed.
+    assert set(call) == {"tree", "layers"}
     assert out == []
 
 
@@ -139,8 +187,7 @@ def test_main_no_modules() -> None:
     def import_module(s: str) -> ModuleType:
         assert False, "should not be reached"
 
-    def match_modules(tree: Tree, layers: Collection[Layer]) -> Iterable[Conflict]:
-        assert False, "should not be reached"
+    match_modules = FakeMatchModules()
 
     def writeln(s: str) -> None:
         out.append(s)
@@ -154,3 +201,670 @@ def test_main_no_modules() -> None:
         )
 
     assert out == ["No modules to check."]
+    assert match_modules.calls == []
+
+
+def test_main_truncated_chains(layers: List[Layer]) -> None:
+    a, b, _ = layers
+    module = Mock()
+    module.new_grimp_tree.return_value.find_chains.return_value = iter(
+        [("a", "x", "y"), ("a", "y")]
+    )
+    out = []
+
+    def import_module(s: str) -> ModuleType:
+        return module
+
+    def produce(call: Dict[str, Any]) -> Iterable[Conflict]:
+        chains = list(call["tree"].find_chains("a", "y"))
+        return [Conflict(Match("a", a, chains), Match("a", b))]
+
+    with raises(SystemExit):
+        main(
+            writeln=out.append,
+            import_module=import_module,
+            match_modules=FakeMatchModules(produce),
+            config_loader=StaticConfigLoader(
+                Config(modules={"a"}, layers=set(layers), max_chains=1)
+            ),
+        )
+
+    assert out == [
+        "a:",
+        "  Main layer: a",
+        "    a -> x -> y",
+        "    ... (more chains truncated)",
+        "  Conflicts with: b",
+        "",
+    ]
+
+
+def test_main_jobs(layers: List[Layer]) -> None:
+    calls: List[Tuple[Tuple[str, ...], int]] = []
+    err: List[str] = []
+
+    def new_parallel_tree(*modules: str, jobs: int = 1) -> Tree:
+        calls.append((modules, jobs))
+        return GraphTree(modules, {})
+
+    def new_tree(*modules: str) -> Tree:
+        calls.append((modules, 1))
+        return GraphTree(modules, {})
+
+    module = SimpleNamespace(new_parallel_tree=new_parallel_tree, new_tree=new_tree)
+
+    for factory in ["factories:new_parallel_tree", "factories:new_tree"]:
+        main(
+            writeln=Mock(),
+            import_module=lambda s: module,  # type: ignore[arg-type,return-value]
+            match_modules=FakeMatchModules(),
+            config_loader=StaticConfigLoader(
+                Config(
+                    modules={"a"},
+                    layers=set(layers),
+                    jobs=4,
+                    tree_factory_module=factory,
+                )
+            ),
+            writeln_stderr=err.append,
+        )
+
+    assert calls == [(("a",), 4), (("a",), 1)]
+    assert err == ["--jobs is ignored, factories:new_tree does not accept it."]
+
+
+def test_main_snapshot(tmp_path: Path, layers: List[Layer]) -> None:
+    module = Mock()
+    module.new_grimp_tree.return_value = GraphTree(["a"], {"a": {"b"}, "a.x": {"a"}})
+    path = tmp_path / "graph.snapshot"
+    walked = []
+
+    def produce(call: Dict[str, Any]) -> Iterable[Conflict]:
+        walked.append((type(call["tree"]), list(call["tree"].walk())))
+        return []
+
+    for config in [
+        Config(modules={"a"}, layers=set(layers), write_snapshot=str(path)),
+        Config(modules={"a"}, layers=set(layers), snapshot=str(path)),
+    ]:
+        main(
+            writeln=Mock(),
+            import_module=lambda s: module,
+            match_modules=FakeMatchModules(produce),
+            config_loader=StaticConfigLoader(config),
+        )
+
+    module.new_grimp_tree.assert_called_once_with("a")
+    assert walked == [(GraphTree, ["a", "a.x"]), (MmapTree, ["a", "a.x"])]
+
+
+def test_main_snapshot_errors(tmp_path: Path, layers: List[Layer]) -> None:
+    corrupt = tmp_path / "corrupt.snapshot"
+    corrupt.write_bytes(b"garbage")
+    other = tmp_path / "other.snapshot"
+    save_snapshot(GraphTree(["b"], {"b": set()}), ["b"], other)
+
+    for config, message in [
+        (Config(snapshot=str(tmp_path / "missing")), "No such file or directory"),
+        (Config(snapshot=str(corrupt)), "Unable to load import graph."),
+        (Config(snapshot=str(other)), "Module 'a' is not in the import graph."),
+        (
+            Config(write_snapshot=str(tmp_path / "missing" / "graph.snapshot")),
+            "No such file or directory",
+        ),
+    ]:
+        config.modules = {"a"}
+        config.layers = set(layers)
+        module = Mock()
+        module.new_grimp_tree.return_value = GraphTree(["a"], {"a": set()})
+        err: List[str] = []
+
+        with raises(SystemExit) as e:
+            main(
+                writeln=Mock(),
+                import_module=lambda s: module,
+                match_modules=FakeMatchModules(),
+                config_loader=StaticConfigLoader(config),
+                writeln_stderr=err.append,
+            )
+
+        assert e.value.code == 14
+        assert message in err[0]
+
+
+def test_main_files(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    package = tmp_path / "scopedapp"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("import sqlalchemy\nimport scopedapp.b\n")
+    (package / "b.py").write_text("import flask\n")
+    (package / "c.py").write_text("import sqlalchemy\nimport flask\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    layers = {Layer("db", imports={"sqlalchemy"}), Layer("web", imports={"flask"})}
+
+    def run(**kwargs: Any) -> List[str]:
+        out: List[str] = []
+        config = Config(
+            modules={"scopedapp"},
+            layers=layers,
+            tree_factory_module="layer_enforcer.native:new_native_tree",
+            format="jsonl",
+            **kwargs,
+        )
+
+        with raises(SystemExit):
+            main(writeln=out.append, config_loader=StaticConfigLoader(config))
+
+        return [json.loads(line)["module"] for line in out]
+
+    assert run() == ["scopedapp.a", "scopedapp.c", "scopedapp.a"]
+    assert run(files=[str(package / "b.py"), "README.rst"]) == [
+        "scopedapp.a",
+        "scopedapp.a",
+    ]
+
+    main(
+        writeln=Mock(),
+        config_loader=StaticConfigLoader(
+            Config(
+                modules={"scopedapp"},
+                layers=layers,
+                tree_factory_module="layer_enforcer.native:new_native_tree",
+                files=[str(tmp_path / "other.py")],
+            )
+        ),
+    )
+
+
+def test_main_explain(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    package = tmp_path / "explainedapp"
+    (package / "views").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("import explainedapp.b\nimport flask\n")
+    (package / "b.py").write_text("import explainedapp.c\n")
+    (package / "c.py").write_text("import sqlalchemy\n")
+    (package / "d.py").write_text("import explainedapp.views\n")
+    (package / "e.py").write_text("")
+    (package / "views" / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    layers = {
+        Layer("db", imports={"sqlalchemy"}),
+        Layer("web", imports={"flask"}, submodules={"views"}),
+    }
+
+    def run(module: str, **kwargs: Any) -> List[str]:
+        out: List[str] = []
+        main(
+            writeln=out.append,
+            config_loader=StaticConfigLoader(
+                Config(
+                    modules={"explainedapp"},
+                    layers=layers,
+                    tree_factory_module="layer_enforcer.native:new_native_tree",
+                    command="explain",
+                    explain=module,
+                    **kwargs,
+                )
+            ),
+        )
+
+        return out
+
+    assert run("explainedapp.a") == [
+        "explainedapp.a: db",
+        "  explainedapp.a -> explainedapp.b -> explainedapp.c -> sqlalchemy",
+    ]
+    assert run("explainedapp.d") == [
+        "explainedapp.d: web",
+        "  explainedapp.d -> explainedapp.views",
+    ]
+    assert run("explainedapp.views") == [
+        "explainedapp.views: web",
+        "  in views",
+    ]
+    assert run("explainedapp.e") == ["explainedapp.e: no layer"]
+    assert run("explainedapp.d", ignore={"explainedapp.d"}) == [
+        "explainedapp.d: no layer"
+    ]
+
+
+def test_main_layers_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    package = tmp_path / "layercacheapp"
+    package.mkdir()
+    (package / "__init__.py").write_text("import sqlalchemy\n")
+    (tmp_path / "layers.yml").write_text("name: db\nimports: [sqlalchemy]\n")
+    (tmp_path / "pyproject.toml").write_text(
+        "[tool.layer_enforcer]\n"
+        'modules = ["layercacheapp"]\n'
+        'tree_factory = "layer_enforcer.native:new_native_tree"\n'
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "argv", ["layer-enforcer"])
+
+    main(writeln=Mock())
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "layercacheapp",
+        "layers.yml",
+        "pyproject.toml",
+    ]
+
+    monkeypatch.setattr(sys, "argv", ["layer-enforcer", "--cache-dir", "cache"])
+    main(writeln=Mock())
+
+    assert len(list((tmp_path / "cache").glob("*.layers.json"))) == 1
+
+
+def test_main_help(tmp_path: Path) -> None:
+    (tmp_path / "layers.yml").write_text("name: db\nimports: [sqlalchemy]\n")
+    (tmp_path / "pyproject.toml").write_text(
+        "[tool.layer_enforcer]\n"
+        'modules = ["app"]\n'
+        'layers = "layers.yml"\n'
+        'cache_dir = "cache"\n'
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys; from layer_enforcer.cli import main; "
+            "sys.argv = ['layer-enforcer', '--help']; main()",
+        ],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    imported = {
+        line.rpartition("|")[2].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+    assert result.returncode == 0
+    assert "usage:" in result.stdout
+    assert not (tmp_path / "cache").exists()
+    assert imported & {"tomli", "tomllib", "yaml"} == set()
+
+
+def test_main_watch(monkeypatch: MonkeyPatch, layers: List[Layer]) -> None:
+    from layer_enforcer import watch
+
+    watched = []
+    monkeypatch.setattr(
+        watch, "watch", lambda watcher, writeln: watched.append(watcher)
+    )
+
+    main(
+        writeln=Mock(),
+        config_loader=StaticConfigLoader(
+            Config(
+                modules={"a"},
+                layers=set(layers),
+                ignore={"a.x"},
+                watch=True,
+                tree_factory_module=cli.NATIVE_TREE_FACTORY,
+            )
+        ),
+    )
+
+    assert [watcher.modules for watcher in watched] == [("a",)]
+    assert watched[0].layers == set(layers)
+    assert watched[0].ignore is not None
+    assert watched[0].ignore.patterns == {"a.x"}
+
+
+def test_main_watch_config_error() -> None:
+    for config, message in [
+        (Config(), "--watch builds the graph with the builtin scanner"),
+        (Config(snapshot="a.snap"), "--watch can not be used with graph snapshots."),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, cache_dir=".cache"),
+            "--watch can not be used with --cache-dir.",
+        ),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, chains="shortest"),
+            "--watch can not be used with --chains.",
+        ),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, format="jsonl"),
+            "--watch can not be used with --format.",
+        ),
+    ]:
+        err: List[str] = []
+        config.modules = {"a"}
+        config.watch = True
+
+        with raises(SystemExit) as e:
+            main(
+                writeln=Mock(),
+                import_module=lambda s: Mock(),
+                config_loader=StaticConfigLoader(config),
+                writeln_stderr=err.append,
+            )
+
+        assert e.value.code == 12
+        assert message in err[0]
+
+
+def test_main_serve(monkeypatch: MonkeyPatch, layers: List[Layer]) -> None:
+    from layer_enforcer import serve
+
+    served = []
+    monkeypatch.setattr(
+        serve,
+        "run",
+        lambda server, path, writeln: served.append((server, path)),
+    )
+
+    main(
+        writeln=Mock(),
+        config_loader=StaticConfigLoader(
+            Config(
+                modules={"a"},
+                layers=set(layers),
+                command="serve",
+                socket="a.sock",
+                chains="shortest",
+                tree_factory_module=cli.NATIVE_TREE_FACTORY,
+            )
+        ),
+    )
+
+    [(server, path)] = served
+
+    assert path == "a.sock"
+    assert server.watcher.modules == ("a",)
+    assert server.watcher.tree is not None
+    wrapped = server.watcher.wrap_tree(server.watcher.tree)
+
+    assert isinstance(wrapped, BoundedChainsTree)
+    assert wrapped.strategy == "shortest"
+
+
+def test_main_serve_config_error() -> None:
+    for config, message in [
+        (Config(), "serve builds the graph with the builtin scanner"),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, write_snapshot="a"),
+            "serve can not be used with graph snapshots.",
+        ),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, cache_dir=".cache"),
+            "serve can not be used with --cache-dir.",
+        ),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, format="sarif"),
+            "serve can not be used with --format.",
+        ),
+    ]:
+        err: List[str] = []
+        config.modules = {"a"}
+        config.command = "serve"
+
+        with raises(SystemExit) as e:
+            main(
+                writeln=Mock(),
+                import_module=lambda s: Mock(),
+                config_loader=StaticConfigLoader(config),
+                writeln_stderr=err.append,
+            )
+
+        assert e.value.code == 12
+        assert message in err[0]
+
+
+def test_main_changed_from_error() -> None:
+    out: List[str] = []
+
+    with raises(SystemExit) as e:
+        main(
+            writeln=Mock(),
+            import_module=lambda s: Mock(),
+            config_loader=StaticConfigLoader(
+                Config(modules={"a"}, changed_from="refs/heads/no/such/branch")
+            ),
+            writeln_stderr=out.append,
+        )
+
+    assert e.value.code == 11
+    assert "git diff" in out[0]
+
+
+def test_main_incremental_truncated(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    package = tmp_path / "incrementalapp"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("import sqlalchemy\nimport incrementalapp.b\n")
+    (package / "b.py").write_text("import flask\nimport incrementalapp.c\n")
+    (package / "c.py").write_text("import flask\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = Config(
+        modules={"incrementalapp"},
+        layers={Layer("db", imports={"sqlalchemy"}), Layer("web", imports={"flask"})},
+        tree_factory_module=cli.NATIVE_TREE_FACTORY,
+        incremental=True,
+        cache_dir=str(tmp_path / "cache"),
+        chains="shortest",
+    )
+    outputs = []
+
+    for _ in range(2):
+        out: List[str] = []
+
+        with raises(SystemExit):
+            main(writeln=out.append, config_loader=StaticConfigLoader(config))
+
+        outputs.append(out)
+
+    assert "    ... (more chains truncated)" in outputs[0]
+    assert outputs[1] == outputs[0]
+
+
+def test_main_incremental_config_error(tmp_path: Path) -> None:
+    for config, message in [
+        (Config(), "set --tree-factory"),
+        (
+            Config(tree_factory_module=cli.NATIVE_TREE_FACTORY, snapshot="a.snap"),
+            "snapshots",
+        ),
+    ]:
+        out: List[str] = []
+        config.modules = {"a"}
+        config.incremental = True
+        config.cache_dir = str(tmp_path)
+
+        with raises(SystemExit) as e:
+            main(
+                writeln=Mock(),
+                import_module=lambda s: Mock(),
+                config_loader=StaticConfigLoader(config),
+                writeln_stderr=out.append,
+            )
+
+        assert e.value.code == 12
+        assert message in out[0]
+
+
+def test_main_chains_error() -> None:
+    module = Mock()
+    err: List[str] = []
+
+    with raises(SystemExit) as e:
+        main(
+            writeln=Mock(),
+            import_module=lambda s: module,
+            config_loader=StaticConfigLoader(Config(modules={"a"}, chains="longest")),
+            writeln_stderr=err.append,
+        )
+
+    assert e.value.code == 12
+    assert err == ["Unknown chain strategy: 'longest'. Use all, shortest, k-shortest."]
+    module.new_grimp_tree.assert_not_called()
+
+
+def test_main_format_error() -> None:
+    module = Mock()
+
+    def import_module(name: str) -> ModuleType:
+        if name == "missing":
+            raise ModuleNotFoundError("No module named 'missing'")
+
+        return module
+
+    for format_, message in [
+        ("bogus", "Unknown reporter: 'bogus'."),
+        ("missing:Reporter", "Can not load reporter 'missing:Reporter'"),
+    ]:
+        err: List[str] = []
+
+        with raises(SystemExit) as e:
+            main(
+                writeln=Mock(),
+                import_module=import_module,
+                config_loader=StaticConfigLoader(Config(modules={"a"}, format=format_)),
+                writeln_stderr=err.append,
+            )
+
+        assert e.value.code == 12
+        assert message in err[0]
+
+    module.new_grimp_tree.assert_not_called()
+
+
+def test_main_unmatched_patterns() -> None:
+    module = Mock()
+    module.new_grimp_tree.return_value = GraphTree(["a"], {"a": {"sqlalchemy"}})
+    err: List[str] = []
+
+    main(
+        writeln=Mock(),
+        import_module=lambda s: module,
+        config_loader=StaticConfigLoader(
+            Config(
+                modules={"a"},
+                layers={Layer("db", imports={"sqlalchemy", "sqlalchmy.*"})},
+            )
+        ),
+        writeln_stderr=err.append,
+    )
+
+    assert err == [
+        "Warning: Pattern 'sqlalchmy.*' in imports of layer 'db' matches no "
+        "module of the import graph."
+    ]
+
+
+def test_default_config_loader() -> None:
+    assert cli.DEFAULT_CONFIG_LOADER is not cli.DEFAULT_CONFIG_LOADER
+
+    with raises(AttributeError):
+        cli.MISSING  # noqa: B018
+
+
+def test_import_time() -> None:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import layer_enforcer.cli"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {
+        line.rpartition("|")[2].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    heavy = {
+        "argparse",
+        "asyncio",
+        "concurrent.futures",
+        "grimp",
+        "layer_enforcer.cache",
+        "layer_enforcer.impl",
+        "layer_enforcer.incremental",
+        "networkx",
+        "pickle",
+        "tomli",
+        "tomllib",
+        "yaml",
+    }
+
+    assert "layer_enforcer.cli" in imported
+    assert imported & heavy == set()
+
+
+def test_main_timings(tmp_path: Path, layers: List[Layer]) -> None:
+    module = Mock()
+    profile = tmp_path / "run.prof"
+    err: List[str] = []
+
+    def import_module(s: str) -> ModuleType:
+        return module
+
+    def produce(call: Dict[str, Any]) -> Iterable[Conflict]:
+        call["timings"].start("pass 1")
+        return []
+
+    main(
+        writeln=Mock(),
+        import_module=import_module,
+        match_modules=FakeMatchModules(produce),
+        config_loader=StaticConfigLoader(
+            Config(
+                modules={"a"},
+                layers=set(layers),
+                timings=True,
+                profile=str(profile),
+            )
+        ),
+        writeln_stderr=err.append,
+    )
+
+    assert [line.split()[0] for line in err] == [
+        "phase",
+        "config",
+        "graph",
+        "pass",
+        "output",
+        "total",
+    ]
+    assert pstats.Stats(str(profile)).total_calls  # type: ignore[attr-defined]
+
+
+def test_main_max_conflicts(layers: List[Layer]) -> None:
+    a, b, _ = layers
+    out: List[str] = []
+    produced: List[str] = []
+
+    def import_module(s: str) -> ModuleType:
+        return Mock()
+
+    def produce(call: Dict[str, Any]) -> Iterator[Conflict]:
+        for module in ["ignored", "m1", "m2", "m3"]:
+            produced.append(module)
+            yield Conflict(Match(module, a), Match(module, b))
+
+    with raises(SystemExit):
+        main(
+            writeln=out.append,
+            import_module=import_module,
+            match_modules=FakeMatchModules(produce),
+            config_loader=StaticConfigLoader(
+                Config(
+                    modules={"a"},
+                    ignore={"ignored"},
+                    layers=set(layers),
+                    format="jsonl",
+                    max_conflicts=2,
+                )
+            ),
+        )
+
+    assert produced == ["ignored", "m1", "m2"]
+    assert [json.loads(line)["module"] for line in out] == ["m1", "m2"]
@@ -0,0 +1,120 @@
+from typing import Dict, Iterator, List, Set, Tuple
+
+from pytest import fixture, mark
+
+from layer_enforcer.closure import (
+    Closure,
+    find_components,
+    iter_bits,
+    make_mask,
+)
+from layer_enforcer.csr import CSR
+from layer_enforcer.interfaces import Tree
+
+
+class DictTree(Tree):
+    def __init__(self, imports: Dict[str, Set[str]]) -> None:
+        self.imports = imports
+
+    def walk(self) -> Iterator[str]:
+        return iter(self.imports)
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        return iter([])
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        return self.imports.get(module, set())
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        raise NotImplementedError
+
+
+class UpstreamTree(Tree):
+    def __init__(self, closure: Closure) -> None:
+        self.closure = closure
+
+    def walk(self) -> Iterator[str]:
+        return iter(self.closure.modules)
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        return iter([])
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return self.closure.find_upstream_modules(module)
+
+
+@fixture
+def closure() -> Closure:
+    tree = DictTree(
+        {
+            "a": {"b"},
+            "b": {"c"},
+            "c": {"b", "d"},
+            "d": {"ext"},
+            "e": {"e"},
+        }
+    )
+
+    return Closure(tree, ["a", "e"])
+
+
+@mark.parametrize(
+    ["mask", "expected"],
+    [(0, []), (1, [0]), (0b1010, [1, 3]), (1 << 100 | 1, [0, 100])],
+)
+def test_iter_bits(mask: int, expected: List[int]) -> None:
+    assert list(iter_bits(mask)) == expected
+
+
+def test_make_mask() -> None:
+    assert make_mask([0, 3, 9], 10) == 0b1000001001
+
+
+def test_find_components() -> None:
+    imports = CSR.from_lists([[1], [2], [1, 3], [], [4]])
+
+    assert find_components(imports) == [[3], [1, 2], [0], [4]]
+
+
+def test_discovers_reachable(closure: Closure) -> None:
+    assert closure.modules == ["a", "b", "c", "d", "e", "ext"]
+
+
+@mark.parametrize(
+    ["module", "expected"],
+    [
+        ("a", {"b", "c", "d", "ext"}),
+        ("b", {"c", "d", "ext"}),
+        ("c", {"b", "d", "ext"}),
+        ("d", {"ext"}),
+        ("e", set()),
+        ("ext", set()),
+        ("missing", set()),
+    ],
+)
+def test_find_upstream_modules(
+    closure: Closure, module: str, expected: Set[str]
+) -> None:
+    assert closure.find_upstream_modules(module) == expected
+
+
+def test_names(closure: Closure) -> None:
+    mask = make_mask(
+        [closure.ids[module] for module in ["ext", "a", "c"]], len(closure)
+    )
+
+    assert list(closure.names(mask)) == ["a", "c", "ext"]
+
+
+def test_transitive(closure: Closure) -> None:
+    transitive = Closure(UpstreamTree(closure), ["a", "e"])
+
+    assert transitive.transitive
+    assert not closure.transitive
+    assert transitive.modules == closure.modules
+    assert transitive.imports == CSR.from_lists([[]] * len(closure))
+    assert transitive.components == [[4], [5], [3], [1, 2], [0]]
+    assert all(
+        transitive.upstream_mask(module) == closure.upstream_mask(module)
+        for module in closure.modules
+    )
@@ -0,0 +1,35 @@
+import pickle
+
+from layer_enforcer.csr import CSR
+
+
+def test_csr() -> None:
+    csr = CSR.from_lists([[1], [2], [1, 3], [], [4]])
+
+    assert len(csr) == 5
+    assert list(csr[2]) == [1, 3]
+    assert list(csr[3]) == []
+    assert [list(neighbours) for neighbours in csr] == [[1], [2], [1, 3], [], [4]]
+    assert repr(csr) == "CSR.from_lists([[1], [2], [1, 3], [], [4]])"
+
+
+def test_csr_eq() -> None:
+    csr = CSR.from_lists([[1], []])
+
+    assert csr == CSR.from_lists([[1], []])
+    assert csr != CSR.from_lists([[], [0]])
+    assert csr != [[1], []]
+
+
+def test_csr_reverse() -> None:
+    csr = CSR.from_lists([[1], [2], [1, 3], [], [4]])
+
+    assert csr.reverse() == CSR.from_lists([[], [0, 2], [1], [2], [4]])
+    assert csr.reverse().reverse() == csr
+    assert CSR.from_lists([]).reverse() == CSR.from_lists([])
+
+
+def test_csr_pickle() -> None:
+    csr = CSR.from_lists([[1, 2], [], [0]])
+
+    assert pickle.loads(pickle.dumps(csr)) == csr
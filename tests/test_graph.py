@@ -0,0 +1,104 @@
+from io import BytesIO
+
+from pytest import fixture, raises
+
+from layer_enforcer.graph import GraphError, GraphTree, is_descendant
+
+
+@fixture
+def tree() -> GraphTree:
+    return GraphTree(
+        ["app"],
+        {
+            "app": set(),
+            "app.a": {"app.b", "app.c", "ext"},
+            "app.b": {"app.d"},
+            "app.c": {"app.b", "app.d"},
+            "app.d": {"app.c", "ext"},
+        },
+    )
+
+
+def test_is_descendant() -> None:
+    assert is_descendant("app", "app")
+    assert is_descendant("app.x", "app")
+    assert not is_descendant("application", "app")
+
+
+def test_walk(tree: GraphTree) -> None:
+    assert list(tree.walk()) == ["app", "app.a", "app.b", "app.c", "app.d"]
+
+
+def test_find_chains(tree: GraphTree) -> None:
+    assert sorted(tree.find_chains("app.a", "app.d")) == [
+        ("app.a", "app.b", "app.d"),
+        ("app.a", "app.c", "app.b", "app.d"),
+        ("app.a", "app.c", "app.d"),
+    ]
+    assert list(tree.find_chains("app.a", "missing")) == []
+    assert list(tree.find_chains("app.a", "app.a")) == []
+    assert list(tree.find_chains("ext", "app.a")) == []
+
+
+def test_find_upstream_modules(tree: GraphTree) -> None:
+    assert tree.find_upstream_modules("app.b") == {"app.c", "app.d", "ext"}
+    assert tree.find_upstream_modules("ext") == set()
+    assert tree.find_upstream_modules("missing") == set()
+
+
+def test_find_imported_modules(tree: GraphTree) -> None:
+    assert tree.find_imported_modules("app.d") == {"app.c", "ext"}
+    assert tree.find_imported_modules("missing") == set()
+
+
+def test_find_importers(tree: GraphTree) -> None:
+    assert tree.find_importers({"ext", "app.a", "missing"}) == {
+        "ext": {"app.a", "app.b", "app.c", "app.d"},
+        "app.a": set(),
+        "missing": set(),
+    }
+
+
+def test_from_tree(tree: GraphTree) -> None:
+    copy = GraphTree.from_tree(tree, ["app"])
+
+    assert copy.modules == tree.modules
+    assert copy.imports == tree.imports
+
+
+def test_dump_load(tree: GraphTree) -> None:
+    f = BytesIO()
+    tree.dump(f)
+    f.seek(0)
+
+    loaded = GraphTree.load(f)
+
+    assert loaded.roots == tree.roots
+    assert loaded.modules == tree.modules
+    assert loaded.imports == tree.imports
+    assert loaded.find_upstream_modules("app.b") == {"app.c", "app.d", "ext"}
+
+
+def test_load_corrupt() -> None:
+    with raises(GraphError):
+        GraphTree.load(BytesIO(b"garbage"))
+
+
+def test_load_version(tree: GraphTree) -> None:
+    f = BytesIO()
+    tree.dump(f)
+    data = bytearray(f.getvalue())
+    data[8:12] = (0).to_bytes(4, "little")
+
+    with raises(GraphError, match="version: 0"):
+        GraphTree.load(BytesIO(bytes(data)))
+
+
+def test_load_invalid_targets(tree: GraphTree) -> None:
+    f = BytesIO()
+    tree.dump(f)
+    data = bytearray(f.getvalue())
+    data[-4:] = (len(tree.modules)).to_bytes(4, "little")
+
+    with raises(GraphError):
+        GraphTree.load(BytesIO(bytes(data)))
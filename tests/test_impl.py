@@ -1,9 +1,24 @@
-from typing import Iterator, List, NamedTuple, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
 
-from pytest import fixture, mark
+from pytest import fixture, mark, warns
 
-from layer_enforcer.impl import match_layer, match_modules
-from layer_enforcer.interfaces import Layer, Tree
+from layer_enforcer.closure import Closure
+from layer_enforcer.graph import GraphTree
+from layer_enforcer.impl import (
+    Enforcer,
+    find_layer,
+    infer_layers,
+    match_layer,
+    match_modules,
+)
+from layer_enforcer.interfaces import (
+    Conflict,
+    Layer,
+    Tree,
+    UnmatchedPatternWarning,
+)
+from layer_enforcer.matchers import IgnoreMatcher
+from layer_enforcer.timings import Timings
 
 
 @fixture
@@ -24,28 +39,41 @@ class FakeTree(Tree):
             for import_ in import_chain
             if import_ == prefix or import_.startswith(f"{prefix}.")
         }
-        self.chains = {
-            (import_chain[i], import_chain[j]): import_chain[i : j + 1]
-            for import_chain in import_chains
-            for i in range(len(import_chain))
-            for j in range(i + 1, len(import_chain))
-        }
+        self.imports: Dict[str, Set[str]] = {}
+
+        for import_chain in import_chains:
+            for importer, imported in zip(import_chain, import_chain[1:]):
+                self.imports.setdefault(importer, set()).add(imported)
 
     def walk(self) -> Iterator[str]:
         return iter(sorted(self.modules))
 
     def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
-        try:
-            yield self.chains[importer, imported]
-        except KeyError:
-            pass
+        pending = [(importer,)]
+
+        while pending:
+            chain = pending.pop()
+
+            for module in sorted(self.imports.get(chain[-1], ()), reverse=True):
+                if module == imported:
+                    yield chain + (module,)
+                elif module not in chain:
+                    pending.append(chain + (module,))
+
+    def find_imported_modules(self, module: str) -> Set[str]:
+        return set(self.imports.get(module, ()))
 
     def find_upstream_modules(self, module: str) -> Set[str]:
         modules: Set[str] = set()
+        pending = [module]
 
-        for chain in self.chains:
-            if chain[0] == module:
-                modules.update(chain[1:])
+        while pending:
+            for imported in self.imports.get(pending.pop(), ()):
+                if imported not in modules:
+                    modules.add(imported)
+                    pending.append(imported)
+
+        modules.discard(module)
 
         return modules
 
@@ -71,6 +99,114 @@ def test_match_layer_submodule() -> None:
     assert match_layer(tree, layer, "nested.test.xxx")
 
 
+def test_match_modules_lazy_chains(layers: Set[Layer]) -> None:
+    calls: List[Tuple[str, str]] = []
+
+    class CountingTree(FakeTree):
+        def find_chains(
+            self, importer: str, imported: str
+        ) -> Iterator[Tuple[str, ...]]:
+            calls.append((importer, imported))
+            return super().find_chains(importer, imported)
+
+    tree = CountingTree([("t.x", "w"), ("t.x", "d"), ("t.y", "t.z")])
+
+    conflicts = list(match_modules(tree, layers))
+
+    assert calls == []
+    assert conflicts[0].dupe.chains == [("t.x", "w")]
+    assert conflicts[0].dupe.chains == [("t.x", "w")]
+    assert calls == [("t.x", "w")]
+
+
+def test_match_layer_precomputed_submodules() -> None:
+    tree = FakeTree([])
+    layer = Layer("test", None, set(), {"test"})
+
+    assert match_layer(tree, layer, "nested.test.xxx", {"test"}).submodules == {"test"}
+    assert not match_layer(tree, layer, "nested.test.xxx", set())
+
+
+def test_infer_layers_chain() -> None:
+    tree = FakeTree([("t.c", "t.b", "t.a"), ("t.c", "t.x")])
+    closure = Closure(tree, tree.walk())
+    layer_ids = [-1, -1, -1, 1]  # t.a, t.b, t.c, t.x
+
+    deciders = infer_layers(closure, layer_ids, {0, 1, 2, 3})
+
+    assert layer_ids == [-1, -1, 1, 1]
+    assert deciders == {2: 3}
+
+
+def test_infer_layers_first_match() -> None:
+    tree = FakeTree([("t.c", "t.b", "t.a"), ("t.c", "t.x")])
+    closure = Closure(tree, tree.walk())
+    layer_ids = [2, -1, -1, 1]  # t.a, t.b, t.c, t.x
+
+    deciders = infer_layers(closure, layer_ids, {0, 1, 2, 3})
+
+    assert layer_ids == [2, 2, 1, 1]
+    assert deciders == {1: 0, 2: 3}
+
+
+def test_infer_layers_cycle() -> None:
+    tree = FakeTree([("t.a", "t.b", "t.a"), ("t.b", "t.z"), ("t.c", "t.a")])
+    closure = Closure(tree, tree.walk())
+    layer_ids = [-1, -1, -1, 0]  # t.a, t.b, t.c, t.z
+
+    deciders = infer_layers(closure, layer_ids, {0, 1, 2})
+
+    assert layer_ids == [0, 0, 0, 0]
+    assert deciders == {0: 1, 1: 0, 2: 0}
+
+
+def test_infer_layers_not_inferable() -> None:
+    tree = FakeTree([("t.a", "t.b")])
+    closure = Closure(tree, tree.walk())
+    layer_ids = [-1, 0]
+
+    assert infer_layers(closure, layer_ids, set()) == {}
+    assert layer_ids == [-1, 0]
+
+
+class UpstreamTree(Tree):
+    def __init__(self, tree: Tree) -> None:
+        self.tree = tree
+
+    def walk(self) -> Iterator[str]:
+        return self.tree.walk()
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        return self.tree.find_chains(importer, imported)
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return self.tree.find_upstream_modules(module)
+
+
+@mark.parametrize(
+    ["import_chains", "layer_ids"],
+    [
+        ([("t.c", "t.b", "t.a"), ("t.c", "t.x")], [2, -1, -1, 1]),
+        ([("t.a", "t.b", "t.a"), ("t.b", "t.z"), ("t.c", "t.a")], [-1, -1, -1, 0]),
+        ([("t.d", "t.c", "t.b", "t.c"), ("t.b", "t.a")], [1, -1, -1, -1]),
+    ],
+)
+def test_infer_layers_transitive(
+    import_chains: List[Tuple[str, ...]], layer_ids: List[int]
+) -> None:
+    tree = FakeTree(import_chains)
+    closure = Closure(tree, tree.walk())
+    transitive = Closure(UpstreamTree(tree), tree.walk())
+    transitive_layer_ids = list(layer_ids)
+    inferable = set(range(len(layer_ids)))
+
+    assert transitive.transitive
+    assert infer_layers(transitive, transitive_layer_ids, inferable) == infer_layers(
+        closure, layer_ids, inferable
+    )
+    assert transitive_layer_ids == layer_ids
+
+
 class Result(NamedTuple):
     module: str
     layer: str
@@ -105,6 +241,10 @@ class Pair(NamedTuple):
                     Result("t.a", "db", [("t.a", "t.b", "t._d")]),
                     Result("t.a", "web", [("t.a", "t._w")]),
                 ),
+                Pair(
+                    Result("t._r", "root", []),
+                    Result("t._r", "db", [("t._r", "t.b", "t._d")]),
+                ),
                 Pair(
                     Result("t._r", "root", []),
                     Result("t._r", "db", [("t._r", "t.b")]),
@@ -127,3 +267,221 @@ def test_match_modules(
         for c in match_modules(tree, layers)
     ]
     assert result == expected
+
+
+@mark.parametrize(
+    "modules",
+    [{"t.a"}, {"t._r"}, {"t.b", "t.a"}, {"t._w"}, set()],
+)
+def test_match_modules_scoped(modules: Set[str], layers: Set[Layer]) -> None:
+    tree = FakeTree(
+        [
+            ("t.a", "t._w"),
+            ("t.a", "t.b", "t._d"),
+            ("t._r", "t.b"),
+            ("t._w", "w", "d"),
+        ]
+    )
+
+    def describe(conflicts: Iterable[Conflict]) -> List[Pair]:
+        return [
+            Pair(
+                Result(c.main.module, c.main.layer.name, c.main.chains),
+                Result(c.dupe.module, c.dupe.layer.name, c.dupe.chains),
+            )
+            for c in conflicts
+        ]
+
+    expected = [
+        pair
+        for pair in describe(match_modules(tree, layers))
+        if pair.a.module in modules
+    ]
+
+    assert describe(match_modules(tree, layers, modules=modules)) == expected
+
+
+def test_match_modules_timings(layers: Set[Layer]) -> None:
+    tree = FakeTree([("t.a", "t._w"), ("t.a", "t.b", "t._d")])
+    timings = Timings()
+
+    list(match_modules(tree, layers, timings=timings))
+
+    assert [phase.name for phase in timings.phases] == [
+        "closure",
+        "pass 1",
+        "pass 2",
+    ]
+
+
+def test_match_modules_ignore(layers: Set[Layer]) -> None:
+    tree = FakeTree(
+        [
+            ("t._r", "t.c", "t._s_pb2", "t._d"),
+            ("t._w", "t._s_pb2"),
+        ]
+    )
+    ignore = IgnoreMatcher(["*_pb2"])
+
+    conflicts = [
+        (c.main.module, c.main.layer.name, c.dupe.layer.name, c.dupe.imports)
+        for c in match_modules(tree, layers, ignore=ignore)
+    ]
+
+    assert conflicts == [
+        ("t._w", "web", "db", ["t._d"]),
+        ("t._r", "root", "db", ["t._d"]),
+        ("t._r", "root", "db", ["t.c"]),
+    ]
+    assert "t._s_pb2" in {
+        c.dupe.imports[0] for c in match_modules(tree, layers) if c.dupe.imports
+    }
+
+
+def test_match_modules_unmatched_patterns() -> None:
+    tree = GraphTree(["app"], {"app.a": {"sqlalchemy"}})
+    db = Layer("db", imports={"sqlalchemy", "psycopg2", "sqlalchmy*"})
+
+    with warns(UnmatchedPatternWarning) as record:
+        assert list(match_modules(tree, {db})) == []
+
+    assert [str(warning.message) for warning in record] == [
+        "Pattern 'sqlalchmy*' in imports of layer 'db' matches no module of the "
+        "import graph."
+    ]
+
+
+def test_match_modules_import_patterns() -> None:
+    cloud = Layer("cloud", imports={"boto*", "google.cloud.*"})
+    web = Layer("web", cloud, imports={"requests"})
+    tree = FakeTree(
+        [
+            ("t.a", "boto3"),
+            ("t.a", "requests"),
+            ("t.b", "google.cloud.storage"),
+            ("t.b", "google.auth"),
+            ("t.c", "t.a", "botocore"),
+        ]
+    )
+
+    conflicts = [
+        (c.main.module, c.main.layer.name, c.main.imports, c.dupe.imports)
+        for c in match_modules(tree, {cloud, web})
+    ]
+
+    assert conflicts == [
+        ("t.a", "cloud", ["boto3", "botocore"], ["requests"]),
+        ("t.c", "cloud", ["boto3", "botocore"], ["requests"]),
+    ]
+
+
+def test_find_layer(layers: Set[Layer]) -> None:
+    tree = FakeTree(
+        [
+            ("t.a", "t._w"),
+            ("t.a", "t.b", "t._d"),
+            ("t._r", "t.b"),
+            ("t.c", "t.a"),
+            ("t.e", "x"),
+            ("t.f", "t._r"),
+        ]
+    )
+
+    def layer_of(module: str) -> Tuple[str, List[str]]:
+        match = find_layer(tree, layers, module)
+        assert match is not None
+        return match.layer.name, match.imports
+
+    assert layer_of("t.a") == ("db", ["t._d"])
+    assert layer_of("t.b") == ("db", ["t._d"])
+    assert layer_of("t.c") == ("db", ["t._d"])
+    assert layer_of("t._r") == ("root", [])
+    assert layer_of("t.f") == ("root", ["t._r"])
+    assert find_layer(tree, layers, "t.e") is None
+    assert find_layer(tree, layers, "t.missing") is None
+    assert find_layer(tree, layers, "t.f", ignore=IgnoreMatcher(["t.f"])) is None
+
+
+ENFORCER_CHAINS = [
+    ("t.a", "t._w"),
+    ("t.a", "t.b", "t._d"),
+    ("t._r", "t.b"),
+    ("t._w", "w", "d"),
+    ("t.f", "t._r"),
+]
+
+
+@fixture
+def enforcer_tree() -> FakeTree:
+    return FakeTree(ENFORCER_CHAINS)
+
+
+def describe_conflicts(conflicts: Iterable[Conflict]) -> List[Pair]:
+    return [
+        Pair(
+            Result(c.main.module, c.main.layer.name, c.main.chains),
+            Result(c.dupe.module, c.dupe.layer.name, c.dupe.chains),
+        )
+        for c in conflicts
+    ]
+
+
+def test_enforcer_check(enforcer_tree: FakeTree, layers: Set[Layer]) -> None:
+    calls: List[Tuple[str, str]] = []
+
+    class CountingTree(FakeTree):
+        def find_chains(
+            self, importer: str, imported: str
+        ) -> Iterator[Tuple[str, ...]]:
+            calls.append((importer, imported))
+            return super().find_chains(importer, imported)
+
+    enforcer = Enforcer(CountingTree(ENFORCER_CHAINS), layers)
+    expected = describe_conflicts(match_modules(enforcer_tree, layers))
+
+    assert describe_conflicts(enforcer.check()) == expected
+
+    chain_calls = len(calls)
+
+    assert describe_conflicts(enforcer.check()) == expected
+    assert len(calls) == chain_calls == len(set(calls))
+
+
+@mark.parametrize("modules", [{"t.a"}, {"t._r", "t.f"}, set()])
+def test_enforcer_check_modules(
+    enforcer_tree: FakeTree, layers: Set[Layer], modules: Set[str]
+) -> None:
+    expected = [
+        pair
+        for pair in describe_conflicts(match_modules(enforcer_tree, layers))
+        if pair.a.module in modules
+    ]
+    scoped = Enforcer(enforcer_tree, layers)
+    assigned = Enforcer(enforcer_tree, layers)
+    assigned.layer_of("t.a")
+    checked = Enforcer(enforcer_tree, layers)
+    list(checked.check())
+
+    for enforcer in [scoped, assigned, checked]:
+        assert describe_conflicts(enforcer.check_modules(modules)) == expected
+
+
+def test_enforcer_layer_of(enforcer_tree: FakeTree, layers: Set[Layer]) -> None:
+    enforcer = Enforcer(enforcer_tree, layers, ignore=IgnoreMatcher(["t.a"]))
+
+    for module in ["t.b", "t._r", "t.f", "t._w"]:
+        match = enforcer.explain(module)
+        expected = find_layer(enforcer_tree, layers, module)
+
+        assert match is not None and expected is not None
+        assert (match.layer, match.chains) == (expected.layer, expected.chains)
+
+    layer = enforcer.layer_of("t.f")
+
+    assert layer is not None and layer.name == "root"
+    assert enforcer.layer_of("t.a") is None
+    assert enforcer.layer_of("w") is None
+    assert enforcer.layer_of("t.missing") is None
+    assert describe_conflicts(enforcer.check()) == describe_conflicts(
+        match_modules(enforcer_tree, layers, ignore=IgnoreMatcher(["t.a"]))
+    )
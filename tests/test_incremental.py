@@ -0,0 +1,218 @@
+import json
+from pathlib import Path
+from typing import Any, Collection, Iterable, List, Optional, Set, Tuple
+
+from pytest import fixture
+
+from layer_enforcer.chains import SHORTEST, BoundedChainsTree
+from layer_enforcer.impl import match_modules
+from layer_enforcer.incremental import ImportStore, IncrementalAnalysis, layers_key
+from layer_enforcer.interfaces import Conflict, Layer, Tree
+from layer_enforcer.matchers import IgnoreMatcher
+from layer_enforcer.scanner import SourceFile
+from layer_enforcer.timings import Timings
+
+
+@fixture
+def layers() -> Set[Layer]:
+    domain = Layer("domain", submodules={"domain"})
+    db = Layer("db", domain, imports={"sqlalchemy"})
+    web = Layer("web", domain, imports={"fastapi"})
+
+    return {domain, db, web}
+
+
+@fixture
+def package(tmp_path: Path) -> Path:
+    root = tmp_path / "app"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "domain.py").write_text("")
+    (root / "db.py").write_text("import sqlalchemy\n")
+    (root / "web.py").write_text("import fastapi\n")
+    (root / "views.py").write_text("from app import web\n")
+
+    return root
+
+
+class RecordingMatchModules:
+    calls: List[Optional[List[str]]]
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __call__(
+        self,
+        tree: Tree,
+        layers: Collection[Layer],
+        *,
+        modules: Optional[Collection[str]] = None,
+        timings: Optional[Timings] = None,
+        ignore: Optional[IgnoreMatcher] = None,
+    ) -> Iterable[Conflict]:
+        self.calls.append(None if modules is None else sorted(modules))
+        return match_modules(
+            tree, layers, modules=modules, timings=timings, ignore=ignore
+        )
+
+
+def describe(conflicts: List[Conflict]) -> List[Tuple[Any, ...]]:
+    return [
+        (c.main.module, c.main.layer.name, c.dupe.layer.name, c.dupe.chains)
+        for c in conflicts
+    ]
+
+
+def test_layers_key(layers: Set[Layer]) -> None:
+    assert layers_key(layers) == layers_key(set(layers))
+    assert layers_key(layers) != layers_key({Layer("domain")})
+
+
+def test_import_store(tmp_path: Path) -> None:
+    store = ImportStore(tmp_path)
+    path = tmp_path / "x.py"
+    path.write_text("import os")
+    source_file = SourceFile("x", path, False)
+    key = store.key(b"import os", source_file)
+
+    assert store.get(key) is None
+    assert store.scan(source_file) == ["os"]
+    assert store.get(key) == ["os"]
+
+    store.put(key, "garbage")  # type: ignore[arg-type]
+
+    assert store.get(key) is None
+
+
+def test_check(tmp_path: Path, package: Path, layers: Set[Layer]) -> None:
+    recording = RecordingMatchModules()
+    analysis = IncrementalAnalysis(
+        tmp_path / "cache",
+        find_sources=lambda module: [package],
+        match_modules=recording,
+    )
+
+    assert list(analysis.check(["app"], layers)) == []
+    assert recording.calls == [["app", "app.db", "app.domain", "app.views", "app.web"]]
+
+    (package / "domain.py").write_text("from app import views\n")
+    conflicts = list(analysis.check(["app"], layers))
+
+    assert describe(conflicts) == [
+        (
+            "app.domain",
+            "domain",
+            "web",
+            [("app.domain", "app.views", "app.web", "fastapi")],
+        ),
+        ("app.domain", "domain", "web", [("app.domain", "app.views")]),
+        ("app.domain", "domain", "web", [("app.domain", "app.views", "app.web")]),
+    ]
+    assert recording.calls[1] == ["app.domain"]
+
+    (package / "db.py").write_text("import sqlalchemy\nx = 1\n")
+    assert describe(list(analysis.check(["app"], layers))) == describe(conflicts)
+    assert recording.calls[2] == ["app.domain"]
+
+    assert describe(list(analysis.check(["app"], set(layers) - {Layer("db")}))) == (
+        describe(conflicts)
+    )
+    assert recording.calls[3] == [
+        "app",
+        "app.db",
+        "app.domain",
+        "app.views",
+        "app.web",
+    ]
+
+
+def test_check_stop_early(tmp_path: Path, package: Path, layers: Set[Layer]) -> None:
+    recording = RecordingMatchModules()
+    analysis = IncrementalAnalysis(
+        tmp_path / "cache",
+        find_sources=lambda module: [package],
+        match_modules=recording,
+    )
+    (package / "domain.py").write_text("from app import views\n")
+
+    assert next(analysis.check(["app"], layers)).main.module == "app.domain"
+    assert not analysis.state_path.exists()
+
+    conflicts = list(analysis.check(["app"], layers))
+
+    assert len(conflicts) == 3
+    assert describe(list(analysis.check(["app"], layers))) == describe(conflicts)
+    assert recording.calls[2:] == [["app.domain"]]
+
+
+def test_check_full_run_order(
+    tmp_path: Path, package: Path, layers: Set[Layer]
+) -> None:
+    analysis = IncrementalAnalysis(
+        tmp_path / "cache", find_sources=lambda module: [package]
+    )
+    (package / "db.py").write_text("import sqlalchemy\nfrom app import web\n")
+    (package / "domain.py").write_text("from app import views\n")
+    list(analysis.check(["app"], layers))
+    (package / "domain.py").write_text("import os\nfrom app import views\n")
+    full = IncrementalAnalysis(tmp_path / "full", find_sources=lambda module: [package])
+    expected = describe(list(full.check(["app"], layers)))
+
+    assert [module for module, *_ in expected] == [
+        "app.db",
+        "app.domain",
+        "app.db",
+        "app.domain",
+        "app.domain",
+    ]
+    assert describe(list(analysis.check(["app"], layers))) == expected
+
+
+def test_check_truncated(tmp_path: Path, package: Path, layers: Set[Layer]) -> None:
+    def analyze() -> Tuple[List[Conflict], Set[Tuple[str, str]]]:
+        truncated: Set[Tuple[str, str]] = set()
+
+        def wrap_tree(tree: Tree) -> Tree:
+            bounded = BoundedChainsTree(tree, SHORTEST)
+            bounded.truncated = truncated
+
+            return bounded
+
+        analysis = IncrementalAnalysis(
+            tmp_path / "cache",
+            find_sources=lambda module: [package],
+            wrap_tree=wrap_tree,
+            truncated=truncated,
+        )
+
+        return list(analysis.check(["app"], layers)), truncated
+
+    (package / "domain.py").write_text("from app import views, web\n")
+    conflicts, truncated = analyze()
+
+    assert ("app.domain", "app.web") in truncated
+    assert analyze() == (conflicts, truncated)
+
+
+def test_load_state(tmp_path: Path, package: Path, layers: Set[Layer]) -> None:
+    analysis = IncrementalAnalysis(
+        tmp_path / "cache", find_sources=lambda module: [package]
+    )
+    (package / "domain.py").write_text("from app import views\n")
+    list(analysis.check(["app"], layers))
+    key = analysis.key(["app"], layers)
+    state = json.loads(analysis.state_path.read_text())
+
+    assert state["key"] == key
+    assert state["imports"]["app.views"] == ["app.web"]
+    assert analysis.load_state(key) is not None
+    assert analysis.load_state("other") is None
+
+    state["conflicts"]["app.domain"][0][2] = [[1]]
+    analysis.state_path.write_text(json.dumps(state))
+
+    assert analysis.load_state(key) is None
+
+    analysis.state_path.write_bytes(b"\x80garbage")
+
+    assert analysis.load_state(key) is None
@@ -0,0 +1,72 @@
+from pytest import fixture
+
+from layer_enforcer.closure import Closure
+from layer_enforcer.graph import GraphTree
+from layer_enforcer.index import ImportIndex, LayerIndex
+from layer_enforcer.interfaces import Layer
+
+
+@fixture
+def index(db: Layer, web: Layer, tasks: Layer) -> LayerIndex:
+    return LayerIndex({db, web, tasks})
+
+
+def test_includes_parents(index: LayerIndex, domain: Layer, service: Layer) -> None:
+    assert domain in index
+    assert service in index
+    assert len(index) == 6
+
+
+def test_ids_ordered(index: LayerIndex) -> None:
+    assert [layer.name for layer in index.layers] == [
+        "domain",
+        "service",
+        "infrastructure",
+        "db",
+        "tasks",
+        "web",
+    ]
+
+
+def test_depths(index: LayerIndex) -> None:
+    assert index.depths == (1, 2, 3, 4, 4, 4)
+
+
+def test_masks(
+    index: LayerIndex, db: Layer, infrastructure: Layer, service: Layer, domain: Layer
+) -> None:
+    assert index.mask(db) == 0b1111
+    assert index.mask(infrastructure) == 0b111
+    assert index.mask(domain) == 0b1
+
+
+def test_import_index() -> None:
+    tree = GraphTree(
+        ["app"],
+        {"app.a": {"boto3", "google.cloud.storage"}, "app.b": {"requests"}},
+    )
+    cloud = Layer("cloud", imports={"boto*", "google.cloud.*"})
+    web = Layer("web", cloud, imports={"requests", "flask"})
+    index = LayerIndex({cloud, web})
+    closure = Closure(tree, tree.walk())
+    imports = ImportIndex(index, closure)
+
+    assert list(closure.names(imports.masks[index.ids[cloud]])) == [
+        "boto3",
+        "google.cloud.storage",
+    ]
+    assert list(closure.names(imports.masks[index.ids[web]])) == ["requests"]
+
+
+def test_import_index_unmatched() -> None:
+    tree = GraphTree(["app"], {"app.a": {"boto3"}, "app.b": {"requests"}})
+    cloud = Layer("cloud", imports={"boto*", "*3", "google.cloud.*", "azure*"})
+    web = Layer("web", cloud, imports={"requests", "flask", "flask.*"})
+    index = LayerIndex({cloud, web})
+    imports = ImportIndex(index, Closure(tree, tree.walk()))
+
+    assert imports.unmatched == [
+        (cloud, "azure*"),
+        (cloud, "google.cloud.*"),
+        (web, "flask.*"),
+    ]
@@ -1,8 +1,8 @@
-from typing import List, Set, Tuple
+from typing import Iterator, List, Set, Tuple
 
 from pytest import mark
 
-from layer_enforcer.interfaces import Layer, Match
+from layer_enforcer.interfaces import Conflict, Layer, Match, Tree
 
 
 def test_layer_repr() -> None:
@@ -22,3 +22,91 @@ def test_match_bool(
     chains: List[Tuple[str, ...]], submodules: Set[str], expected: bool, domain: Layer
 ) -> None:
     assert bool(Match("test", domain, chains, submodules)) == expected
+
+
+class StaticTree(Tree):
+    def walk(self) -> Iterator[str]:
+        return iter(["a", "b", "c"])
+
+    def find_chains(self, importer: str, imported: str) -> Iterator[Tuple[str, ...]]:
+        return iter([])
+
+    def find_upstream_modules(self, module: str) -> Set[str]:
+        return {"a": {"b", "x"}, "b": {"x"}}.get(module, set())
+
+
+def test_tree_find_importers() -> None:
+    assert StaticTree().find_importers({"x", "b", "y"}) == {
+        "x": {"a", "b"},
+        "b": {"a"},
+        "y": set(),
+    }
+
+
+def test_tree_has_direct_imports() -> None:
+    class DirectTree(StaticTree):
+        def find_imported_modules(self, module: str) -> Set[str]:
+            return {"a": {"b"}, "b": {"x"}}.get(module, set())
+
+    assert not StaticTree().has_direct_imports()
+    assert DirectTree().has_direct_imports()
+
+
+def test_match_lazy_chains(domain: Layer) -> None:
+    class ChainsTree(StaticTree):
+        def find_chains(
+            self, importer: str, imported: str
+        ) -> Iterator[Tuple[str, ...]]:
+            calls.append(imported)
+            yield importer, imported
+
+    calls: List[str] = []
+    match = Match("a", domain, imports=["x", "y"], tree=ChainsTree())
+
+    assert match
+    assert calls == []
+    assert match.chains == [("a", "x"), ("a", "y")]
+    assert match.chains == [("a", "x"), ("a", "y")]
+    assert calls == ["x", "y"]
+
+
+def test_match_eq_repr(domain: Layer) -> None:
+    match = Match("a", domain, [("a", "b")], {"c"})
+
+    assert match == Match("a", domain, [("a", "b")], {"c"})
+    assert match != Match("a", domain)
+    assert match != "a"
+    assert repr(match) == (
+        "Match(module='a', layer='domain', chains=[('a', 'b')], submodules={'c'})"
+    )
+
+
+def test_match_submodules_default(domain: Layer) -> None:
+    match = Match("a", domain)
+    match.submodules.add("b")  # type: ignore[attr-defined]
+
+    assert match.submodules == {"b"}
+    assert Match("a", domain).submodules == set()
+
+
+def test_match_interned(domain: Layer) -> None:
+    names = ["a", "b", "c"]
+    match = Match.interned(names, 2, domain, (0, 1))
+
+    assert match
+    assert match.module == "c"
+    assert match.imports == ["a", "b"]
+    assert match.submodules == set()
+    assert match == Match("c", domain, imports=["a", "b"])
+    assert not Match.interned(names, 0, domain)
+
+
+def test_conflict_eq_repr(domain: Layer) -> None:
+    conflict = Conflict(Match("a", domain), Match("a", domain, [("a", "b")]))
+
+    assert conflict == Conflict(
+        main=Match("a", domain), dupe=Match("a", domain, [("a", "b")])
+    )
+    assert conflict != Conflict(Match("a", domain), Match("a", domain))
+    assert conflict != "a"
+    assert repr(conflict) == f"Conflict(main={conflict.main!r}, dupe={conflict.dupe!r})"
@@ -0,0 +1,107 @@
+from pytest import mark
+
+from layer_enforcer.interfaces import Layer
+from layer_enforcer.matchers import IgnoreMatcher, PatternMatcher, SubmoduleMatcher
+from layer_enforcer.utils import match_submodule
+
+
+@mark.parametrize(
+    "module",
+    [
+        "test",
+        "xxx.test",
+        "xxx.test.yyy",
+        "test.yyy",
+        "tset",
+        "xxx.tset.yyy",
+        "testing",
+        "a.b",
+        "x.a.b.y",
+        "x.a.y.b",
+        "a",
+    ],
+)
+def test_submodule_matcher_same_as_match_submodule(module: str) -> None:
+    layer_x = Layer("x", submodules={"test", "a.b"})
+    layer_y = Layer("y", submodules={"b", "yyy"})
+    matcher = SubmoduleMatcher([layer_x, layer_y])
+    expected = {
+        layer: {
+            submodule
+            for submodule in layer.submodules
+            if match_submodule(module, submodule)
+        }
+        for layer in (layer_x, layer_y)
+    }
+
+    matches = matcher.match(module)
+
+    assert {layer: matches.get(layer, set()) for layer in expected} == expected
+
+
+def test_submodule_matcher_shared_submodule() -> None:
+    layer_x = Layer("x", submodules={"models"})
+    layer_y = Layer("y", submodules={"models", "views"})
+    matcher = SubmoduleMatcher([layer_x, layer_y])
+
+    assert matcher.match("app.models.user") == {
+        layer_x: {"models"},
+        layer_y: {"models"},
+    }
+
+
+def test_submodule_matcher_empty() -> None:
+    assert SubmoduleMatcher([]).match("a.b.c") == {}
+
+
+@mark.parametrize(
+    ["module", "expected"],
+    [
+        ("app.containers", True),
+        ("app.containers.sub", False),
+        ("app.generated", False),
+        ("app.generated.a", True),
+        ("app.generated.a.b", True),
+        ("app.generated_x", False),
+        ("app.proto.user_pb2", True),
+        ("user_pb2", True),
+        ("app.proto.user_pb2_grpc", False),
+        ("app.v1.migrations.0001", True),
+        ("app.migrations", False),
+        ("app.x", False),
+    ],
+)
+def test_ignore_matcher(module: str, expected: bool) -> None:
+    matcher = IgnoreMatcher(
+        ["app.containers", "app.generated.*", "*_pb2", "app.*.migrations.*"]
+    )
+
+    assert matcher.match(module) is expected
+
+
+def test_ignore_matcher_empty() -> None:
+    matcher = IgnoreMatcher([])
+
+    assert not matcher
+    assert not matcher.match("app")
+    assert IgnoreMatcher(["app"])
+
+
+def test_pattern_matcher_select() -> None:
+    modules = sorted(
+        ["app", "app-x", "app.a", "app.a.b", "boto", "boto3", "botocore", "x_pb2"]
+    )
+    matcher = PatternMatcher(["app.*", "boto*", "x_pb2", "missing", "zzz.*"])
+
+    assert [modules[i] for i in sorted(matcher.select(modules))] == [
+        "app.a",
+        "app.a.b",
+        "boto",
+        "boto3",
+        "botocore",
+        "x_pb2",
+    ]
+    assert matcher.select([]) == set()
+    assert {
+        i for i, module in enumerate(modules) if matcher.match(module)
+    } == matcher.select(modules)
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from layer_enforcer.native import new_native_tree
+
+
+def test_new_native_tree(tmp_path: Path) -> None:
+    root = tmp_path / "app"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "domain.py").write_text("import sqlalchemy.orm\n")
+    (root / "service.py").write_text("from app import domain\n")
+    (root / "api.py").write_text("from .service import run\n")
+
+    tree = new_native_tree("app", find_sources=lambda module: [root])
+
+    assert list(tree.walk()) == ["app", "app.api", "app.domain", "app.service"]
+    assert tree.find_upstream_modules("app.api") == {
+        "app.service",
+        "app.domain",
+        "sqlalchemy",
+    }
+    assert list(tree.find_chains("app.api", "sqlalchemy")) == [
+        ("app.api", "app.service", "app.domain", "sqlalchemy")
+    ]
+
+
+def test_new_native_tree_jobs(tmp_path: Path) -> None:
+    root = tmp_path / "app"
+    root.mkdir()
+    (root / "__init__.py").write_text("from . import a, b\n")
+    (root / "a.py").write_text("from app import b\nimport os\n")
+    (root / "b.py").write_text("import sys\n")
+
+    serial = new_native_tree("app", find_sources=lambda module: [root])
+    parallel = new_native_tree("app", find_sources=lambda module: [root], jobs=2)
+
+    assert parallel.modules == serial.modules
+    assert parallel.imports == serial.imports
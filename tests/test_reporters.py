@@ -0,0 +1,114 @@
+import json
+from types import ModuleType
+from typing import List
+from unittest.mock import Mock
+
+from pytest import fixture, raises
+
+from layer_enforcer import __version__
+from layer_enforcer.interfaces import Conflict, Layer, Match
+from layer_enforcer.reporters import (
+    REPORTERS,
+    JsonLinesReporter,
+    SarifReporter,
+    TextReporter,
+    load_reporter,
+)
+
+
+@fixture
+def conflict() -> Conflict:
+    a = Layer("a")
+    b = Layer("b", a)
+
+    return Conflict(
+        Match("x", a, [("x", "y")], {"xs"}),
+        Match("x", b, [("x", "z"), ("x", "w", "z")]),
+    )
+
+
+def test_text_reporter(conflict: Conflict) -> None:
+    out: List[str] = []
+    reporter = TextReporter(out.append, {("x", "z")})
+
+    reporter.report(conflict)
+    reporter.finish()
+
+    assert out == [
+        "x:",
+        "  Main layer: a",
+        "    x -> y",
+        "  Conflicts with: b",
+        "    x -> z",
+        "    x -> w -> z",
+        "    ... (more chains truncated)",
+        "",
+    ]
+
+
+def test_json_lines_reporter(conflict: Conflict) -> None:
+    out: List[str] = []
+    reporter = JsonLinesReporter(out.append)
+
+    reporter.report(conflict)
+    reporter.report(conflict)
+    reporter.finish()
+
+    assert len(out) == 2
+    assert json.loads(out[0]) == {
+        "module": "x",
+        "main": {
+            "layer": "a",
+            "chains": [["x", "y"]],
+            "submodules": ["xs"],
+            "truncated": False,
+        },
+        "dupe": {
+            "layer": "b",
+            "chains": [["x", "z"], ["x", "w", "z"]],
+            "submodules": [],
+            "truncated": False,
+        },
+    }
+
+
+def test_sarif_reporter(conflict: Conflict) -> None:
+    out: List[str] = []
+    reporter = SarifReporter(out.append)
+
+    reporter.report(conflict)
+
+    assert out == []
+
+    reporter.finish()
+    (log,) = map(json.loads, out)
+    (run,) = log["runs"]
+    (result,) = run["results"]
+
+    assert log["version"] == "2.1.0"
+    assert run["tool"]["driver"]["version"] == __version__
+    assert result["ruleId"] == "layer-conflict"
+    assert result["message"]["text"] == (
+        "x belongs to layer 'a', but conflicts with layer 'b'. "
+        "Import chains: x -> y; x -> z; x -> w -> z"
+    )
+    assert result["locations"][0]["logicalLocations"][0] == {
+        "fullyQualifiedName": "x",
+        "kind": "module",
+    }
+
+
+def test_load_reporter() -> None:
+    module = Mock()
+
+    def import_module(name: str) -> ModuleType:
+        assert name == "custom.reporters"
+        return module
+
+    assert load_reporter("jsonl") is REPORTERS["jsonl"]
+    assert load_reporter("custom.reporters:Reporter", import_module) is (
+        module.Reporter
+    )
+
+    with raises(ValueError):
+        load_reporter("xml")
@@ -0,0 +1,102 @@
+from pathlib import Path
+from typing import List, Optional
+
+from pytest import mark
+
+from layer_enforcer.scanner import (
+    SourceFile,
+    find_source_files,
+    resolve_import,
+    resolve_imports,
+    scan_file,
+    scan_files,
+    scan_imports,
+)
+
+
+def test_find_source_files(tmp_path: Path) -> None:
+    root = tmp_path / "pkg"
+    (root / "sub").mkdir(parents=True)
+    (root / "data").mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "a.py").write_text("")
+    (root / "sub" / "__init__.py").write_text("")
+    (root / "sub" / "b.py").write_text("")
+    (root / "data" / "c.py").write_text("")
+    single = tmp_path / "single.py"
+    single.write_text("")
+    sources = {"pkg": [root], "single": [single]}
+
+    files = find_source_files(
+        "pkg", "single", find_sources=lambda module: sources[module]
+    )
+
+    assert files == {
+        "pkg": SourceFile("pkg", root / "__init__.py", True),
+        "pkg.a": SourceFile("pkg.a", root / "a.py", False),
+        "pkg.sub": SourceFile("pkg.sub", root / "sub" / "__init__.py", True),
+        "pkg.sub.b": SourceFile("pkg.sub.b", root / "sub" / "b.py", False),
+        "single": SourceFile("single", single, False),
+    }
+
+
+@mark.parametrize(
+    ["source", "module", "is_package", "expected"],
+    [
+        (b"import a.b, c", "pkg.x", False, ["a.b", "c"]),
+        (b"from a import b, c", "pkg.x", False, ["a.b", "a.c"]),
+        (b"from a import *", "pkg.x", False, ["a"]),
+        (b"from . import y", "pkg.x", False, ["pkg.y"]),
+        (b"from .y import z", "pkg.x", False, ["pkg.y.z"]),
+        (b"from .. import y", "pkg.sub.x", False, ["pkg.y"]),
+        (b"from . import y", "pkg.sub", True, ["pkg.sub.y"]),
+        (b"from .. import y", "pkg", True, []),
+        (b"def f():\n    import a\n", "pkg", True, ["a"]),
+    ],
+)
+def test_scan_imports(
+    source: bytes, module: str, is_package: bool, expected: List[str]
+) -> None:
+    assert scan_imports(source, module, is_package) == expected
+
+
+@mark.parametrize(
+    ["name", "expected"],
+    [
+        ("sqlalchemy.orm", "sqlalchemy"),
+        ("pkg.a.func", "pkg.a"),
+        ("pkg.a", "pkg.a"),
+        ("pkg.missing", "pkg"),
+        ("other.x", None),
+    ],
+)
+def test_resolve_import(name: str, expected: Optional[str]) -> None:
+    assert resolve_import(name, {"pkg", "pkg.a"}, {"pkg", "other"}) == expected
+
+
+def test_resolve_imports() -> None:
+    assert resolve_imports(
+        {
+            "pkg": ["pkg.a", "os.path"],
+            "pkg.a": ["pkg.a.x", "pkg.b"],
+        }
+    ) == {"pkg": {"pkg.a", "os"}, "pkg.a": {"pkg"}}
+
+
+def test_scan_files(tmp_path: Path) -> None:
+    (tmp_path / "__init__.py").write_text("from . import a\n")
+    (tmp_path / "a.py").write_text("import os.path\nfrom pkg.b import x\n")
+    (tmp_path / "b.py").write_text("")
+    files = {
+        "pkg": SourceFile("pkg", tmp_path / "__init__.py", True),
+        "pkg.a": SourceFile("pkg.a", tmp_path / "a.py", False),
+        "pkg.b": SourceFile("pkg.b", tmp_path / "b.py", False),
+    }
+
+    assert scan_file(files["pkg.a"]) == ["os.path", "pkg.b.x"]
+    assert scan_files(files) == {
+        "pkg": {"pkg.a"},
+        "pkg.a": {"os", "pkg.b"},
+        "pkg.b": set(),
+    }
+    assert scan_files(files, jobs=2) == scan_files(files)
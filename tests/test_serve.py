@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Set
+
+from pytest import fixture, raises
+
+from layer_enforcer.interfaces import Layer
+from layer_enforcer.serve import Server, ServerError, serve
+from layer_enforcer.watch import Watcher
+
+
+@fixture
+def layers() -> Set[Layer]:
+    return {Layer("db", imports={"sqlalchemy"}), Layer("web", imports={"flask"})}
+
+
+@fixture
+def package(tmp_path: Path) -> Path:
+    package = tmp_path / "app"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("import sqlalchemy\n")
+    (package / "b.py").write_text("import flask\n")
+    (package / "c.py").write_text("import app.a\nimport app.b\n")
+
+    return package
+
+
+@fixture
+def server(package: Path, layers: Set[Layer]) -> Server:
+    return Server(Watcher(["app"], layers, find_sources=lambda module: [package]))
+
+
+def respond(server: Server, request: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(server.respond(json.dumps(request)))  # type: ignore
+
+
+def test_conflicts(server: Server) -> None:
+    everything = respond(server, {"id": 1, "method": "conflicts"})
+    response = respond(server, {"method": "conflicts", "module": "app.c"})
+
+    assert everything["id"] == 1
+    assert len(everything["result"]) == 2
+    assert response == {"result": everything["result"]}
+    assert response["result"][0]["module"] == "app.c"
+    assert response["result"][0]["main"]["layer"] == "db"
+    assert response["result"][0]["dupe"]["chains"] == [["app.c", "app.b", "flask"]]
+    assert respond(server, {"method": "conflicts", "module": "app.a"}) == {"result": []}
+
+
+def test_layer(server: Server) -> None:
+    assert respond(server, {"method": "layer", "module": "app.c"}) == {
+        "result": {
+            "module": "app.c",
+            "layer": "db",
+            "chains": [["app.c", "app.a", "sqlalchemy"]],
+            "submodules": [],
+            "truncated": False,
+        }
+    }
+    assert respond(server, {"method": "layer", "module": "app"}) == {
+        "result": {"module": "app", "layer": None}
+    }
+
+
+def test_recheck(server: Server, package: Path) -> None:
+    respond(server, {"method": "conflicts"})
+    path = package / "c.py"
+    stat = path.stat()
+    path.write_text("import app.a\nimport app.a\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert respond(server, {"method": "recheck", "file": str(path)}) == {
+        "result": {"modules": ["app.c"], "errors": {}, "conflicts": []}
+    }
+
+    path.write_text("import (\n")
+    response = respond(server, {"method": "recheck", "file": str(path)})
+
+    assert list(response["result"]["errors"]) == [str(path)]
+
+
+def test_errors(server: Server, tmp_path: Path) -> None:
+    assert server.respond("{").startswith('{"error": "Invalid JSON: ')
+    assert json.loads(server.respond("[]")) == {
+        "error": "Request is not a JSON object."
+    }
+    assert respond(server, {"id": "x", "method": "nope"}) == {
+        "id": "x",
+        "error": "Unknown method: 'nope'.",
+    }
+    assert respond(server, {"method": [1]}) == {"error": "Missing 'method' string."}
+    assert respond(server, {"method": "layer"}) == {"error": "Missing 'module' string."}
+    assert respond(server, {"method": "conflicts", "module": ["x"]}) == {
+        "error": "'module' must be a string."
+    }
+    assert (
+        "is not a source file"
+        in respond(server, {"method": "recheck", "file": str(tmp_path / "other.py")})[
+            "error"
+        ]
+    )
+
+
+def test_unexpected_error(server: Server) -> None:
+    def fail(request: Mapping[str, Any]) -> Any:
+        raise KeyError("boom")
+
+    server.methods["fail"] = fail
+
+    assert respond(server, {"id": 1, "method": "fail"}) == {
+        "id": 1,
+        "error": "Internal error: KeyError: 'boom'",
+    }
+
+
+def test_serve(server: Server, tmp_path: Path) -> None:
+    path = tmp_path / "server.sock"
+
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(str(path))
+
+    async def query(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        reader, writer = await asyncio.open_unix_connection(str(path))
+        responses = []
+
+        for request in requests:
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+
+        writer.close()
+
+        return responses
+
+    async def main() -> List[List[Dict[str, Any]]]:
+        started = asyncio.Event()
+        task = asyncio.ensure_future(serve(server, path, started=started.set))
+        await started.wait()
+
+        try:
+            return list(
+                await asyncio.gather(
+                    query([{"id": 1, "method": "conflicts", "module": "app.c"}]),
+                    query(
+                        [
+                            {"id": 2, "method": "layer", "module": "app.a"},
+                            {"id": 3, "method": "layer", "module": "app.b"},
+                        ]
+                    ),
+                )
+            )
+        finally:
+            task.cancel()
+
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    first, second = asyncio.run(main())
+
+    assert [response["id"] for response in first + second] == [1, 2, 3]
+    assert len(first[0]["result"]) == 2
+    assert [response["result"]["layer"] for response in second] == ["db", "web"]
+    assert not path.exists()
+
+
+def test_serve_live_socket(server: Server, tmp_path: Path) -> None:
+    path = tmp_path / "server.sock"
+
+    async def main() -> None:
+        started = asyncio.Event()
+        task = asyncio.ensure_future(serve(server, path, started=started.set))
+        await started.wait()
+
+        try:
+            with raises(ServerError, match="Another server"):
+                await serve(server, path)
+
+            reader, writer = await asyncio.open_unix_connection(str(path))
+            writer.write(b'{"id": 1, "method": "conflicts"}\n')
+            await writer.drain()
+
+            assert json.loads(await reader.readline())["id"] == 1
+
+            writer.close()
+        finally:
+            task.cancel()
+
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    asyncio.run(main())
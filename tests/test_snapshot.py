@@ -0,0 +1,143 @@
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator
+
+from pytest import fixture, raises
+
+from layer_enforcer.graph import GraphError, GraphTree
+from layer_enforcer.snapshot import (
+    FORMAT_VERSION,
+    HEADER,
+    MAGIC,
+    MmapTree,
+    SnapshotTreeFactory,
+    save_snapshot,
+    write_snapshot,
+)
+from layer_enforcer.testing import GraphSpec, make_graph
+
+
+@fixture
+def graph() -> GraphTree:
+    return GraphTree(
+        ["app"],
+        {
+            "app": set(),
+            "app-x": {"app"},
+            "app.a": {"app.b", "app.c", "ext"},
+            "app.b": {"app.d"},
+            "app.c": {"app.b", "app.d"},
+            "app.d": {"app.c", "ext", "ünicode"},
+        },
+    )
+
+
+@fixture
+def path(tmp_path: Path, graph: GraphTree) -> Path:
+    path = tmp_path / "graph.snapshot"
+    save_snapshot(graph, ["app"], path)
+
+    return path
+
+
+@fixture
+def tree(path: Path) -> Iterator[MmapTree]:
+    with MmapTree(path) as tree:
+        yield tree
+
+
+def test_walk(tree: MmapTree) -> None:
+    assert tree.roots == ("app",)
+    assert list(tree.walk()) == ["app", "app.a", "app.b", "app.c", "app.d"]
+
+
+def test_walk_roots(path: Path) -> None:
+    with MmapTree(path, ["app.b", "app.a", "app.a"]) as tree:
+        assert list(tree.walk()) == ["app.a", "app.b"]
+
+
+def test_find_chains(tree: MmapTree, graph: GraphTree) -> None:
+    assert sorted(tree.find_chains("app.a", "app.d")) == sorted(
+        graph.find_chains("app.a", "app.d")
+    )
+    assert list(tree.find_chains("app.a", "missing")) == []
+
+
+def test_find_upstream_modules(tree: MmapTree) -> None:
+    assert tree.find_upstream_modules("app.b") == {"app.c", "app.d", "ext", "ünicode"}
+    assert tree.find_upstream_modules("zzz") == set()
+
+
+def test_find_importers(tree: MmapTree) -> None:
+    assert tree.find_importers({"ext", "app"}) == {
+        "ext": {"app.a", "app.b", "app.c", "app.d"},
+        "app": set(),
+    }
+
+
+def test_same_as_graph(tmp_path: Path) -> None:
+    graph = make_graph(GraphSpec(modules=200))
+    path = tmp_path / "graph.snapshot"
+    save_snapshot(graph, graph.roots, path)
+
+    with MmapTree(path) as tree:
+        assert list(tree.modules) == graph.modules
+        assert list(tree.walk()) == list(graph.walk())
+        assert tree.imports == graph.imports
+        assert tree.importers == graph.importers
+        assert tree.ids == graph.ids
+
+
+def test_write_snapshot_any_tree(tree: MmapTree, graph: GraphTree) -> None:
+    f = BytesIO()
+    write_snapshot(tree, ["app"], f)
+    expected = BytesIO()
+    write_snapshot(graph, ["app"], expected)
+
+    assert f.getvalue() == expected.getvalue()
+
+
+def test_dump(tree: MmapTree, graph: GraphTree) -> None:
+    f = BytesIO()
+    tree.dump(f)
+    f.seek(0)
+    loaded = GraphTree.load(f)
+
+    assert list(loaded.walk()) == list(graph.walk())
+    assert loaded.find_upstream_modules("app.a") == graph.find_upstream_modules("app.a")
+
+
+def test_errors(tmp_path: Path, path: Path) -> None:
+    data = path.read_bytes()
+    corrupt = tmp_path / "corrupt"
+
+    for content in [
+        b"",
+        b"garbage",
+        b"X" * 8 + data[8:],
+        data[:-4],
+        HEADER.pack(MAGIC, FORMAT_VERSION + 1, 0, 0, 0, 0),
+    ]:
+        corrupt.write_bytes(content)
+
+        with raises(GraphError):
+            MmapTree(corrupt)
+
+    with raises(GraphError, match="'other'"):
+        MmapTree(path, ["other"])
+
+
+def test_snapshot_tree_factory(path: Path) -> None:
+    tree = SnapshotTreeFactory(path)("app.a")
+
+    assert isinstance(tree, MmapTree)
+    assert list(tree.walk()) == ["app.a"]
+
+    tree.close()
+
+    with raises(GraphError, match=f"^{re.escape(str(path.parent))}/missing: "):
+        SnapshotTreeFactory(path.parent / "missing")("app.a")
+
+    with raises(GraphError, match=f"^{re.escape(str(path))}: Module 'other'"):
+        SnapshotTreeFactory(path)("other")
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from layer_enforcer.closure import Closure
+from layer_enforcer.impl import match_modules
+from layer_enforcer.native import new_native_tree
+from layer_enforcer.testing import (
+    PACKAGE,
+    GraphSpec,
+    make_graph,
+    make_layers,
+    write_package,
+)
+from layer_enforcer.utils import depth
+
+
+def test_make_layers() -> None:
+    layers = make_layers(GraphSpec(layer_depth=3, submodules=2))
+
+    assert sorted((depth(layer), layer.name) for layer in layers) == [
+        (1, "layer0"),
+        (2, "layer1"),
+        (3, "layer2"),
+    ]
+    assert all(len(layer.submodules) == 2 for layer in layers)
+
+
+def test_make_graph() -> None:
+    spec = GraphSpec(modules=200, fan_out=3, cycle_density=0.2, seed=1)
+    tree = make_graph(spec)
+    leaves = [module for module in tree.walk() if module.count(".") == 2]
+
+    assert len(leaves) == 200
+    assert make_graph(spec).imports == tree.imports
+    assert make_graph(GraphSpec(modules=200, seed=2)).imports != tree.imports
+    assert list(match_modules(tree, make_layers(spec)))
+
+
+def test_make_graph_cycles() -> None:
+    def has_cycles(cycle_density: float) -> bool:
+        tree = make_graph(GraphSpec(modules=100, cycle_density=cycle_density))
+        closure = Closure(tree, list(tree.walk()))
+        return any(len(component) > 1 for component in closure.components)
+
+    assert not has_cycles(0)
+    assert has_cycles(0.5)
+
+
+def test_write_package(tmp_path: Path) -> None:
+    tree = make_graph(GraphSpec(modules=50))
+    root = write_package(tree, tmp_path)
+
+    assert root == tmp_path / PACKAGE
+
+    native = new_native_tree(PACKAGE, find_sources=lambda module: [root])
+
+    assert native.modules == tree.modules
+    assert native.imports == tree.imports
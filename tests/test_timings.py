@@ -0,0 +1,86 @@
+from layer_enforcer.timings import Phase, Timings, format_timings
+
+
+def test_timings() -> None:
+    timings = Timings()
+
+    timings.start("a")
+    timings.start("b")
+    timings.stop()
+    timings.stop()
+
+    with timings.phase("c"):
+        pass
+
+    assert [phase.name for phase in timings.phases] == ["a", "b", "c"]
+    assert all(phase.wall >= 0 and phase.cpu >= 0 for phase in timings.phases)
+    assert all(phase.peak_memory is None for phase in timings.phases)
+
+
+def test_timings_trace_memory() -> None:
+    timings = Timings(trace_memory=True)
+
+    with timings.phase("allocate"):
+        data = [bytearray(1024) for _ in range(100)]
+
+    with timings.phase("noop"):
+        pass
+
+    allocate, noop = timings.phases
+
+    assert data
+    assert allocate.peak_memory is not None
+    assert noop.peak_memory is not None
+    assert allocate.peak_memory > 100 * 1024 > noop.peak_memory
+
+
+def test_timings_nested() -> None:
+    timings = Timings()
+
+    timings.start("config")
+
+    with timings.phase("layers"):
+        pass
+
+    with timings.phase("layers"):
+        pass
+
+    timings.stop()
+
+    assert [phase.name for phase in timings.phases] == [
+        "config",
+        "layers",
+        "config",
+        "layers",
+        "config",
+    ]
+    assert [phase.name for phase in timings.summary()] == ["config", "layers"]
+
+
+def test_summary() -> None:
+    timings = Timings()
+    timings.phases = [
+        Phase("a", 1.0, 0.5, None, 10),
+        Phase("b", 2.0, 1.0, 5, 20),
+        Phase("a", 3.0, 0.5, 7, 30),
+    ]
+
+    assert timings.summary() == [
+        Phase("a", 4.0, 1.0, 7, 30),
+        Phase("b", 2.0, 1.0, 5, 20),
+    ]
+
+
+def test_format_timings() -> None:
+    timings = Timings()
+    timings.phases = [
+        Phase("config", 0.25, 0.125, None, 2**20),
+        Phase("pass 1", 1.5, 1.25, None, 3 * 2**20),
+    ]
+
+    assert format_timings(timings) == [
+        "phase        wall        cpu      max rss",
+        "config     0.250s     0.125s      1.0 MiB",
+        "pass 1     1.500s     1.250s      3.0 MiB",
+        "total      1.750s     1.375s      3.0 MiB",
+    ]
@@ -0,0 +1,144 @@
+import os
+from pathlib import Path
+from typing import List, Set
+
+from pytest import fixture
+
+from layer_enforcer.impl import match_modules
+from layer_enforcer.interfaces import Layer
+from layer_enforcer.matchers import IgnoreMatcher
+from layer_enforcer.native import new_native_tree
+from layer_enforcer.watch import Watcher, conflict_key, describe, watch
+
+
+@fixture
+def layers() -> Set[Layer]:
+    return {Layer("db", imports={"sqlalchemy"}), Layer("web", imports={"flask"})}
+
+
+@fixture
+def package(tmp_path: Path) -> Path:
+    package = tmp_path / "app"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "a.py").write_text("import sqlalchemy\n")
+    (package / "b.py").write_text("import flask\n")
+    (package / "c.py").write_text("import app.a\n")
+
+    return package
+
+
+def write(path: Path, source: str) -> None:
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(source)
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+def describe_all(conflicts: object) -> List[str]:
+    return sorted(describe(conflict) for conflict in conflicts)  # type: ignore
+
+
+def test_watcher(package: Path, layers: Set[Layer]) -> None:
+    def find_sources(module: str) -> List[Path]:
+        return [package]
+
+    def full_run() -> List[str]:
+        tree = new_native_tree("app", find_sources=find_sources)
+        return describe_all(match_modules(tree, layers))
+
+    watcher = Watcher(["app"], layers, find_sources=find_sources)
+    update = watcher.update()
+
+    assert not update
+    assert update.checked == 4
+    assert not watcher.update()
+
+    write(package / "c.py", "import app.a\nimport app.b\n")
+    update = watcher.update()
+
+    assert describe_all(update.new) == [
+        "app.c: db conflicts with web (imports app.b)",
+        "app.c: db conflicts with web (imports flask)",
+    ]
+    assert update.resolved == []
+    assert update.checked == 1
+    assert describe_all(watcher) == full_run()
+
+    write(package / "a.py", "import sqlalchemy\nimport app.b\n")
+    update = watcher.update()
+
+    assert len(update.new) == 2
+    assert update.checked == 2
+    assert describe_all(watcher) == full_run()
+
+    write(package / "a.py", "import sqlalchemy\nimport (\n")
+    update = watcher.update()
+
+    assert list(update.errors) == [package / "a.py"]
+    assert update.new == update.resolved == []
+
+    (package / "b.py").unlink()
+    update = watcher.update()
+
+    assert update.new == []
+    assert len(update.resolved) == 4
+    assert len(watcher) == 0
+    assert {conflict_key(conflict)[0] for conflict in update.resolved} == {
+        "app.a",
+        "app.c",
+    }
+
+
+def test_watcher_ignore(package: Path, layers: Set[Layer]) -> None:
+    write(package / "c.py", "import app.a\nimport app.b\n")
+    watcher = Watcher(
+        ["app"],
+        layers,
+        find_sources=lambda module: [package],
+        ignore=IgnoreMatcher(["app.c"]),
+    )
+
+    assert watcher.update().new == []
+
+
+def test_watch(package: Path, layers: Set[Layer]) -> None:
+    watcher = Watcher(["app"], layers, find_sources=lambda module: [package])
+    out: List[str] = []
+    sleeps: List[float] = []
+
+    def sleep(interval: float) -> None:
+        sleeps.append(interval)
+
+        if len(sleeps) == 1:
+            write(package / "b.py", "import flask\nimport app.a\n")
+        else:
+            raise KeyboardInterrupt
+
+    watch(watcher, out.append, interval=0.1, sleep=sleep)
+
+    assert sleeps == [0.1, 0.1]
+    assert out[0].endswith("] 0 new, 0 resolved, 0 total conflicts")
+    assert out[1].endswith("] 1 new, 0 resolved, 1 total conflicts")
+    assert out[2:] == ["+ app.b: db conflicts with web (imports flask)"]
+
+
+def test_watch_stop(package: Path, layers: Set[Layer]) -> None:
+    watcher = Watcher(["app"], layers, find_sources=lambda module: [package])
+    out: List[str] = []
+
+    watch(watcher, out.append, should_stop=lambda: True)
+
+    assert len(out) == 1
+
+
+def test_watcher_force(package: Path, layers: Set[Layer]) -> None:
+    watcher = Watcher(["app"], layers, find_sources=lambda module: [package])
+    watcher.update()
+    path = package / "b.py"
+    stat = path.stat()
+    path.write_text("import app.a\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert not watcher.update()
+    assert watcher.update(force={"app.b"}).checked == 1
+    assert watcher.imports["app.b"] == {"app.a"}